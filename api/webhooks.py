@@ -1,8 +1,11 @@
 
+import hmac
 from flask import Flask, request, jsonify, abort
-from config.settings import WEBHOOK_SECRET, WEBHOOK_PORT
+from config.settings import WEBHOOK_SECRET, WEBHOOK_PORT, CHATWOOT_WEBHOOK_TOKEN
 from services.message_service import message_service
 from services.lead_service import lead_service
+from services.chatwoot_events import chatwoot_events
+from integrations.evolution import EvolutionClient
 from utils.logger import logger
 from utils.validators import normalize_phone
 
@@ -23,6 +26,27 @@ def validate_secret(f):
     wrapper.__name__ = f.__name__
     return wrapper
 
+def validate_chatwoot_token(f):
+    """
+    Decorator para autenticar o webhook do Chatwoot, que altera status de leads.
+    O Chatwoot não envia headers customizados: o token vai na URL configurada no
+    Chatwoot (?token=...); o header X-Webhook-Secret também é aceito.
+    Diferente de validate_secret, exige o token (sem token configurado, recusa).
+    """
+    def wrapper(*args, **kwargs):
+        if not CHATWOOT_WEBHOOK_TOKEN:
+            logger.error("Webhook do Chatwoot recusado: CHATWOOT_WEBHOOK_TOKEN/WEBHOOK_SECRET não configurado.")
+            return jsonify({"error": "Webhook not configured"}), 503
+
+        token = request.args.get("token") or request.headers.get("X-Webhook-Secret") or ""
+        if not hmac.compare_digest(token.encode(), CHATWOOT_WEBHOOK_TOKEN.encode()):
+            logger.warning("Tentativa de acesso ao webhook do Chatwoot com token inválido.")
+            return jsonify({"error": "Unauthorized"}), 401
+        return f(*args, **kwargs)
+
+    wrapper.__name__ = f.__name__
+    return wrapper
+
 @app.route("/health", methods=["GET"])
 def health_check():
     return jsonify({"status": "ok"}), 200
@@ -39,7 +63,13 @@ def webhook_evolution():
             return jsonify({"status": "ignored", "reason": "no data"}), 200
 
         # Identifica tipo de evento (Evolution pode mandar vários tipos)
-        event_type = data.get("type")
+        event_type = data.get("event") or data.get("type") or ""
+
+        # Recibos de entrega/leitura (v1: MESSAGES_UPDATE, v2: messages.update)
+        if event_type.lower().replace("_", ".") == "messages.update":
+            updates = EvolutionClient.parse_status_updates(data)
+            applied = sum(message_service.handle_status_update(mid, status) for mid, status in updates)
+            return jsonify({"status": "processed", "updates": applied}), 200
         
         # Foca apenas em mensagens de texto recebidas (MESSAGE_UPSERT ou similar)
         # Estrutura típica Evolution v1/v2
@@ -75,32 +105,19 @@ def webhook_evolution():
         return jsonify({"error": "Internal Error"}), 500
 
 @app.route("/webhook/chatwoot", methods=["POST"])
-# @validate_secret # Chatwoot nem sempre envia headers customizados facilmente configuráveis, manter opcional
+@validate_chatwoot_token
 def webhook_chatwoot():
     """
-    Recebe eventos do Chatwoot (mudança de status, interação manual).
+    Recebe eventos do Chatwoot (contatos, mensagens, mudança de status).
+    Mantém índice de contatos, estado das conversas e status dos leads atualizados.
     """
     try:
         data = request.json
-        event = data.get("event")
-        
-        if event == "conversation_status_changed":
-            # Ex: Agente manual fechou a conversa ou marcou como resolvida
-            meta = data.get("meta", {})
-            sender = meta.get("sender", {})
-            
-            # Se for uma ação manual (user), podemos querer atualizar algo no nosso banco
-            # Por enquanto, apenas logamos
-            contact = data.get("meta", {}).get("sender", {})
-            phone = contact.get("phone_number", "")
-            status = data.get("status") # 'resolved', 'open', etc
-            
-            logger.info(f"Evento Chatwoot: status da conversa com {phone} mudou para {status}")
-            
-            # TODO: Se humano resolver, mover lead para status 'converted' ou 'finished'?
-            # Deixar para Fase 2 por segurança.
-            
-        return jsonify({"status": "received"}), 200
+        if not data:
+            return jsonify({"status": "ignored", "reason": "no data"}), 200
+
+        result = chatwoot_events.handle(data)
+        return jsonify({"status": result}), 200
         
     except Exception as e:
         logger.error(f"Erro no webhook chatwoot: {e}")
@@ -0,0 +1,31 @@
+"""
+Palavras-chave de recusa e de parada, por idioma (pt/es).
+A comparação ignora acentos, maiúsculas e espaços extras, e só casa palavras
+inteiras: não é preciso repetir variações com e sem acento.
+"""
+
+# Recusa no histórico do Chatwoot (ChatwootClient.check_if_declined)
+DECLINE_KEYWORDS = {
+    "pt": [
+        "não tenho interesse",
+        "não quero",
+        "para de mandar",
+        "pare de mandar",
+        "remova meu número",
+        "não me ligue",
+    ],
+    "es": [
+        "no tengo interés",
+        "no me interesa",
+        "no quiero",
+        "deja de enviar",
+        "borra mi número",
+        "no me llames",
+    ],
+}
+
+# Pedido de parada em mensagem recebida (MessageService.handle_incoming)
+STOP_KEYWORDS = {
+    "pt": ["pare", "stop", "não quero", "remover", "sair", "descadastrar"],
+    "es": ["basta", "no quiero", "eliminar", "darme de baja"],
+}
@@ -9,6 +9,10 @@ load_dotenv()
 # Base Directory
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Storage Backend ("supabase" ou "sqlite" para instalação de um nó / benchmarks locais)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "supabase").lower()
+SQLITE_PATH = os.getenv("SQLITE_PATH", str(BASE_DIR / "data" / "sdr_agent.db"))
+
 # Supabase Credentials
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
@@ -57,18 +61,111 @@ WARMUP_START_DATE = os.getenv("WARMUP_START_DATE") # Format: YYYY-MM-DD
 # Scheduling
 MESSAGE_INTERVAL_MINUTES = int(os.getenv("MESSAGE_INTERVAL_MINUTES", 30))
 
+# Lead Queue (claim em lote com lease)
+LEAD_QUEUE_BATCH_SIZE = int(os.getenv("LEAD_QUEUE_BATCH_SIZE", 10))
+# 0 = derivado do lote: batch_size x MESSAGE_INTERVAL_MINUTES + margem (cobre o lote inteiro)
+LEAD_QUEUE_LEASE_SECONDS = int(os.getenv("LEAD_QUEUE_LEASE_SECONDS", 0))
+
+# Agent State Cache
+AGENT_STATE_TTL_SECONDS = int(os.getenv("AGENT_STATE_TTL_SECONDS", 60))
+AGENT_STATE_FLUSH_SECONDS = int(os.getenv("AGENT_STATE_FLUSH_SECONDS", 5))
+
+# Lead Lookup Cache (webhook)
+LEAD_CACHE_MAXSIZE = int(os.getenv("LEAD_CACHE_MAXSIZE", 2048))
+LEAD_CACHE_TTL_SECONDS = int(os.getenv("LEAD_CACHE_TTL_SECONDS", 120))
+# Cache negativo ("não é lead") curto: um lead criado por outro processo (importação,
+# dashboard) fica invisível ao webhook no máximo por esse tempo
+LEAD_CACHE_NEGATIVE_TTL_SECONDS = int(os.getenv("LEAD_CACHE_NEGATIVE_TTL_SECONDS", 15))
+
+# Bulk Import
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 500))
+# Importação de CSV em streaming (blocos validados em paralelo, em processos separados)
+IMPORT_CSV_CHUNK_SIZE = int(os.getenv("IMPORT_CSV_CHUNK_SIZE", 2000))
+IMPORT_CSV_WORKERS = int(os.getenv("IMPORT_CSV_WORKERS", 4))
+
+# Importação do Chatwoot (pipeline histórico -> LLM -> escrita em lote)
+IMPORT_LLM_BACKEND = os.getenv("IMPORT_LLM_BACKEND", "openai")  # openai | stub
+IMPORT_LLM_MODEL = os.getenv("IMPORT_LLM_MODEL", "gpt-4o-mini")
+IMPORT_LLM_RPM = int(os.getenv("IMPORT_LLM_RPM", 500))
+IMPORT_LLM_TPM = int(os.getenv("IMPORT_LLM_TPM", 200000))
+IMPORT_HISTORY_WORKERS = int(os.getenv("IMPORT_HISTORY_WORKERS", 4))
+IMPORT_LLM_WORKERS = int(os.getenv("IMPORT_LLM_WORKERS", 8))
+IMPORT_WRITE_BATCH_SIZE = int(os.getenv("IMPORT_WRITE_BATCH_SIZE", 100))
+IMPORT_PROGRESS_SECONDS = int(os.getenv("IMPORT_PROGRESS_SECONDS", 30))
+# Cache persistente das análises (hash do histórico + versão do prompt)
+IMPORT_ANALYSIS_CACHE_ENABLED = os.getenv("IMPORT_ANALYSIS_CACHE_ENABLED", "true").lower() == "true"
+IMPORT_ANALYSIS_CACHE_PATH = os.getenv("IMPORT_ANALYSIS_CACHE_PATH", str(BASE_DIR / "data" / "llm_analyses.db"))
+# Checkpoint (retomada) e watermark da importação incremental
+IMPORT_CHECKPOINT_PATH = os.getenv("IMPORT_CHECKPOINT_PATH", str(BASE_DIR / "data" / "chatwoot_import.db"))
+# Contatos que falharam voltam nas próximas execuções até este número de tentativas
+IMPORT_RETRY_MAX_ATTEMPTS = int(os.getenv("IMPORT_RETRY_MAX_ATTEMPTS", 5))
+# Pré-classificação local (conversas óbvias não vão ao LLM)
+IMPORT_PRECLASSIFY_ENABLED = os.getenv("IMPORT_PRECLASSIFY_ENABLED", "true").lower() == "true"
+IMPORT_PRECLASSIFY_MIN_CONFIDENCE = float(os.getenv("IMPORT_PRECLASSIFY_MIN_CONFIDENCE", 0.8))
+IMPORT_STALE_DAYS = float(os.getenv("IMPORT_STALE_DAYS", 180))
+
+# Leitura paginada de leads (keyset em created_at, id)
+LEADS_PAGE_SIZE = int(os.getenv("LEADS_PAGE_SIZE", 1000))
+
+# Sync Queue Worker
+SYNC_BATCH_SIZE = int(os.getenv("SYNC_BATCH_SIZE", 20))
+SYNC_MAX_WORKERS = int(os.getenv("SYNC_MAX_WORKERS", 4))
+SYNC_MAX_ATTEMPTS = int(os.getenv("SYNC_MAX_ATTEMPTS", 5))
+SYNC_BACKOFF_SECONDS = int(os.getenv("SYNC_BACKOFF_SECONDS", 60))
+SYNC_LEASE_SECONDS = int(os.getenv("SYNC_LEASE_SECONDS", 300))
+
+# HTTP (sessions compartilhadas com keep-alive por integração)
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", 4))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", 10))
+EVOLUTION_HTTP_TIMEOUT = int(os.getenv("EVOLUTION_HTTP_TIMEOUT", 15))
+CHATWOOT_HTTP_TIMEOUT = int(os.getenv("CHATWOOT_HTTP_TIMEOUT", 10))
+TRELLO_HTTP_TIMEOUT = int(os.getenv("TRELLO_HTTP_TIMEOUT", 10))
+SERPAPI_HTTP_TIMEOUT = int(os.getenv("SERPAPI_HTTP_TIMEOUT", 30))
+
+# Verificação de WhatsApp em lote (Evolution /chat/whatsappNumbers)
+WHATSAPP_CHECK_CHUNK_SIZE = int(os.getenv("WHATSAPP_CHECK_CHUNK_SIZE", 50))
+WHATSAPP_CHECK_MAX_WORKERS = int(os.getenv("WHATSAPP_CHECK_MAX_WORKERS", 4))
+
+# Índice local de contatos do Chatwoot (telefone -> contact_id)
+CHATWOOT_INDEX_ENABLED = os.getenv("CHATWOOT_INDEX_ENABLED", "true").lower() == "true"
+CHATWOOT_INDEX_PATH = os.getenv("CHATWOOT_INDEX_PATH", str(BASE_DIR / "data" / "chatwoot_contacts.db"))
+CHATWOOT_INDEX_REFRESH_MINUTES = int(os.getenv("CHATWOOT_INDEX_REFRESH_MINUTES", 10))
+# Ausência no índice só vale como "não existe" se a última sincronização for mais recente que isso
+CHATWOOT_INDEX_MAX_AGE_SECONDS = int(os.getenv("CHATWOOT_INDEX_MAX_AGE_SECONDS", 1800))
+# Conversas buscadas em paralelo ao montar o histórico de um contato
+CHATWOOT_HISTORY_MAX_WORKERS = int(os.getenv("CHATWOOT_HISTORY_MAX_WORKERS", 4))
+# Páginas de contatos buscadas à frente na listagem em streaming
+CHATWOOT_PAGE_PREFETCH = int(os.getenv("CHATWOOT_PAGE_PREFETCH", 3))
+
+# Envio em partes (agendador não bloqueante)
+SEND_PART_GAP_SECONDS = float(os.getenv("SEND_PART_GAP_SECONDS", 3))
+SEND_MAX_WORKERS = int(os.getenv("SEND_MAX_WORKERS", 4))
+SEND_MAX_ATTEMPTS = int(os.getenv("SEND_MAX_ATTEMPTS", 3))
+SEND_RETRY_BACKOFF_SECONDS = float(os.getenv("SEND_RETRY_BACKOFF_SECONDS", 2))
+
+# Cache persistente de números WhatsApp (SQLite local)
+WHATSAPP_CACHE_ENABLED = os.getenv("WHATSAPP_CACHE_ENABLED", "true").lower() == "true"
+WHATSAPP_CACHE_PATH = os.getenv("WHATSAPP_CACHE_PATH", str(BASE_DIR / "data" / "whatsapp_numbers.db"))
+WHATSAPP_CACHE_TTL_DAYS = float(os.getenv("WHATSAPP_CACHE_TTL_DAYS", 30))
+WHATSAPP_CACHE_NEGATIVE_TTL_DAYS = float(os.getenv("WHATSAPP_CACHE_NEGATIVE_TTL_DAYS", 7))
+
 # Webhook Settings
 WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", 5000))
 WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
+# Token do webhook do Chatwoot (na URL: /webhook/chatwoot?token=...); padrão: WEBHOOK_SECRET.
+# Obrigatório: sem token configurado o endpoint recusa os eventos
+CHATWOOT_WEBHOOK_TOKEN = os.getenv("CHATWOOT_WEBHOOK_TOKEN") or WEBHOOK_SECRET
 
 # Validation
 def validate_settings():
     required_vars = [
-        "SUPABASE_URL", "SUPABASE_KEY",
         "EVOLUTION_API_URL", "EVOLUTION_API_KEY",
         "CHATWOOT_API_URL", "CHATWOOT_API_TOKEN", "CHATWOOT_ACCOUNT_ID"
     ]
     
+    if STORAGE_BACKEND == "supabase":
+        required_vars += ["SUPABASE_URL", "SUPABASE_KEY"]
+    
     missing = [var for var in required_vars if not os.getenv(var)]
     
     if missing:
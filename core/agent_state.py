@@ -0,0 +1,96 @@
+import atexit
+import threading
+import time
+from typing import Dict, Any, Optional
+from config.settings import AGENT_STATE_TTL_SECONDS, AGENT_STATE_FLUSH_SECONDS
+from integrations.supabase_client import supabase
+from utils.logger import logger
+
+class AgentStateCache:
+    """
+    Cache em memória do singleton agent_state.
+    Leituras são servidas localmente (recarregadas a cada `ttl_seconds`) e as
+    atualizações são acumuladas e gravadas numa única escrita a cada
+    `flush_interval` segundos ou no encerramento do processo.
+    """
+
+    def __init__(self, db, ttl_seconds: int = AGENT_STATE_TTL_SECONDS, flush_interval: int = AGENT_STATE_FLUSH_SECONDS):
+        self.db = db
+        self.ttl_seconds = ttl_seconds
+        self.flush_interval = flush_interval
+
+        self._state: Optional[Dict[str, Any]] = None
+        self._loaded_at = 0.0
+        self._pending: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+        self._timer: Optional[threading.Timer] = None
+
+    def get(self) -> Dict[str, Any]:
+        """Retorna o estado atual (com as atualizações ainda não gravadas aplicadas)."""
+        with self._lock:
+            if self._state is None or time.monotonic() - self._loaded_at > self.ttl_seconds:
+                self._state = dict(self.db.get_agent_state())
+                self._loaded_at = time.monotonic()
+            return {**self._state, **self._pending}
+
+    def update(self, fields: Dict[str, Any]):
+        """Agenda a gravação dos campos; escritas próximas são agrupadas numa só."""
+        with self._lock:
+            self._pending.update(fields)
+            self._schedule_flush()
+
+    def increment(self, field: str, amount: int = 1) -> int:
+        """Incrementa um contador localmente e agenda a gravação do novo valor."""
+        with self._lock:
+            value = (self.get().get(field) or 0) + amount
+            self.update({field: value})
+            return value
+
+    def flush(self):
+        """Grava as atualizações pendentes numa única escrita."""
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+
+            if not self._pending:
+                return
+
+            data = self._pending
+            self._pending = {}
+
+            try:
+                row = self.db.update_agent_state(dict(data))
+                if self._state is not None:
+                    self._state.update(row or data)
+            except Exception as e:
+                # Devolve para a fila; campos atualizados nesse meio tempo têm prioridade
+                self._pending = {**data, **self._pending}
+                logger.warning(f"Falha ao gravar agent_state ({len(data)} campos pendentes): {e}")
+                self._schedule_flush()
+
+    def apply_remote(self, fields: Dict[str, Any]):
+        """
+        Atualiza o cache com valores já gravados no banco por outra operação
+        (ex: RPC de cota), sem agendar nova escrita.
+        """
+        with self._lock:
+            if self._state is not None:
+                self._state.update(fields)
+            for key in fields:
+                self._pending.pop(key, None)
+
+    def invalidate(self):
+        """Força a releitura do banco no próximo get()."""
+        with self._lock:
+            self._state = None
+
+    def _schedule_flush(self):
+        if self._timer is None:
+            self._timer = threading.Timer(self.flush_interval, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+# Instância global
+agent_state = AgentStateCache(supabase)
+atexit.register(agent_state.flush)
@@ -2,19 +2,25 @@
 import time
 import schedule
 from datetime import datetime
-from config.settings import MESSAGE_INTERVAL_MINUTES
+from config.settings import MESSAGE_INTERVAL_MINUTES, CHATWOOT_INDEX_REFRESH_MINUTES
 from services.lead_service import lead_service
+from services.lead_queue import lead_queue
+from services.sync_worker import sync_worker
 from services.message_service import message_service
 from core.warmup import warmup
+from core.agent_state import agent_state
 from integrations.supabase_client import supabase
+from integrations.chatwoot import chatwoot
+from integrations.evolution import evolution
 from utils.logger import logger
 from utils.validators import is_working_hours
 
 def heartbeat():
     """Atualiza o timestamp de última atividade do agente."""
     try:
-        supabase.update_agent_state({"last_heartbeat": datetime.utcnow().isoformat()})
-        logger.debug("Heartbeat enviado.")
+        # Agrupado com as demais escritas de agent_state pelo cache
+        agent_state.update({"last_heartbeat": datetime.utcnow().isoformat()})
+        logger.debug("Heartbeat registrado.")
     except Exception as e:
         logger.debug(f"Falha no heartbeat: {e}")
 
@@ -28,14 +34,18 @@ def process_next_lead():
     # 1. Verifica Horário
     if not is_working_hours():
         logger.info("Fora do horário comercial. Aguardando...")
+        # Leads já reivindicados não serão usados tão cedo: devolve para outros workers
+        lead_queue.release_all()
         return
 
     # 2. Verifica Warm-up / Limites
     if not warmup.can_send_now():
         logger.info("Limite de envio atingido ou warm-up não permite. Aguardando...")
+        lead_queue.release_all()
         return
 
     # 3. Busca Próximo Lead
+    reserved = False
     try:
         lead = lead_service.get_next_to_contact()
         
@@ -43,9 +53,17 @@ def process_next_lead():
             logger.info("Nenhum lead pendente para contato no momento.")
             return
 
+        # 4. Reserva atômica na cota diária (vale entre processos concorrentes)
+        if not warmup.reserve_send_slot():
+            logger.info("Cota diária esgotada por outro processo. Aguardando...")
+            # Nem este lead (já fora do buffer) nem os demais serão enviados tão cedo
+            lead_queue.release_all([lead])
+            return
+        reserved = True
+
         logger.info(f"Processando lead: {lead.get('name')} ({lead.get('phone')}) - Status: {lead.get('status')}")
 
-        # 4. Envia Mensagem (First Contact ou Follow-up)
+        # 5. Envia Mensagem (First Contact ou Follow-up)
         success = False
         status = lead.get("status")
 
@@ -65,7 +83,8 @@ def process_next_lead():
                  supabase.update_lead(lead["id"], {"contact_count": current_count + 1})
 
         if success:
-            warmup.increment_daily_count()
+            # A reserva já foi contabilizada; nada a confirmar
+            reserved = False
             logger.info(f"Mensagem enviada com sucesso para {lead.get('phone')}")
         else:
             logger.warning(f"Falha ao processar lead {lead.get('phone')}")
@@ -73,6 +92,13 @@ def process_next_lead():
     except Exception as e:
         logger.error(f"Erro crítico no ciclo de processamento: {e}")
 
+    finally:
+        if reserved:
+            try:
+                warmup.release_send_slot()
+            except Exception as e:
+                logger.error(f"Erro ao liberar reserva de envio: {e}")
+
 def run_scheduler():
     """Loop principal do agente."""
     logger.info("Iniciando Scheduler do SDR Agent...")
@@ -80,6 +106,14 @@ def run_scheduler():
     # Agenda Heartbeat a cada 5 minutos
     schedule.every(5).minutes.do(heartbeat)
     
+    # Mantém o índice local de contatos do Chatwoot (checagem de duplicidade sem HTTP)
+    if chatwoot:
+        chatwoot.refresh_contact_index()
+        schedule.every(CHATWOOT_INDEX_REFRESH_MINUTES).minutes.do(chatwoot.refresh_contact_index)
+
+    # Consome a fila de sync (Trello etc.) fora do caminho de envio
+    schedule.every(1).minutes.do(sync_worker.run_once)
+    
     # Agenda processamento principal
     # Usamos o intervalo configurado. 
     # Note que 'schedule' roda job periodicamente. 
@@ -94,6 +128,11 @@ def run_scheduler():
             time.sleep(60) # Verifica agendamentos a cada minuto
         except KeyboardInterrupt:
             logger.info("Scheduler interrompido pelo usuário.")
+            if evolution:
+                # Partes de mensagens já iniciadas são enviadas antes de sair
+                evolution.send_scheduler.shutdown(wait=True)
+            agent_state.flush()
+            lead_queue.release_all()
             break
         except Exception as e:
             logger.error(f"Erro inesperado no loop principal: {e}")
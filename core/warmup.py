@@ -1,6 +1,7 @@
 
 from datetime import datetime, date
 from config.settings import WARMUP_ENABLED, WARMUP_START_DATE
+from core.agent_state import agent_state
 from integrations.supabase_client import supabase
 from utils.validators import is_working_hours
 from utils.logger import logger
@@ -52,15 +53,14 @@ class WarmupManager:
             logger.info("Tentativa de envio fora do horário comercial.")
             return False
 
-        current_state = supabase.get_agent_state()
+        # Pré-checagem local (sem round-trip); a garantia vem de reserve_send_slot
+        current_state = agent_state.get()
         
-        # Verifica se mudou o dia para resetar contador (caso o script rode contínuo)
-        last_day_str = current_state.get("current_day")
-        if last_day_str != date.today().isoformat():
-            self.reset_daily_count()
-            current_state = supabase.get_agent_state() # Recarrega estado zerado
-
-        sent_today = current_state.get("messages_sent_today", 0)
+        # Na virada do dia o contador local ainda é o de ontem: considera zerado
+        if current_state.get("current_day") != date.today().isoformat():
+            sent_today = 0
+        else:
+            sent_today = current_state.get("messages_sent_today", 0)
         limit = self.get_max_messages_today()
 
         if sent_today >= limit:
@@ -69,24 +69,32 @@ class WarmupManager:
 
         return True
 
-    def increment_daily_count(self):
-        """Incrementa o contador de mensagens enviadas hoje."""
-        current = supabase.get_agent_state()
-        new_count = current.get("messages_sent_today", 0) + 1
-        
-        supabase.update_agent_state({
-            "messages_sent_today": new_count,
-            "last_active": datetime.utcnow().isoformat()
-        })
-        logger.debug(f"Contador diário incrementado: {new_count}")
+    def reserve_send_slot(self) -> bool:
+        """
+        Reserva atomicamente um envio na cota do dia (um round-trip).
+        A reserva já conta como envio; se o envio falhar, chame release_send_slot.
+        A virada do dia é tratada pelo próprio banco na mesma operação.
+        """
+        today = date.today().isoformat()
+        limit = self.get_max_messages_today()
+
+        sent_today = supabase.reserve_send_slot(today, limit)
+        if sent_today is None:
+            agent_state.apply_remote({"messages_sent_today": limit, "current_day": today})
+            logger.info(f"Limite diário atingido: {limit}/{limit}")
+            return False
+
+        agent_state.apply_remote({"messages_sent_today": sent_today, "current_day": today})
+        logger.debug(f"Envio reservado: {sent_today}/{limit}")
+        return True
 
-    def reset_daily_count(self):
-        """Reseta o contador (chamado na virada do dia)."""
-        supabase.update_agent_state({
-            "messages_sent_today": 0,
-            "current_day": date.today().isoformat()
-        })
-        logger.info("Contador diário resetado.")
+    def release_send_slot(self):
+        """Devolve a reserva de um envio que não aconteceu."""
+        today = date.today().isoformat()
+        sent_today = supabase.release_send_slot(today)
+        if sent_today is not None:
+            agent_state.apply_remote({"messages_sent_today": sent_today, "current_day": today})
+        logger.debug("Reserva de envio liberada.")
 
 # Instância global
 warmup = WarmupManager()
@@ -39,8 +39,7 @@ def send_manual_message(lead_id: str, message: str, phone: str = None):
     try:
         # Se não tem phone, busca do lead
         if not phone:
-            lead = supabase.client.table("leads").select("phone").eq("id", lead_id).single().execute()
-            phone = lead.data['phone']
+            phone = supabase.get_lead_by_id(lead_id, view=("id", "phone"))["phone"]
             
         # Usa MessageService
         # message_service.send_message_via_evolution(phone, message) # Método privado/interno
@@ -2,6 +2,8 @@
 import os
 import pandas as pd
 from integrations.supabase_client import supabase
+from integrations.models import LEAD_DASHBOARD_VIEW
+from utils.validators import classify_phones
 from datetime import datetime, timedelta
 
 def get_leads_dataframe():
@@ -9,9 +11,12 @@ def get_leads_dataframe():
     try:
         if not supabase: return pd.DataFrame()
         
-        # Busca leads (assumindo limite razoável ou paginação futura)
-        response = supabase.client.table("leads").select("*").execute()
-        data = response.data
+        # Tabela inteira em páginas (keyset), apenas as colunas exibidas no dashboard
+        data = [
+            lead.to_dict()
+            for page in supabase.iter_leads(view=LEAD_DASHBOARD_VIEW)
+            for lead in page
+        ]
         
         if not data:
             return pd.DataFrame()
@@ -23,6 +28,10 @@ def get_leads_dataframe():
             df['created_at'] = pd.to_datetime(df['created_at'])
         if 'next_contact_at' in df.columns:
             df['next_contact_at'] = pd.to_datetime(df['next_contact_at'])
+
+        # País pelo DDI (vetorizado, sem loop por linha)
+        if 'phone' in df.columns:
+            df['country'] = classify_phones(df['phone'])['country'].fillna("Inválido")
             
         return df
     except Exception as e:
@@ -37,12 +46,7 @@ def get_message_logs_dataframe():
         # Pegar logs dos últimos 30 dias para performance
         thirty_days_ago = (datetime.now() - timedelta(days=30)).isoformat()
         
-        response = supabase.client.table("messages")\
-            .select("*")\
-            .gte("sent_at", thirty_days_ago)\
-            .execute()
-            
-        data = response.data
+        data = supabase.list_message_logs(since=thirty_days_ago)
         if not data: return pd.DataFrame()
         
         df = pd.DataFrame(data)
@@ -53,6 +57,52 @@ def get_message_logs_dataframe():
         print(f"Erro ao buscar logs: {e}")
         return pd.DataFrame()
 
+def get_delivery_metrics(days: int = 30):
+    """
+    Métricas de entrega/leitura das mensagens enviadas (recibos do webhook messages.update).
+    Latências em minutos (mediana) a partir do envio.
+    """
+    empty = {"tracked": 0, "delivered": 0, "read": 0, "failed": 0,
+             "delivery_rate": 0, "read_rate": 0,
+             "median_delivery_minutes": None, "median_read_minutes": None}
+    try:
+        if not supabase: return empty
+
+        since = (datetime.now() - timedelta(days=days)).isoformat()
+        rows = supabase.list_message_logs(
+            since=since,
+            direction="outbound",
+            tracked_only=True,
+            select="sent_at, delivery_status, delivered_at, read_at"
+        )
+
+        if not rows: return empty
+
+        df = pd.DataFrame(rows)
+        for col in ("sent_at", "delivered_at", "read_at"):
+            df[col] = pd.to_datetime(df[col], utc=True, errors="coerce")
+
+        tracked = len(df)
+        delivered = int(df["delivered_at"].notna().sum())
+        read = int(df["read_at"].notna().sum())
+        delivery_latency = (df["delivered_at"] - df["sent_at"]).dt.total_seconds().div(60).dropna()
+        read_latency = (df["read_at"] - df["sent_at"]).dt.total_seconds().div(60).dropna()
+
+        return {
+            "tracked": tracked,
+            "delivered": delivered,
+            "read": read,
+            "failed": int((df["delivery_status"] == "failed").sum()),
+            "delivery_rate": round(delivered / tracked * 100, 1),
+            "read_rate": round(read / tracked * 100, 1),
+            "median_delivery_minutes": round(delivery_latency.median(), 1) if not delivery_latency.empty else None,
+            "median_read_minutes": round(read_latency.median(), 1) if not read_latency.empty else None
+        }
+
+    except Exception as e:
+        print(f"Erro ao calcular métricas de entrega: {e}")
+        return empty
+
 def get_kpis_today():
     """Retorna KPIs do dia (Sent, Responded, Rate, New Leads)."""
     try:
@@ -62,25 +112,14 @@ def get_kpis_today():
         today_iso = today.isoformat()
         
         # Leads criados hoje
-        new_leads = supabase.client.table("leads")\
-            .select("id", count="exact")\
-            .gte("created_at", today_iso)\
-            .execute().count
+        new_leads = supabase.count_leads_created_since(today_iso)
 
         # Mensagens enviadas hoje (outbound)
-        sent = supabase.client.table("message_logs")\
-            .select("id", count="exact")\
-            .gte("sent_at", today_iso)\
-            .eq("direction", "outbound")\
-            .execute().count
+        sent = supabase.count_message_logs(today_iso, direction="outbound")
             
         # Respostas recebidas hoje (inbound)
         # Nota: Idealmente contar distinct lead_id ou conversas
-        responded = supabase.client.table("message_logs")\
-            .select("id", count="exact")\
-            .gte("sent_at", today_iso)\
-            .eq("direction", "inbound")\
-            .execute().count
+        responded = supabase.count_message_logs(today_iso, direction="inbound")
             
         rate = (responded / sent * 100) if sent > 0 else 0
         
@@ -99,15 +138,18 @@ def get_conversations(limit=20):
     """Retorna lista de conversas recentes (leads com mensagens)."""
     # Simplificação: busca leads que tiveram mensagem recente
     try:
+        if not supabase: return []
+
         # Busca últimos logs
-        response = supabase.client.table("message_logs")\
-            .select("lead_id, content, sent_at, direction")\
-            .order("sent_at", desc=True)\
-            .limit(limit)\
-            .execute()
-            
-        data = response.data
+        data = supabase.list_message_logs(
+            select="lead_id, content, sent_at, direction",
+            limit=limit,
+            newest_first=True
+        )
         if not data: return []
+
+        # Dados dos leads em uma consulta só
+        leads = supabase.get_leads_by_ids([msg['lead_id'] for msg in data], view=("name", "phone", "company"))
         
         # Enriquece com dados do lead
         # Agrupa por lead_id para mostrar só a última
@@ -120,9 +162,7 @@ def get_conversations(limit=20):
             
             seen_leads.add(lid)
             
-            # Busca nome do lead
-            lead_resp = supabase.client.table("leads").select("name, phone, company").eq("id", lid).single().execute()
-            lead = lead_resp.data if lead_resp.data else {"name": "Desconhecido", "phone": "N/A"}
+            lead = leads.get(lid) or {"name": "Desconhecido", "phone": "N/A"}
             
             conversations.append({
                 "lead_id": lid,
@@ -143,11 +183,6 @@ def get_conversations(limit=20):
 def get_lead_history(lead_id: str):
     """Busca histórico completo de mensagens de um lead."""
     try:
-        response = supabase.client.table("message_logs")\
-            .select("*")\
-            .eq("lead_id", lead_id)\
-            .order("sent_at", desc=False)\
-            .execute()
-        return response.data
+        return supabase.list_message_logs(lead_id=lead_id)
     except Exception as e:
         return []
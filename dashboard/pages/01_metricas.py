@@ -2,7 +2,7 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from dash_utils.data import get_leads_dataframe, get_message_logs_dataframe
+from dash_utils.data import get_leads_dataframe, get_message_logs_dataframe, get_delivery_metrics
 from components.charts import hourly_response_chart, daily_history_chart
 
 st.title("📈 Métricas Detalhadas")
@@ -29,6 +29,19 @@ with tab1:
             rate = (interested / total * 100) if total > 0 else 0
             st.metric("Taxa de Interesse Global", f"{rate:.1f}%")
 
+    st.subheader("Entrega e Leitura (30 dias)")
+    delivery = get_delivery_metrics()
+    if delivery["tracked"]:
+        d1, d2, d3, d4 = st.columns(4)
+        d1.metric("Taxa de Entrega", f"{delivery['delivery_rate']}%", help=f"{delivery['delivered']} de {delivery['tracked']} mensagens")
+        d2.metric("Taxa de Leitura", f"{delivery['read_rate']}%", help=f"{delivery['read']} de {delivery['tracked']} mensagens")
+        d3.metric("Tempo até Entrega (mediana)", f"{delivery['median_delivery_minutes']} min" if delivery['median_delivery_minutes'] is not None else "N/A")
+        d4.metric("Tempo até Leitura (mediana)", f"{delivery['median_read_minutes']} min" if delivery['median_read_minutes'] is not None else "N/A")
+        if delivery["failed"]:
+            st.warning(f"{delivery['failed']} mensagens com falha de entrega.")
+    else:
+        st.info("Sem recibos de entrega registrados no período.")
+
 with tab2:
     if not df_leads.empty:
         c1, c2 = st.columns(2)
@@ -47,6 +60,12 @@ with tab2:
             else:
                 st.info("Coluna 'sector' não encontrada.")
 
+        if 'country' in df_leads.columns:
+            st.subheader("Por País")
+            country_counts = df_leads['country'].value_counts().reset_index()
+            fig_country = px.bar(country_counts, x='country', y='count', title="Leads por País (DDI)")
+            st.plotly_chart(fig_country, use_container_width=True)
+
 with tab3:
     st.subheader("Análise Temporal")
     hourly_response_chart(df_logs)
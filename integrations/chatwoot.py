@@ -1,11 +1,21 @@
 
-import requests
-from typing import Optional, List, Dict, Any
+import heapq
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Any, Iterator, Tuple
 from config.settings import (
     CHATWOOT_API_URL,
     CHATWOOT_API_TOKEN,
-    CHATWOOT_ACCOUNT_ID
+    CHATWOOT_ACCOUNT_ID,
+    CHATWOOT_HTTP_TIMEOUT,
+    CHATWOOT_HISTORY_MAX_WORKERS,
+    CHATWOOT_PAGE_PREFETCH
 )
+from config.keywords import DECLINE_KEYWORDS
+from integrations.chatwoot_index import chatwoot_contact_index
+from utils.http import get_session
+from utils.keyword_matcher import KeywordMatcher
 from utils.logger import logger
 from utils.retry import retry_with_logging
 
@@ -21,22 +31,50 @@ class ChatwootClient:
             "api_access_token": self.api_token,
             "Content-Type": "application/json"
         }
+        self.session = get_session("chatwoot", timeout=CHATWOOT_HTTP_TIMEOUT)
+        self.contact_index = chatwoot_contact_index
         
-        # Palavras-chave de recusa
-        self.declined_keywords = [
-            "não tenho interesse", 
-            "não quero", 
-            "para de mandar", 
-            "remova meu número", 
-            "não me ligue"
-        ]
+        # Palavras-chave de recusa (config/keywords.py)
+        self.decline_matcher = KeywordMatcher(DECLINE_KEYWORDS)
 
-    @retry_with_logging(max_attempts=3)
     def find_contact_by_phone(self, phone: str) -> Optional[int]:
         """
         Busca um contato pelo telefone.
         Retorna o contact_id se encontrado, ou None.
+        Consulta primeiro o índice local; a busca HTTP só acontece se o telefone
+        não estiver no índice e o índice não estiver sincronizado recentemente.
         """
+        index = self.contact_index
+        if index is not None:
+            try:
+                contact_id = index.lookup(phone)
+                if contact_id is not None or index.is_fresh():
+                    return contact_id
+            except Exception as e:
+                logger.warning(f"Erro ao consultar índice de contatos Chatwoot: {e}")
+                index = None
+
+        contact_id = self._search_contact_by_phone(phone)
+        if contact_id is not None and index is not None:
+            try:
+                index.add(phone, contact_id)
+            except Exception as e:
+                logger.warning(f"Erro ao gravar contato {contact_id} no índice local: {e}")
+        return contact_id
+
+    def refresh_contact_index(self) -> Optional[Dict[str, int]]:
+        """Semeia/atualiza o índice local de contatos (job periódico do scheduler)."""
+        if self.contact_index is None:
+            return None
+        try:
+            return self.contact_index.sync(self.get_all_contacts)
+        except Exception as e:
+            logger.error(f"Erro ao sincronizar índice de contatos Chatwoot: {e}")
+            return None
+
+    @retry_with_logging(max_attempts=3)
+    def _search_contact_by_phone(self, phone: str) -> Optional[int]:
+        """Busca HTTP em /contacts/search."""
         try:
             # A busca no Chatwoot geralmente espera o número com +
             search_query = phone if phone.startswith('+') else f"+{phone}"
@@ -44,7 +82,7 @@ class ChatwootClient:
             url = f"{self.base_url}/api/v1/accounts/{self.account_id}/contacts/search"
             params = {"q": search_query}
             
-            response = requests.get(url, headers=self.headers, params=params, timeout=10)
+            response = self.session.get(url, headers=self.headers, params=params)
             response.raise_for_status()
             
             data = response.json()
@@ -60,53 +98,89 @@ class ChatwootClient:
             raise
 
     @retry_with_logging(max_attempts=3)
-    def get_conversation_history(self, contact_id: int) -> List[Dict[str, Any]]:
-        """Recupera as últimas mensagens das conversas do contato."""
+    def get_conversation_history(
+        self,
+        contact_id: int,
+        limit: int = 10,
+        max_workers: int = CHATWOOT_HISTORY_MAX_WORKERS
+    ) -> List[Dict[str, Any]]:
+        """
+        Recupera as `limit` mensagens mais recentes das conversas do contato (mais recente primeiro).
+        Conversas são lidas da mais recente para a mais antiga, `max_workers` por vez; a leitura
+        para quando a próxima conversa não tem atividade mais nova que as mensagens já reunidas.
+        """
         try:
             # 1. Buscar conversas do contato
             url = f"{self.base_url}/api/v1/accounts/{self.account_id}/contacts/{contact_id}/conversations"
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = self.session.get(url, headers=self.headers)
             response.raise_for_status()
             
-            conversations = response.json().get("payload", [])
-            messages = []
-            
-            # 2. Para cada conversa, buscar as mensagens (limitado a 10 no total para o contexto)
-            for conv in conversations:
-                conv_id = conv.get("id")
-                msg_url = f"{self.base_url}/api/v1/accounts/{self.account_id}/conversations/{conv_id}/messages"
-                msg_resp = requests.get(msg_url, headers=self.headers, timeout=10)
-                
-                if msg_resp.status_code == 200:
-                    conv_msgs = msg_resp.json().get("payload", [])
-                    # Simplificando a estrutura
-                    for m in conv_msgs:
-                        messages.append({
-                            "content": m.get("content"),
-                            "sender_type": m.get("sender_type"), # 'Contact' ou 'User'
-                            "created_at": m.get("created_at")
-                        })
-            
-            # Ordena por data (mais recente primeiro) e limita
-            messages.sort(key=lambda x: x['created_at'], reverse=True)
-            return messages[:10]
+            conversations = sorted(
+                response.json().get("payload", []),
+                key=lambda c: c.get("last_activity_at") or 0,
+                reverse=True
+            )
+            if not conversations:
+                return []
+
+            # 2. Mensagens por conversa em paralelo; heap mínimo guarda as `limit` mais novas
+            newest = []
+            seq = itertools.count()
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(conversations))) as pool:
+                for start in range(0, len(conversations), max_workers):
+                    window = conversations[start:start + max_workers]
+                    for conv_msgs in pool.map(self._get_conversation_messages, window):
+                        for m in conv_msgs:
+                            # Simplificando a estrutura
+                            item = (m.get("created_at") or 0, next(seq), {
+                                "content": m.get("content"),
+                                "sender_type": m.get("sender_type"), # 'Contact' ou 'User'
+                                "created_at": m.get("created_at")
+                            })
+                            if len(newest) < limit:
+                                heapq.heappush(newest, item)
+                            elif item[0] > newest[0][0]:
+                                heapq.heapreplace(newest, item)
+
+                    # Parada antecipada: as conversas restantes só têm mensagens mais antigas
+                    remaining = conversations[start + max_workers:]
+                    if len(newest) == limit and remaining and (remaining[0].get("last_activity_at") or 0) <= newest[0][0]:
+                        break
+
+            # Ordena por data (mais recente primeiro)
+            return [m for _, _, m in sorted(newest, reverse=True)]
             
         except Exception as e:
             logger.error(f"Erro ao buscar histórico Chatwoot para contato {contact_id}: {e}")
             raise
 
+    def _get_conversation_messages(self, conversation: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Mensagens de uma conversa (lista vazia se a consulta falhar)."""
+        conv_id = conversation.get("id")
+        msg_url = f"{self.base_url}/api/v1/accounts/{self.account_id}/conversations/{conv_id}/messages"
+        msg_resp = self.session.get(msg_url, headers=self.headers)
+
+        if msg_resp.status_code != 200:
+            return []
+        return msg_resp.json().get("payload", [])
+
     def check_if_declined(self, contact_id: int) -> bool:
         """
         Verifica se o contato enviou alguma mensagem de recusa recentemente.
+        Recusas já recebidas por webhook (índice local) dispensam a consulta HTTP.
         """
         try:
+            if self.contact_index is not None and self.contact_index.declined_keyword(contact_id):
+                return True
+
             history = self.get_conversation_history(contact_id)
             
             for msg in history:
                 # Verifica apenas mensagens enviadas pelo contato
                 if msg.get("sender_type") == "Contact":
-                    content = msg.get("content", "").lower()
-                    if any(keyword in content for keyword in self.declined_keywords):
+                    rule = self.decline_matcher.match(msg.get("content") or "")
+                    if rule:
+                        logger.info(f"Recusa detectada para contato {contact_id}: '{rule.keyword}' ({rule.group})")
                         return True
             
             return False
@@ -122,7 +196,7 @@ class ChatwootClient:
             url = f"{self.base_url}/api/v1/accounts/{self.account_id}/contacts"
             params = {"page": page, "sort": "-last_activity_at"}
             
-            response = requests.get(url, headers=self.headers, params=params, timeout=10)
+            response = self.session.get(url, headers=self.headers, params=params)
             response.raise_for_status()
             
             return response.json().get("payload", [])
@@ -130,6 +204,39 @@ class ChatwootClient:
             logger.error(f"Erro ao buscar contatos página {page}: {e}")
             raise
 
+    def iter_contacts(self, start_page: int = 1, prefetch: int = CHATWOOT_PAGE_PREFETCH) -> Iterator[Dict[str, Any]]:
+        """
+        Percorre todos os contatos (ordem -last_activity_at) como gerador.
+        Mantém até `prefetch` páginas sendo buscadas à frente enquanto o chamador
+        processa a atual; a memória fica limitada a essas páginas.
+        Para na primeira página vazia.
+        """
+        for _, contacts in self.iter_contact_pages(start_page, prefetch):
+            yield from contacts
+
+    def iter_contact_pages(self, start_page: int = 1, prefetch: int = CHATWOOT_PAGE_PREFETCH) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        """Como iter_contacts, mas gera (número da página, contatos) para quem precisa de checkpoint."""
+        pool = ThreadPoolExecutor(max_workers=max(1, prefetch), thread_name_prefix="chatwoot-contacts")
+        pending = deque()
+        next_page = start_page
+        try:
+            for _ in range(max(1, prefetch)):
+                pending.append((next_page, pool.submit(self.get_all_contacts, next_page)))
+                next_page += 1
+
+            while pending:
+                page, future = pending.popleft()
+                contacts = future.result()
+                if not contacts:
+                    return
+                pending.append((next_page, pool.submit(self.get_all_contacts, next_page)))
+                next_page += 1
+                yield page, contacts
+        finally:
+            for _, future in pending:
+                future.cancel()
+            pool.shutdown(wait=False)
+
 # Instância global
 try:
     chatwoot = ChatwootClient()
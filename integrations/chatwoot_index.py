@@ -0,0 +1,178 @@
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from config.settings import (
+    CHATWOOT_INDEX_ENABLED,
+    CHATWOOT_INDEX_PATH,
+    CHATWOOT_INDEX_MAX_AGE_SECONDS
+)
+from utils.local_store import LocalStore
+from utils.logger import logger
+from utils.validators import normalize_phone
+
+class ChatwootContactIndex(LocalStore):
+    """
+    Índice local telefone normalizado -> contact_id do Chatwoot (SQLite em data/,
+    compartilhado entre scheduler e servidor de webhooks).
+
+    Semeado percorrendo todas as páginas de contatos e mantido atualizado de forma
+    incremental (ordem -last_activity_at até a marca d'água da última sincronização)
+    e pelos webhooks de contato. Um telefone ausente só é considerado "não existe"
+    enquanto a última sincronização for recente (max_age_seconds).
+    """
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS contacts (
+        phone TEXT PRIMARY KEY,
+        contact_id INTEGER NOT NULL,
+        name TEXT,
+        last_activity_at INTEGER,
+        updated_at TEXT
+    );
+    CREATE INDEX IF NOT EXISTS contacts_contact_id_idx ON contacts (contact_id);
+    CREATE TABLE IF NOT EXISTS conversations (
+        conversation_id INTEGER PRIMARY KEY,
+        contact_id INTEGER,
+        status TEXT,
+        last_incoming_at TEXT,
+        last_outgoing_at TEXT,
+        declined_keyword TEXT,
+        updated_at TEXT
+    );
+    CREATE INDEX IF NOT EXISTS conversations_contact_id_idx ON conversations (contact_id);
+    CREATE TABLE IF NOT EXISTS index_meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    );
+    """
+
+    def __init__(self, path: str = ":memory:", max_age_seconds: float = CHATWOOT_INDEX_MAX_AGE_SECONDS):
+        super().__init__(path)
+        self.max_age_seconds = max_age_seconds
+
+    def lookup(self, phone: str) -> Optional[int]:
+        """contact_id do telefone, ou None se não estiver no índice."""
+        rows = self.query("SELECT contact_id FROM contacts WHERE phone = ?", (normalize_phone(phone),))
+        return rows[0]["contact_id"] if rows else None
+
+    def is_fresh(self) -> bool:
+        """True se o índice foi semeado e sincronizado há menos de max_age_seconds."""
+        synced_at = self._get_meta("synced_at")
+        return synced_at is not None and time.time() - float(synced_at) < self.max_age_seconds
+
+    def upsert_contacts(self, contacts: Iterable[Dict[str, Any]]) -> int:
+        """Grava contatos no formato da API do Chatwoot (id, phone_number, name, last_activity_at)."""
+        now = datetime.utcnow().isoformat()
+        rows = [
+            (normalize_phone(c.get("phone_number")), c.get("id"), c.get("name"), c.get("last_activity_at"), now)
+            for c in contacts
+            if c.get("id") and normalize_phone(c.get("phone_number"))
+        ]
+        if rows:
+            # Contato que trocou de telefone: remove a entrada antiga antes de gravar a nova
+            self.executemany("DELETE FROM contacts WHERE contact_id = ? AND phone != ?", [(r[1], r[0]) for r in rows])
+            self.executemany(
+                "INSERT OR REPLACE INTO contacts (phone, contact_id, name, last_activity_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+        return len(rows)
+
+    def add(self, phone: str, contact_id: int):
+        """Registra um contato encontrado pela busca HTTP."""
+        self.upsert_contacts([{"id": contact_id, "phone_number": phone}])
+
+    def remove_contact(self, contact_id: int):
+        self.execute("DELETE FROM contacts WHERE contact_id = ?", (contact_id,))
+
+    def record_conversation(self, conversation_id: int, contact_id: Optional[int] = None, **fields: Any):
+        """
+        Atualiza o estado de uma conversa (webhooks). Campos aceitos: status,
+        last_incoming_at, last_outgoing_at, declined_keyword. Campos omitidos
+        (ou None) mantêm o valor gravado.
+        """
+        allowed = ("status", "last_incoming_at", "last_outgoing_at", "declined_keyword")
+        values = {k: fields.get(k) for k in allowed}
+        self.execute(
+            "INSERT INTO conversations (conversation_id, contact_id, status, last_incoming_at, "
+            "last_outgoing_at, declined_keyword, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (conversation_id) DO UPDATE SET "
+            "contact_id = COALESCE(excluded.contact_id, contact_id), "
+            "status = COALESCE(excluded.status, status), "
+            "last_incoming_at = COALESCE(excluded.last_incoming_at, last_incoming_at), "
+            "last_outgoing_at = COALESCE(excluded.last_outgoing_at, last_outgoing_at), "
+            "declined_keyword = COALESCE(excluded.declined_keyword, declined_keyword), "
+            "updated_at = excluded.updated_at",
+            (conversation_id, contact_id, *values.values(), datetime.utcnow().isoformat())
+        )
+
+    def get_conversations(self, contact_id: int) -> List[Dict[str, Any]]:
+        """Estado conhecido das conversas do contato (mais recente primeiro)."""
+        return self.query(
+            "SELECT * FROM conversations WHERE contact_id = ? ORDER BY updated_at DESC",
+            (contact_id,)
+        )
+
+    def declined_keyword(self, contact_id: int) -> Optional[str]:
+        """Palavra-chave de recusa já vista nas mensagens do contato (via webhook), se houver."""
+        rows = self.query(
+            "SELECT declined_keyword FROM conversations WHERE contact_id = ? AND declined_keyword IS NOT NULL LIMIT 1",
+            (contact_id,)
+        )
+        return rows[0]["declined_keyword"] if rows else None
+
+    def sync(self, fetch_page: Callable[[int], List[Dict[str, Any]]], max_pages: Optional[int] = None) -> Dict[str, int]:
+        """
+        Sincroniza com o Chatwoot. `fetch_page(page)` deve retornar contatos ordenados
+        por -last_activity_at (ChatwootClient.get_all_contacts).
+        Primeira execução: percorre todas as páginas. Depois: só até alcançar contatos
+        sem atividade desde a marca d'água anterior.
+        """
+        seeded = self._get_meta("seeded") == "1"
+        watermark = int(self._get_meta("watermark") or 0)
+        newest = watermark
+        stats = {"pages": 0, "contacts": 0}
+
+        page = 1
+        while max_pages is None or page <= max_pages:
+            contacts = fetch_page(page)
+            if not contacts:
+                break
+
+            stats["pages"] += 1
+            stats["contacts"] += self.upsert_contacts(contacts)
+            activity = [c.get("last_activity_at") or 0 for c in contacts]
+            newest = max(newest, *activity)
+
+            # Incremental: página já alcançou contatos anteriores à última sincronização
+            if seeded and min(activity) < watermark:
+                break
+            page += 1
+        else:
+            # Limite de páginas atingido: não conclui a semeadura nem avança a marca
+            return stats
+
+        self._set_meta("watermark", str(newest))
+        self._set_meta("seeded", "1")
+        self._set_meta("synced_at", str(time.time()))
+        logger.info(
+            f"Índice de contatos Chatwoot {'atualizado' if seeded else 'semeado'}: "
+            f"{stats['contacts']} contatos em {stats['pages']} páginas."
+        )
+        return stats
+
+    def __len__(self) -> int:
+        return self.query("SELECT COUNT(*) AS n FROM contacts")[0]["n"]
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        rows = self.query("SELECT value FROM index_meta WHERE key = ?", (key,))
+        return rows[0]["value"] if rows else None
+
+    def _set_meta(self, key: str, value: str):
+        self.execute("INSERT OR REPLACE INTO index_meta (key, value) VALUES (?, ?)", (key, value))
+
+# Instância global
+chatwoot_contact_index = None
+if CHATWOOT_INDEX_ENABLED:
+    try:
+        chatwoot_contact_index = ChatwootContactIndex(CHATWOOT_INDEX_PATH)
+    except Exception as e:
+        logger.warning(f"Não foi possível abrir o índice de contatos Chatwoot: {e}")
@@ -1,14 +1,33 @@
 
-import requests
-import time
-from typing import List, Optional, Dict, Any
+import atexit
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Dict, Any, Tuple
 from config.settings import (
     EVOLUTION_API_URL, 
     EVOLUTION_API_KEY, 
-    EVOLUTION_INSTANCE_NAME
+    EVOLUTION_INSTANCE_NAME,
+    EVOLUTION_HTTP_TIMEOUT,
+    WHATSAPP_CHECK_CHUNK_SIZE,
+    WHATSAPP_CHECK_MAX_WORKERS,
+    SEND_PART_GAP_SECONDS,
+    SEND_MAX_WORKERS,
+    SEND_MAX_ATTEMPTS,
+    SEND_RETRY_BACKOFF_SECONDS
 )
+from integrations.whatsapp_cache import whatsapp_cache
+from utils.http import get_session
 from utils.logger import logger
 from utils.retry import retry_with_logging
+from utils.send_scheduler import PartSendScheduler, SendTicket
+from utils.validators import normalize_phone
+
+# Status de mensagem (Baileys): nome (v2) ou código numérico (v1)
+STATUS_MAP = {
+    "DELIVERY_ACK": "delivered", "3": "delivered",
+    "READ": "read", "4": "read",
+    "PLAYED": "read", "5": "read",
+    "ERROR": "failed", "0": "failed",
+}
 
 class EvolutionClient:
     def __init__(self):
@@ -22,49 +41,58 @@ class EvolutionClient:
             "apikey": self.api_key,
             "Content-Type": "application/json"
         }
+        self.session = get_session("evolution", timeout=EVOLUTION_HTTP_TIMEOUT)
+        self.number_cache = whatsapp_cache
+        # Partes de mensagens longas: envio intercalado entre destinatários, sem sleep
+        self.send_scheduler = PartSendScheduler(
+            self._post_text,
+            gap_seconds=SEND_PART_GAP_SECONDS,
+            max_workers=SEND_MAX_WORKERS,
+            max_attempts=SEND_MAX_ATTEMPTS,
+            retry_backoff_seconds=SEND_RETRY_BACKOFF_SECONDS
+        )
 
     @retry_with_logging(max_attempts=3)
     def send_text_message(self, phone: str, text: str) -> Optional[Dict[str, Any]]:
         """Envia uma mensagem de texto simples."""
         try:
-            url = f"{self.base_url}/message/sendText/{self.instance}"
-            payload = {
-                "number": phone,
-                "options": {
-                    "delay": 1200,
-                    "presence": "composing",
-                    "linkPreview": False
-                },
-                "textMessage": {
-                    "text": text
-                }
-            }
-            
-            response = requests.post(url, json=payload, headers=self.headers, timeout=20)
-            response.raise_for_status()
-            
-            return response.json()
+            return self._post_text(phone, text)
         except Exception as e:
             logger.error(f"Erro ao enviar mensagem para {phone}: {e}")
             raise
 
+    def _post_text(self, phone: str, text: str) -> Dict[str, Any]:
+        """Uma chamada a sendText, sem retry (usada pelo agendador de partes)."""
+        url = f"{self.base_url}/message/sendText/{self.instance}"
+        payload = {
+            "number": phone,
+            "options": {
+                "delay": 1200,
+                "presence": "composing",
+                "linkPreview": False
+            },
+            "textMessage": {
+                "text": text
+            }
+        }
+
+        response = self.session.post(url, json=payload, headers=self.headers, timeout=20)
+        response.raise_for_status()
+
+        return response.json()
+
     def send_text_in_parts(self, phone: str, text: str) -> List[Dict[str, Any]]:
         """
         Envia mensagem dividida em partes (balões) de ~200 caracteres,
         respeitando pontuação para quebra natural.
+        Aguarda todas as partes; envios concorrentes para outros números são
+        intercalados nos intervalos entre as partes.
         """
-        parts = self._split_text(text)
-        results = []
-        
-        for i, part in enumerate(parts):
-            # Adiciona delay maior entre mensagens se não for a primeira
-            if i > 0:
-                time.sleep(3) 
+        return self.send_text_in_parts_async(phone, text).done.result()
 
-            result = self.send_text_message(phone, part)
-            results.append(result)
-            
-        return results
+    def send_text_in_parts_async(self, phone: str, text: str) -> SendTicket:
+        """Agenda o envio em partes sem bloquear (ticket.first / ticket.done)."""
+        return self.send_scheduler.submit(phone, self._split_text(text))
 
     def _split_text(self, text: str, max_len: int = 200) -> List[str]:
         """Auxiliar para dividir texto inteligentemente."""
@@ -97,43 +125,158 @@ class EvolutionClient:
             
         return parts
 
-    @retry_with_logging(max_attempts=3)
     def check_number_exists(self, phone: str) -> bool:
         """
         Verifica se o número existe no WhatsApp.
         Usa o endpoint v2: POST /chat/whatsappNumbers/{instance}
         """
         try:
-            url = f"{self.base_url}/chat/whatsappNumbers/{self.instance}"
-            payload = {"numbers": [phone]}
-            
-            # Endpoint v2 é POST
-            response = requests.post(url, json=payload, headers=self.headers, timeout=15)
-            response.raise_for_status()
-            
-            data = response.json()
-            # Resposta v2: [{ "number": "...", "exists": true, "jid": "..." }]
-            if isinstance(data, list):
-                if not data: return False
-                return data[0].get('exists', False)
-            return data.get('exists', False)
-            
+            exists, _ = self.check_numbers_exist([phone]).get(phone, (False, None))
+            return exists
         except Exception as e:
             logger.warning(f"Erro ao verificar número {phone}: {e}")
             # Em caso de erro de API, assumimos False (fail safe) para não spammar inválidos
             return False 
 
+    def check_numbers_exist(
+        self,
+        phones: List[str],
+        chunk_size: int = WHATSAPP_CHECK_CHUNK_SIZE,
+        max_workers: int = WHATSAPP_CHECK_MAX_WORKERS
+    ) -> Dict[str, Tuple[bool, Optional[str]]]:
+        """
+        Verifica vários números no WhatsApp: uma requisição por bloco de `chunk_size`,
+        com no máximo `max_workers` blocos em paralelo.
+        Retorna {telefone: (existe, jid)}. Telefones de blocos que falharam (após retries) ou
+        sem correspondência na resposta ficam fora do resultado — ausência significa
+        "não verificado", não "sem WhatsApp".
+        Números verificados recentemente vêm do cache local, sem chamada à API.
+        """
+        unique_phones = list(dict.fromkeys(p for p in phones if p))
+        cached = self._cached_numbers(unique_phones)
+        missing = [p for p in unique_phones if p not in cached]
+        chunks = [missing[i:i + chunk_size] for i in range(0, len(missing), chunk_size)]
+        if not chunks:
+            return cached
+
+        def check(chunk: List[str]) -> Dict[str, Tuple[bool, Optional[str]]]:
+            try:
+                return self._check_numbers_chunk(chunk)
+            except Exception as e:
+                logger.warning(f"Erro ao verificar bloco de {len(chunk)} números: {e}")
+                return {}
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as pool:
+            for found in pool.map(check, chunks):
+                results.update(found)
+
+        # Só respostas efetivas da API chegam aqui (blocos com erro ficaram de fora)
+        if self.number_cache and results:
+            try:
+                self.number_cache.set_many(results)
+            except Exception as e:
+                logger.warning(f"Erro ao gravar cache de números WhatsApp: {e}")
+
+        return {**cached, **results}
+
+    def _cached_numbers(self, phones: List[str]) -> Dict[str, Tuple[bool, Optional[str]]]:
+        if not self.number_cache or not phones:
+            return {}
+        try:
+            return self.number_cache.get_many(phones)
+        except Exception as e:
+            logger.warning(f"Erro ao consultar cache de números WhatsApp: {e}")
+            return {}
+
+    @retry_with_logging(max_attempts=3)
+    def _check_numbers_chunk(self, phones: List[str]) -> Dict[str, Tuple[bool, Optional[str]]]:
+        """Uma chamada a /chat/whatsappNumbers para um bloco de números."""
+        url = f"{self.base_url}/chat/whatsappNumbers/{self.instance}"
+        # Endpoint v2 é POST
+        response = self.session.post(url, json={"numbers": phones}, headers=self.headers)
+        response.raise_for_status()
+
+        data = response.json()
+        # Resposta v2: [{ "number": "...", "exists": true, "jid": "..." }]
+        if isinstance(data, dict):
+            data = [data]
+
+        # A API pode devolver o número reformatado (com '+', sem o nono dígito) e não
+        # garante a ordem do pedido: casa pelos dígitos do número ou do JID
+        requested = {}
+        for phone in phones:
+            for key in self._number_keys(phone):
+                requested.setdefault(key, phone)
+
+        results = {}
+        for item in data or []:
+            jid_user = (item.get("jid") or "").split("@")[0]
+            phone = next(
+                (requested[key] for value in (item.get("number"), jid_user)
+                 for key in self._number_keys(value) if key in requested),
+                None
+            )
+            if phone:
+                results[phone] = (bool(item.get("exists", False)), item.get("jid"))
+            else:
+                # Sem correspondência segura: fica de fora (não verificado)
+                logger.debug(f"Resposta de whatsappNumbers sem número correspondente: {item.get('number')}")
+        return results
+
+    @staticmethod
+    def _number_keys(number: Optional[str]) -> List[str]:
+        """Dígitos do número e, para celular BR (55 + DDD + 9 + 8 dígitos), a forma sem o nono dígito."""
+        digits = normalize_phone(number)
+        if not digits:
+            return []
+        if len(digits) == 13 and digits.startswith("55") and digits[4] == "9":
+            return [digits, digits[:4] + digits[5:]]
+        return [digits]
+
     def get_message_status(self, message_id: str) -> str:
         """
         Consulta status da mensagem.
-        Evolution API foca em Webhooks, mas mantemos interface.
+        Evolution API foca em Webhooks: o status chega por messages.update
+        (ver parse_status_updates) e fica em message_logs.delivery_status.
         """
         # Placeholder pois polling não é o padrão da Evolution
         return "unknown"
 
+    @staticmethod
+    def message_id(response: Optional[Dict[str, Any]]) -> Optional[str]:
+        """Extrai o id da mensagem (key.id) da resposta do sendText."""
+        if not isinstance(response, dict):
+            return None
+        return (response.get("key") or {}).get("id")
+
+    @staticmethod
+    def parse_status_updates(event: Dict[str, Any]) -> List[Tuple[str, str]]:
+        """
+        Extrai (message_id, status) de um evento messages.update.
+        Aceita o formato v1 (lista de {key, update: {status: int}}) e o v2
+        ({keyId | key.id, status: "DELIVERY_ACK"}). Status normalizados para
+        'delivered', 'read' ou 'failed'; confirmações do servidor são ignoradas.
+        """
+        data = event.get("data")
+        items = data if isinstance(data, list) else [data or {}]
+
+        updates = []
+        for item in items:
+            message_id = item.get("keyId") or (item.get("key") or {}).get("id") or item.get("messageId")
+            status = item.get("status")
+            if status is None:
+                status = (item.get("update") or {}).get("status")
+            status = STATUS_MAP.get(str(status).upper())
+            if message_id and status:
+                updates.append((message_id, status))
+        return updates
+
 # Instância global
 try:
     evolution = EvolutionClient()
+    # Termina de enviar as partes pendentes antes de sair (mensagens não ficam truncadas)
+    atexit.register(evolution.send_scheduler.shutdown, wait=True)
 except Exception as e:
     logger.warning(f"Não foi possível inicializar EvolutionClient: {e}")
     evolution = None
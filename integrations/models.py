@@ -0,0 +1,97 @@
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+# Colunas conhecidas da tabela leads
+LEAD_FIELDS = (
+    "id", "name", "phone", "company", "sector", "city", "website",
+    "status", "source", "notes", "metadata",
+    "chatwoot_id", "trello_card_id",
+    "contact_count", "last_template",
+    "last_contact_at", "next_contact_at", "responded_at", "declined_at",
+    "claimed_by", "lease_expires_at",
+    "created_at", "updated_at",
+)
+
+# Projeções nomeadas: cada caminho pede apenas as colunas que usa
+# Envio (scheduler, MessageService, TrelloService.create_lead_card)
+LEAD_SEND_VIEW = (
+    "id", "name", "phone", "company", "sector", "city", "website",
+    "status", "contact_count", "trello_card_id",
+)
+# Mensagens recebidas (webhook)
+LEAD_WEBHOOK_VIEW = ("id", "phone", "name", "company", "status", "trello_card_id", "chatwoot_id")
+# Tabelas e gráficos do dashboard
+LEAD_DASHBOARD_VIEW = (
+    "id", "name", "phone", "company", "sector", "city", "website",
+    "status", "created_at", "next_contact_at",
+)
+# Importação do Chatwoot (merge de notas)
+LEAD_NOTES_VIEW = ("id", "phone", "notes")
+
+# Chave de ordenação da paginação por keyset (iter_leads)
+LEAD_PAGE_KEY = ("created_at", "id")
+
+_MISSING = object()
+
+def columns(view: Iterable[str]) -> str:
+    """Converte uma projeção na string de colunas do select do PostgREST."""
+    return ", ".join(view)
+
+def with_page_key(view: Iterable[str]) -> Tuple[str, ...]:
+    """Projeção acrescida das colunas do cursor de paginação."""
+    return tuple(dict.fromkeys((*view, *LEAD_PAGE_KEY)))
+
+class Lead:
+    """
+    Registro compacto de lead (__slots__, sem dict por instância).
+    Mantém acesso no estilo dict (lead["id"], lead.get("phone")) para o código
+    que já trata leads como dicionários. Campos fora da projeção carregada
+    se comportam como chaves ausentes.
+    """
+    __slots__ = LEAD_FIELDS
+
+    def __init__(self, **fields: Any):
+        for key, value in fields.items():
+            if key in LEAD_FIELDS:
+                setattr(self, key, value)
+
+    @classmethod
+    def from_row(cls, row: Optional[Dict[str, Any]]) -> Optional["Lead"]:
+        """Cria um Lead a partir de uma linha do banco (colunas desconhecidas são ignoradas)."""
+        if row is None:
+            return None
+        return cls(**row)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = getattr(self, key, _MISSING) if key in LEAD_FIELDS else _MISSING
+        return default if value is _MISSING else value
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any):
+        if key not in LEAD_FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def keys(self) -> Tuple[str, ...]:
+        return tuple(key for key in LEAD_FIELDS if key in self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Apenas os campos carregados (ex: para payloads JSON)."""
+        return {key: getattr(self, key) for key in self.keys()}
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, Lead):
+            return self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"Lead(id={self.get('id')!r}, phone={self.get('phone')!r}, status={self.get('status')!r})"
@@ -0,0 +1,656 @@
+import json
+import sqlite3
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Iterator, Tuple
+from config.settings import IMPORT_BATCH_SIZE, LEADS_PAGE_SIZE
+from integrations.models import (
+    Lead,
+    LEAD_FIELDS,
+    with_page_key,
+    LEAD_SEND_VIEW,
+    LEAD_WEBHOOK_VIEW,
+    LEAD_DASHBOARD_VIEW
+)
+from utils.local_store import LocalStore
+from utils.logger import logger
+
+# Colunas JSON (serializadas como texto no SQLite)
+JSON_COLUMNS = {"metadata", "payload"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS leads (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    phone TEXT NOT NULL,
+    company TEXT,
+    sector TEXT,
+    city TEXT,
+    website TEXT,
+    status TEXT DEFAULT 'new',
+    source TEXT,
+    notes TEXT,
+    metadata TEXT,
+    chatwoot_id INTEGER,
+    trello_card_id TEXT,
+    contact_count INTEGER DEFAULT 0,
+    last_template TEXT,
+    last_contact_at TEXT,
+    next_contact_at TEXT,
+    responded_at TEXT,
+    declined_at TEXT,
+    claimed_by TEXT,
+    lease_expires_at TEXT,
+    created_at TEXT,
+    updated_at TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS leads_phone_key ON leads (phone);
+CREATE INDEX IF NOT EXISTS leads_status_created_idx ON leads (status, created_at);
+CREATE INDEX IF NOT EXISTS leads_status_next_contact_idx ON leads (status, next_contact_at);
+
+CREATE TABLE IF NOT EXISTS message_logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    lead_id TEXT,
+    direction TEXT,
+    content TEXT,
+    sent_at TEXT,
+    message_id TEXT,
+    delivery_status TEXT,
+    delivered_at TEXT,
+    read_at TEXT
+);
+CREATE INDEX IF NOT EXISTS message_logs_lead_idx ON message_logs (lead_id, sent_at);
+CREATE INDEX IF NOT EXISTS message_logs_sent_at_idx ON message_logs (sent_at);
+
+CREATE TABLE IF NOT EXISTS agent_state (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    messages_sent_today INTEGER DEFAULT 0,
+    current_day TEXT,
+    last_active TEXT,
+    last_heartbeat TEXT,
+    is_active INTEGER DEFAULT 1,
+    updated_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS sync_queue (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    integration TEXT,
+    action TEXT,
+    payload TEXT,
+    status TEXT DEFAULT 'pending',
+    created_at TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at TEXT,
+    locked_by TEXT,
+    locked_until TEXT,
+    last_error TEXT,
+    processed_at TEXT
+);
+CREATE INDEX IF NOT EXISTS sync_queue_status_idx ON sync_queue (status, created_at);
+"""
+
+# Índices sobre colunas de MIGRATIONS (criados depois de _migrate)
+MIGRATED_INDEXES = """
+CREATE INDEX IF NOT EXISTS message_logs_message_id_idx ON message_logs (message_id) WHERE message_id IS NOT NULL;
+"""
+
+# Colunas adicionadas depois da criação inicial das tabelas (bancos já existentes)
+MIGRATIONS = {
+    "message_logs": {
+        "message_id": "TEXT",
+        "delivery_status": "TEXT",
+        "delivered_at": "TEXT",
+        "read_at": "TEXT",
+    },
+    "sync_queue": {
+        "attempts": "INTEGER NOT NULL DEFAULT 0",
+        "next_attempt_at": "TEXT",
+        "locked_by": "TEXT",
+        "locked_until": "TEXT",
+        "last_error": "TEXT",
+        "processed_at": "TEXT",
+    },
+}
+
+class SQLiteClient(LocalStore):
+    """
+    Backend de armazenamento local com a mesma interface do SupabaseClient.
+    Cobre leads, message_logs, agent_state e sync_queue para instalações de um
+    único nó e benchmarks locais (sem dependência de rede).
+    """
+
+    SCHEMA = SCHEMA
+
+    def __init__(self, path: str = ":memory:"):
+        # Conexão, PRAGMAs e lock vêm do LocalStore (isolation_level=None:
+        # transações controladas explicitamente em _transaction())
+        super().__init__(path)
+        self._columns = {
+            table: {row["name"] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+            for table in ("leads", "message_logs", "agent_state", "sync_queue")
+        }
+        self._migrate()
+
+    # ------------------------------------------------------------------
+    # Leads
+    # ------------------------------------------------------------------
+
+    def get_lead_by_phone(self, phone: str, view: Tuple[str, ...] = LEAD_SEND_VIEW) -> Optional[Lead]:
+        """Busca um lead pelo telefone, carregando apenas as colunas de `view`."""
+        rows = self._query(f"SELECT {self._select(view)} FROM leads WHERE phone = ? LIMIT 1", (phone,))
+        return Lead.from_row(rows[0]) if rows else None
+
+    def get_lead_by_id(self, lead_id: str, view: Tuple[str, ...] = LEAD_SEND_VIEW) -> Optional[Lead]:
+        """Busca um lead pelo id, carregando apenas as colunas de `view`."""
+        rows = self._query(f"SELECT {self._select(view)} FROM leads WHERE id = ? LIMIT 1", (lead_id,))
+        return Lead.from_row(rows[0]) if rows else None
+
+    def find_lead_by_phone(self, phone: str) -> Optional[Lead]:
+        """Equivalente ao lookup do webhook; o índice local dispensa cache."""
+        return self.get_lead_by_phone(phone, view=LEAD_WEBHOOK_VIEW)
+
+    def create_lead(self, data: Dict[str, Any]) -> Lead:
+        """Cria um novo lead."""
+        data = self._new_lead_row(data)
+        with self._transaction():
+            self._insert("leads", data)
+        logger.info(f"Lead criado: {data.get('phone')}")
+        return Lead(id=data["id"], phone=data["phone"], status=data.get("status"))
+
+    def get_leads_by_phones(self, phones: List[str], view: Tuple[str, ...] = ("id", "phone"), chunk_size: int = 500) -> Dict[str, Lead]:
+        """Busca leads existentes para uma lista de telefones. Retorna {telefone: lead}."""
+        unique_phones = list(dict.fromkeys(p for p in phones if p))
+        found = {}
+        select = self._select(tuple(dict.fromkeys(("phone",) + tuple(view))))
+
+        for start in range(0, len(unique_phones), chunk_size):
+            chunk = unique_phones[start:start + chunk_size]
+            placeholders = ", ".join("?" for _ in chunk)
+            for row in self._query(f"SELECT {select} FROM leads WHERE phone IN ({placeholders})", chunk):
+                found[row["phone"]] = Lead.from_row({k: row[k] for k in view if k in row})
+
+        return found
+
+    def get_leads_by_ids(self, lead_ids: List[str], view: Tuple[str, ...] = ("id", "name", "phone")) -> Dict[str, Lead]:
+        """Busca vários leads pelo id. Retorna {id: lead}."""
+        unique_ids = list(dict.fromkeys(i for i in lead_ids if i))
+        if not unique_ids:
+            return {}
+        placeholders = ", ".join("?" for _ in unique_ids)
+        rows = self._query(
+            f"SELECT {self._select(tuple(dict.fromkeys(('id',) + tuple(view))))} FROM leads WHERE id IN ({placeholders})",
+            unique_ids
+        )
+        return {row["id"]: Lead.from_row(row) for row in rows}
+
+    def count_leads_created_since(self, since: str) -> int:
+        """Quantidade de leads criados a partir de `since` (ISO)."""
+        return self._query("SELECT COUNT(*) AS n FROM leads WHERE created_at >= ?", (since,))[0]["n"]
+
+    def bulk_upsert_leads(self, leads: List[Dict[str, Any]], batch_size: int = IMPORT_BATCH_SIZE) -> List[Dict[str, Any]]:
+        """
+        Cria leads em lote, ignorando telefones que já existem.
+        Mesmo contrato do SupabaseClient.bulk_upsert_leads: um resultado por linha,
+        com status "created" | "existing" | "duplicate" | "error".
+        """
+        outcomes = [
+            {"phone": lead.get("phone"), "status": None, "lead": None, "error": None}
+            for lead in leads
+        ]
+
+        existing = self.get_leads_by_phones([lead.get("phone") for lead in leads])
+
+        pending = []
+        seen = set()
+        for i, lead in enumerate(leads):
+            phone = lead.get("phone")
+            if not phone:
+                outcomes[i].update(status="error", error="Telefone ausente")
+            elif phone in existing:
+                outcomes[i].update(status="existing", lead=existing[phone])
+            elif phone in seen:
+                outcomes[i]["status"] = "duplicate"
+            else:
+                seen.add(phone)
+                pending.append(i)
+
+        for start in range(0, len(pending), batch_size):
+            indexes = pending[start:start + batch_size]
+            try:
+                with self._transaction():
+                    for i in indexes:
+                        row = self._new_lead_row(leads[i])
+                        inserted = self._insert("leads", row, or_ignore=True)
+                        if inserted:
+                            outcomes[i].update(status="created", lead=Lead(id=row["id"], phone=row["phone"], status=row.get("status")))
+                        else:
+                            outcomes[i]["status"] = "existing"
+            except Exception as e:
+                logger.error(f"Erro ao inserir lote de {len(indexes)} leads: {e}")
+                for i in indexes:
+                    outcomes[i].update(status="error", lead=None, error=str(e))
+
+        created_count = sum(1 for o in outcomes if o["status"] == "created")
+        logger.info(f"Upsert em lote: {created_count} criados de {len(leads)} recebidos.")
+        return outcomes
+
+    def update_lead(
+        self,
+        lead_id: str,
+        data: Dict[str, Any],
+        only_status: Optional[Tuple[str, ...]] = None,
+        unless_status: Optional[Tuple[str, ...]] = None
+    ) -> Optional[Lead]:
+        """Mesmo contrato do SupabaseClient.update_lead (condição de status opcional)."""
+        data["updated_at"] = datetime.utcnow().isoformat()
+        where, params = "id = ?", [lead_id]
+        if only_status:
+            where += f" AND status IN ({', '.join('?' for _ in only_status)})"
+            params.extend(only_status)
+        if unless_status:
+            where += f" AND status NOT IN ({', '.join('?' for _ in unless_status)})"
+            params.extend(unless_status)
+        with self._transaction():
+            if not self._update("leads", data, where, tuple(params)):
+                return None
+            rows = self._query("SELECT id, phone, status FROM leads WHERE id = ?", (lead_id,))
+        logger.info(f"Lead atualizado: {lead_id}")
+        return Lead.from_row(rows[0]) if rows else None
+
+    def get_leads_by_status(self, status: str, view: Tuple[str, ...] = LEAD_DASHBOARD_VIEW) -> List[Lead]:
+        """Busca todos os leads de um status, carregando apenas as colunas de `view`."""
+        return [lead for page in self.iter_leads({"status": status}, view) for lead in page]
+
+    def iter_leads(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        view: Tuple[str, ...] = LEAD_DASHBOARD_VIEW,
+        page_size: int = LEADS_PAGE_SIZE
+    ) -> Iterator[List[Lead]]:
+        """Mesmo contrato do SupabaseClient.iter_leads: páginas por keyset em (created_at, id)."""
+        select = self._select(with_page_key(view))
+        conditions, params = [], []
+        for column, value in (filters or {}).items():
+            if column not in LEAD_FIELDS:
+                raise ValueError(f"Coluna de filtro desconhecida: {column}")
+            if value is None:
+                conditions.append(f"{column} IS NULL")
+            elif isinstance(value, (list, tuple, set)):
+                values = list(value)
+                conditions.append(f"{column} IN ({', '.join('?' for _ in values)})")
+                params.extend(values)
+            else:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+
+        cursor = None
+        while True:
+            where, page_params = list(conditions), list(params)
+            if cursor:
+                # created_at nulo ordena como '' (no início): o cursor nunca para nele
+                where.append("(COALESCE(created_at, '') > ? OR (COALESCE(created_at, '') = ? AND id > ?))")
+                page_params.extend([cursor[0], cursor[0], cursor[1]])
+            clause = f"WHERE {' AND '.join(where)} " if where else ""
+            rows = self._query(
+                f"SELECT {select} FROM leads {clause}ORDER BY COALESCE(created_at, ''), id LIMIT ?",
+                page_params + [page_size]
+            )
+            if not rows:
+                return
+            yield [Lead.from_row(row) for row in rows]
+            cursor = (rows[-1]["created_at"] or "", rows[-1]["id"])
+
+    def get_next_lead_to_contact(self) -> Optional[Lead]:
+        """Mesma regra do SupabaseClient: 'new' mais antigo, depois follow-up vencido."""
+        rows = self._query(
+            f"SELECT {self._select(LEAD_SEND_VIEW)} FROM leads WHERE {self._DUE_CONDITION} "
+            f"ORDER BY {self._DUE_ORDER} LIMIT 1",
+            (datetime.utcnow().isoformat(),)
+        )
+        return Lead.from_row(rows[0]) if rows else None
+
+    _DUE_CONDITION = "(status = 'new' OR (status = 'follow_up_scheduled' AND next_contact_at <= ?))"
+    _DUE_ORDER = (
+        "CASE WHEN status = 'new' THEN 0 ELSE 1 END, "
+        "CASE WHEN status = 'new' THEN created_at ELSE next_contact_at END"
+    )
+
+    def claim_leads(self, worker_id: str, limit: int, lease_seconds: int) -> List[Lead]:
+        """Reivindica até `limit` leads prontos para contato (transação IMMEDIATE serializa processos)."""
+        now = datetime.utcnow()
+        now_iso = now.isoformat()
+        expires = (now + timedelta(seconds=lease_seconds)).isoformat()
+
+        with self._transaction(immediate=True):
+            rows = self._query(
+                f"SELECT {self._select(LEAD_SEND_VIEW)} FROM leads WHERE {self._DUE_CONDITION} "
+                f"AND (lease_expires_at IS NULL OR lease_expires_at < ?) "
+                f"ORDER BY {self._DUE_ORDER} LIMIT ?",
+                (now_iso, now_iso, limit)
+            )
+            if rows:
+                ids = [row["id"] for row in rows]
+                placeholders = ", ".join("?" for _ in ids)
+                self.conn.execute(
+                    f"UPDATE leads SET claimed_by = ?, lease_expires_at = ? WHERE id IN ({placeholders})",
+                    [worker_id, expires, *ids]
+                )
+
+        return [Lead.from_row(row) for row in rows]
+
+    def release_lead_claims(self, worker_id: str, lead_ids: List[str]):
+        """Libera leads reivindicados por `worker_id` e não utilizados."""
+        if not lead_ids:
+            return
+        placeholders = ", ".join("?" for _ in lead_ids)
+        with self._transaction():
+            self.conn.execute(
+                f"UPDATE leads SET claimed_by = NULL, lease_expires_at = NULL "
+                f"WHERE claimed_by = ? AND id IN ({placeholders})",
+                [worker_id, *lead_ids]
+            )
+
+    # ------------------------------------------------------------------
+    # Mensagens
+    # ------------------------------------------------------------------
+
+    def log_message(self, lead_id: str, direction: str, content: str, message_id: Optional[str] = None) -> Dict[str, Any]:
+        """Registra uma mensagem no histórico."""
+        data = {
+            "lead_id": lead_id,
+            "direction": direction,
+            "content": content,
+            "sent_at": datetime.utcnow().isoformat()
+        }
+        if message_id:
+            data["message_id"] = message_id
+            data["delivery_status"] = "sent"
+        with self._transaction():
+            data["id"] = self._insert("message_logs", data)
+        return data
+
+    def list_message_logs(
+        self,
+        since: Optional[str] = None,
+        lead_id: Optional[str] = None,
+        direction: Optional[str] = None,
+        tracked_only: bool = False,
+        select: str = "*",
+        limit: Optional[int] = None,
+        newest_first: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Mesmo contrato do SupabaseClient.list_message_logs."""
+        conditions, params = [], []
+        if since:
+            conditions.append("sent_at >= ?")
+            params.append(since)
+        if lead_id:
+            conditions.append("lead_id = ?")
+            params.append(lead_id)
+        if direction:
+            conditions.append("direction = ?")
+            params.append(direction)
+        if tracked_only:
+            conditions.append("message_id IS NOT NULL")
+
+        fields = [c.strip() for c in select.split(",")] if select != "*" else []
+        unknown = set(fields) - self._columns["message_logs"]
+        if unknown:
+            raise ValueError(f"Colunas desconhecidas em message_logs: {', '.join(sorted(unknown))}")
+
+        sql = f"SELECT {', '.join(fields) or '*'} FROM message_logs"
+        if conditions:
+            sql += f" WHERE {' AND '.join(conditions)}"
+        sql += f" ORDER BY sent_at {'DESC' if newest_first else 'ASC'}, id {'DESC' if newest_first else 'ASC'}"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return self._query(sql, params)
+
+    def count_message_logs(self, since: str, direction: Optional[str] = None) -> int:
+        """Quantidade de mensagens registradas a partir de `since` (ISO), opcionalmente por direção."""
+        sql, params = "SELECT COUNT(*) AS n FROM message_logs WHERE sent_at >= ?", [since]
+        if direction:
+            sql += " AND direction = ?"
+            params.append(direction)
+        return self._query(sql, params)[0]["n"]
+
+    def update_message_status(self, message_id: str, status: str, at: Optional[str] = None) -> bool:
+        """Mesmo contrato do SupabaseClient.update_message_status (sem regressão de estado)."""
+        at = at or datetime.utcnow().isoformat()
+        with self._transaction():
+            if status == "read":
+                updated = self.conn.execute(
+                    "UPDATE message_logs SET delivery_status = 'read', read_at = ?, "
+                    "delivered_at = COALESCE(delivered_at, ?) WHERE message_id = ? AND read_at IS NULL",
+                    (at, at, message_id)
+                ).rowcount
+            elif status == "delivered":
+                updated = self.conn.execute(
+                    "UPDATE message_logs SET delivery_status = 'delivered', delivered_at = ? "
+                    "WHERE message_id = ? AND delivered_at IS NULL",
+                    (at, message_id)
+                ).rowcount
+            elif status == "failed":
+                updated = self.conn.execute(
+                    "UPDATE message_logs SET delivery_status = 'failed' "
+                    "WHERE message_id = ? AND delivered_at IS NULL",
+                    (message_id,)
+                ).rowcount
+            else:
+                return False
+        return updated > 0
+
+    # ------------------------------------------------------------------
+    # Estado do agente
+    # ------------------------------------------------------------------
+
+    def get_agent_state(self) -> Dict[str, Any]:
+        """Recupera o estado atual do agente (cria o estado inicial se não existir)."""
+        rows = self._query("SELECT * FROM agent_state ORDER BY id LIMIT 1")
+        if rows:
+            return rows[0]
+        return self.update_agent_state({
+            "messages_sent_today": 0,
+            "last_active": datetime.utcnow().isoformat(),
+            "current_day": datetime.now().date().isoformat()
+        })
+
+    def update_agent_state(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Atualiza o estado do agente (linha única)."""
+        data["updated_at"] = datetime.utcnow().isoformat()
+        with self._transaction(immediate=True):
+            rows = self._query("SELECT id FROM agent_state ORDER BY id LIMIT 1")
+            if rows:
+                self._update("agent_state", data, "id = ?", (rows[0]["id"],))
+            else:
+                self._insert("agent_state", data)
+            return self._query("SELECT * FROM agent_state ORDER BY id LIMIT 1")[0]
+
+    def reserve_send_slot(self, day: str, limit: int) -> Optional[int]:
+        """Reserva atomicamente um envio na cota do dia. Retorna o total ou None se o limite foi atingido."""
+        with self._transaction(immediate=True):
+            state = self._agent_state_row()
+            sent_today = (state["messages_sent_today"] or 0) if state["current_day"] == day else 0
+            if sent_today >= limit:
+                return None
+            self.conn.execute(
+                "UPDATE agent_state SET messages_sent_today = ?, current_day = ?, last_active = ?, updated_at = ? WHERE id = ?",
+                (sent_today + 1, day, datetime.utcnow().isoformat(), datetime.utcnow().isoformat(), state["id"])
+            )
+            return sent_today + 1
+
+    def release_send_slot(self, day: str) -> Optional[int]:
+        """Devolve uma reserva não utilizada da cota do dia."""
+        with self._transaction(immediate=True):
+            state = self._agent_state_row()
+            if state["current_day"] != day or not state["messages_sent_today"]:
+                return None
+            sent_today = state["messages_sent_today"] - 1
+            self.conn.execute(
+                "UPDATE agent_state SET messages_sent_today = ?, updated_at = ? WHERE id = ?",
+                (sent_today, datetime.utcnow().isoformat(), state["id"])
+            )
+            return sent_today
+
+    def _agent_state_row(self) -> Dict[str, Any]:
+        rows = self._query("SELECT * FROM agent_state ORDER BY id LIMIT 1")
+        if rows:
+            return rows[0]
+        state_id = self._insert("agent_state", {"messages_sent_today": 0, "updated_at": datetime.utcnow().isoformat()})
+        return self._query("SELECT * FROM agent_state WHERE id = ?", (state_id,))[0]
+
+    # ------------------------------------------------------------------
+    # Fila de sincronização
+    # ------------------------------------------------------------------
+
+    def add_to_sync_queue(self, integration: str, action: str, payload: Dict[str, Any]):
+        """Adiciona uma tarefa à fila de sincronização (ex: Trello)."""
+        data = {
+            "integration": integration,
+            "action": action,
+            "payload": payload,
+            "status": "pending",
+            "created_at": datetime.utcnow().isoformat()
+        }
+        with self._transaction():
+            self._insert("sync_queue", data)
+        logger.info(f"Adicionado à fila de sync: {integration} - {action}")
+
+    def claim_sync_jobs(self, worker_id: str, integrations: List[str], limit: int, lease_seconds: int) -> List[Dict[str, Any]]:
+        """Reivindica até `limit` tarefas prontas da sync_queue (inclui locks vencidos)."""
+        if not integrations:
+            return []
+        now = datetime.utcnow()
+        now_iso = now.isoformat()
+        locked_until = (now + timedelta(seconds=lease_seconds)).isoformat()
+        placeholders = ", ".join("?" for _ in integrations)
+
+        with self._transaction(immediate=True):
+            rows = self._query(
+                f"SELECT id FROM sync_queue WHERE integration IN ({placeholders}) "
+                f"AND ((status = 'pending' AND (next_attempt_at IS NULL OR next_attempt_at <= ?)) "
+                f"OR (status = 'processing' AND locked_until < ?)) "
+                f"ORDER BY created_at, id LIMIT ?",
+                [*integrations, now_iso, now_iso, limit]
+            )
+            ids = [row["id"] for row in rows]
+            if not ids:
+                return []
+            id_placeholders = ", ".join("?" for _ in ids)
+            self.conn.execute(
+                f"UPDATE sync_queue SET status = 'processing', locked_by = ?, locked_until = ?, "
+                f"attempts = attempts + 1 WHERE id IN ({id_placeholders})",
+                [worker_id, locked_until, *ids]
+            )
+            return self._query(f"SELECT * FROM sync_queue WHERE id IN ({id_placeholders}) ORDER BY created_at, id", ids)
+
+    def complete_sync_job(self, job_id: int):
+        """Marca uma tarefa da sync_queue como concluída."""
+        with self._transaction():
+            self._update("sync_queue", {
+                "status": "done",
+                "processed_at": datetime.utcnow().isoformat(),
+                "locked_by": None,
+                "locked_until": None,
+                "last_error": None
+            }, "id = ?", (job_id,))
+
+    def fail_sync_job(self, job_id: int, error: str, next_attempt_at: Optional[str]):
+        """Registra a falha de uma tarefa: volta para 'pending' ou vai para 'dead'."""
+        with self._transaction():
+            self._update("sync_queue", {
+                "status": "pending" if next_attempt_at else "dead",
+                "next_attempt_at": next_attempt_at,
+                "last_error": error[:1000],
+                "locked_by": None,
+                "locked_until": None
+            }, "id = ?", (job_id,))
+
+    # ------------------------------------------------------------------
+    # Auxiliares
+    # ------------------------------------------------------------------
+
+    def _migrate(self):
+        """Adiciona colunas novas em bancos criados por versões anteriores."""
+        for table, new_columns in MIGRATIONS.items():
+            for column, definition in new_columns.items():
+                if column not in self._columns[table]:
+                    self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+                    self._columns[table].add(column)
+        self.conn.executescript(MIGRATED_INDEXES)
+
+    @contextmanager
+    def _transaction(self, immediate: bool = False):
+        """Transação explícita; IMMEDIATE reserva o lock de escrita já no início."""
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            try:
+                yield
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            else:
+                self.conn.execute("COMMIT")
+
+    def _query(self, sql: str, params: Any = ()) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [self._decode(row) for row in self.conn.execute(sql, params).fetchall()]
+
+    def _insert(self, table: str, data: Dict[str, Any], or_ignore: bool = False) -> Optional[Any]:
+        """Insere uma linha (colunas desconhecidas são ignoradas). Retorna o rowid ou None se ignorada."""
+        data = self._known(table, data)
+        keys = list(data)
+        verb = "INSERT OR IGNORE" if or_ignore else "INSERT"
+        cursor = self.conn.execute(
+            f"{verb} INTO {table} ({', '.join(keys)}) VALUES ({', '.join('?' for _ in keys)})",
+            [self._encode(k, data[k]) for k in keys]
+        )
+        if cursor.rowcount == 0:
+            return None
+        return cursor.lastrowid
+
+    def _update(self, table: str, data: Dict[str, Any], where: str, params: Tuple) -> int:
+        """Atualiza as linhas de `where`. Retorna a quantidade de linhas alteradas."""
+        data = self._known(table, data)
+        if not data:
+            return 0
+        assignments = ", ".join(f"{k} = ?" for k in data)
+        return self.conn.execute(
+            f"UPDATE {table} SET {assignments} WHERE {where}",
+            [self._encode(k, v) for k, v in data.items()] + list(params)
+        ).rowcount
+
+    def _known(self, table: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        unknown = set(data) - self._columns[table]
+        if unknown:
+            logger.warning(f"Colunas ignoradas em {table} (não existem no SQLite): {', '.join(sorted(unknown))}")
+        return {k: v for k, v in data.items() if k in self._columns[table]}
+
+    def _select(self, view: Tuple[str, ...]) -> str:
+        return ", ".join(c for c in view if c in LEAD_FIELDS)
+
+    @staticmethod
+    def _new_lead_row(data: Dict[str, Any]) -> Dict[str, Any]:
+        row = dict(data)
+        row.setdefault("id", uuid.uuid4().hex)
+        row.setdefault("created_at", datetime.utcnow().isoformat())
+        row.setdefault("status", "new")
+        return row
+
+    @staticmethod
+    def _encode(key: str, value: Any) -> Any:
+        if key in JSON_COLUMNS and value is not None:
+            return json.dumps(value, ensure_ascii=False)
+        if isinstance(value, bool):
+            return int(value)
+        return value
+
+    @staticmethod
+    def _decode(row: sqlite3.Row) -> Dict[str, Any]:
+        data = dict(row)
+        for key in JSON_COLUMNS & data.keys():
+            if data[key] is not None:
+                data[key] = json.loads(data[key])
+        return data
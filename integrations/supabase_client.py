@@ -1,8 +1,27 @@
 
 from supabase import create_client, Client
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator, Tuple
 from datetime import datetime
-from config.settings import SUPABASE_URL, SUPABASE_KEY
+from config.settings import (
+    STORAGE_BACKEND,
+    SQLITE_PATH,
+    SUPABASE_URL,
+    SUPABASE_KEY,
+    IMPORT_BATCH_SIZE,
+    LEADS_PAGE_SIZE,
+    LEAD_CACHE_MAXSIZE,
+    LEAD_CACHE_TTL_SECONDS,
+    LEAD_CACHE_NEGATIVE_TTL_SECONDS
+)
+from integrations.models import (
+    Lead,
+    columns,
+    with_page_key,
+    LEAD_SEND_VIEW,
+    LEAD_WEBHOOK_VIEW,
+    LEAD_DASHBOARD_VIEW
+)
+from utils.cache import TTLCache
 from utils.logger import logger
 from utils.retry import retry_with_logging
 
@@ -11,58 +30,315 @@ class SupabaseClient:
         if not SUPABASE_URL or not SUPABASE_KEY:
             raise ValueError("Supabase credenciais não configuradas.")
         self.client: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        # id da linha singleton de agent_state (evita um select a cada update)
+        self._agent_state_id = None
+        # Cache telefone -> registro compacto do lead (None = não é lead)
+        self.lead_cache = TTLCache(
+            maxsize=LEAD_CACHE_MAXSIZE,
+            ttl=LEAD_CACHE_TTL_SECONDS,
+            negative_ttl=LEAD_CACHE_NEGATIVE_TTL_SECONDS
+        )
 
     @retry_with_logging(max_attempts=3)
-    def get_lead_by_phone(self, phone: str) -> Optional[Dict[str, Any]]:
-        """Busca um lead pelo telefone."""
+    def get_lead_by_phone(self, phone: str, view: Tuple[str, ...] = LEAD_SEND_VIEW) -> Optional[Lead]:
+        """Busca um lead pelo telefone, carregando apenas as colunas de `view`."""
         try:
-            response = self.client.table("leads").select("*").eq("phone", phone).execute()
+            response = self.client.table("leads").select(columns(view)).eq("phone", phone).limit(1).execute()
             if response.data:
-                return response.data[0]
+                return Lead.from_row(response.data[0])
             return None
         except Exception as e:
             logger.error(f"Erro ao buscar lead por telefone {phone}: {e}")
             raise
 
     @retry_with_logging(max_attempts=3)
-    def create_lead(self, data: Dict[str, Any]) -> Dict[str, Any]:
+    def get_lead_by_id(self, lead_id: str, view: Tuple[str, ...] = LEAD_SEND_VIEW) -> Optional[Lead]:
+        """Busca um lead pelo id, carregando apenas as colunas de `view`."""
+        try:
+            response = self.client.table("leads").select(columns(view)).eq("id", lead_id).limit(1).execute()
+            return Lead.from_row(response.data[0]) if response.data else None
+        except Exception as e:
+            logger.error(f"Erro ao buscar lead {lead_id}: {e}")
+            raise
+
+    def find_lead_by_phone(self, phone: str) -> Optional[Lead]:
+        """
+        Busca um lead pelo telefone usando o cache local (caminho quente do webhook).
+        Retorna apenas os campos usados no processamento de mensagens recebidas.
+        Telefones que não são leads também ficam em cache (negativo) por um período curto.
+
+        O cache é por processo e o status pode estar defasado: mudanças de status decididas
+        a partir dele devem usar update_lead com unless_status/only_status (condicional no banco).
+        """
+        return self.lead_cache.get_or_load(phone, lambda: self._fetch_lead_summary(phone))
+
+    @retry_with_logging(max_attempts=3)
+    def _fetch_lead_summary(self, phone: str) -> Optional[Lead]:
+        try:
+            response = self.client.table("leads")\
+                .select(columns(LEAD_WEBHOOK_VIEW))\
+                .eq("phone", phone)\
+                .limit(1)\
+                .execute()
+            return Lead.from_row(response.data[0]) if response.data else None
+        except Exception as e:
+            logger.error(f"Erro ao buscar lead por telefone {phone}: {e}")
+            raise
+
+    @retry_with_logging(max_attempts=3)
+    def create_lead(self, data: Dict[str, Any]) -> Lead:
         """Cria um novo lead."""
         try:
             # Adiciona timestamps se não existirem
             if "created_at" not in data:
                 data["created_at"] = datetime.utcnow().isoformat()
             
-            response = self.client.table("leads").insert(data).execute()
+            response = self.client.table("leads").insert(data).select("id, phone, status").execute()
+            self.lead_cache.invalidate(data.get("phone"))
             logger.info(f"Lead criado: {data.get('phone')}")
-            return response.data[0]
+            return Lead.from_row(response.data[0])
         except Exception as e:
             logger.error(f"Erro ao criar lead: {e}")
             raise
 
+    def get_leads_by_phones(self, phones: List[str], view: Tuple[str, ...] = ("id", "phone"), chunk_size: int = 200) -> Dict[str, Lead]:
+        """
+        Busca leads existentes para uma lista de telefones.
+        Faz uma consulta `in` por bloco de `chunk_size` telefones (limita o tamanho da URL)
+        e retorna {telefone: lead} com as colunas de `view`.
+        """
+        unique_phones = list(dict.fromkeys(p for p in phones if p))
+        found = {}
+
+        for start in range(0, len(unique_phones), chunk_size):
+            for row in self._select_leads_in_phones(unique_phones[start:start + chunk_size], columns(view)):
+                found[row["phone"]] = Lead.from_row(row)
+
+        return found
+
+    @retry_with_logging(max_attempts=3)
+    def get_leads_by_ids(self, lead_ids: List[str], view: Tuple[str, ...] = ("id", "name", "phone")) -> Dict[str, Lead]:
+        """Busca vários leads pelo id em uma consulta `in`. Retorna {id: lead}."""
+        unique_ids = list(dict.fromkeys(i for i in lead_ids if i))
+        if not unique_ids:
+            return {}
+        try:
+            select = columns(dict.fromkeys(("id",) + tuple(view)))
+            response = self.client.table("leads").select(select).in_("id", unique_ids).execute()
+            return {row["id"]: Lead.from_row(row) for row in response.data or []}
+        except Exception as e:
+            logger.error(f"Erro ao buscar {len(unique_ids)} leads por id: {e}")
+            raise
+
+    @retry_with_logging(max_attempts=3)
+    def count_leads_created_since(self, since: str) -> int:
+        """Quantidade de leads criados a partir de `since` (ISO)."""
+        try:
+            response = self.client.table("leads").select("id", count="exact").gte("created_at", since).execute()
+            return response.count or 0
+        except Exception as e:
+            logger.error(f"Erro ao contar leads desde {since}: {e}")
+            raise
+
+    @retry_with_logging(max_attempts=3)
+    def _select_leads_in_phones(self, phones: List[str], select: str) -> List[Dict[str, Any]]:
+        """Consulta um bloco de telefones (usado por get_leads_by_phones)."""
+        try:
+            response = self.client.table("leads").select(select).in_("phone", phones).execute()
+            return response.data or []
+        except Exception as e:
+            logger.error(f"Erro ao buscar leads por lote de {len(phones)} telefones: {e}")
+            raise
+
+    def bulk_upsert_leads(self, leads: List[Dict[str, Any]], batch_size: int = IMPORT_BATCH_SIZE) -> List[Dict[str, Any]]:
+        """
+        Cria leads em lote, ignorando telefones que já existem no banco.
+
+        Pré-carrega os telefones existentes em consultas `in` por bloco e insere os novos
+        em lotes de `batch_size` com `on_conflict=phone` (requer UNIQUE em leads.phone).
+        Retorna um resultado por linha de entrada, na mesma ordem:
+            {"phone": str, "status": "created" | "existing" | "duplicate" | "error",
+             "lead": Lead | None, "error": str | None}
+        """
+        outcomes: List[Dict[str, Any]] = [
+            {"phone": lead.get("phone"), "status": None, "lead": None, "error": None}
+            for lead in leads
+        ]
+
+        existing = self.get_leads_by_phones([lead.get("phone") for lead in leads])
+
+        # Separa o que realmente precisa ser inserido (telefone novo, primeira ocorrência)
+        pending = []
+        seen = set()
+        for i, lead in enumerate(leads):
+            phone = lead.get("phone")
+            if not phone:
+                outcomes[i].update(status="error", error="Telefone ausente")
+            elif phone in existing:
+                outcomes[i].update(status="existing", lead=existing[phone])
+            elif phone in seen:
+                outcomes[i]["status"] = "duplicate"
+            else:
+                seen.add(phone)
+                pending.append(i)
+
+        now = datetime.utcnow().isoformat()
+        for start in range(0, len(pending), batch_size):
+            indexes = pending[start:start + batch_size]
+            batch = []
+            for i in indexes:
+                data = dict(leads[i])
+                data.setdefault("created_at", now)
+                batch.append(data)
+
+            try:
+                created = {row["phone"]: row for row in self._upsert_leads_batch(batch)}
+            except Exception as e:
+                for i in indexes:
+                    outcomes[i].update(status="error", error=str(e))
+                continue
+
+            for i in indexes:
+                row = created.get(outcomes[i]["phone"])
+                self.lead_cache.invalidate(outcomes[i]["phone"])
+                if row:
+                    outcomes[i].update(status="created", lead=Lead.from_row(row))
+                else:
+                    # Inserido por outro processo entre o pré-carregamento e o insert
+                    outcomes[i]["status"] = "existing"
+
+        created_count = sum(1 for o in outcomes if o["status"] == "created")
+        logger.info(f"Upsert em lote: {created_count} criados de {len(leads)} recebidos.")
+        return outcomes
+
     @retry_with_logging(max_attempts=3)
-    def update_lead(self, lead_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Atualiza dados de um lead."""
+    def _upsert_leads_batch(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Insere um lote de leads ignorando conflitos de telefone. Retorna apenas as linhas criadas."""
+        try:
+            response = self.client.table("leads")\
+                .upsert(batch, on_conflict="phone", ignore_duplicates=True, default_to_null=False)\
+                .select("id, phone, status")\
+                .execute()
+            return response.data or []
+        except Exception as e:
+            logger.error(f"Erro ao inserir lote de {len(batch)} leads: {e}")
+            raise
+
+    @retry_with_logging(max_attempts=3)
+    def update_lead(
+        self,
+        lead_id: str,
+        data: Dict[str, Any],
+        only_status: Optional[Tuple[str, ...]] = None,
+        unless_status: Optional[Tuple[str, ...]] = None
+    ) -> Optional[Lead]:
+        """
+        Atualiza dados de um lead. Retorna id, telefone e status após a alteração.
+        only_status / unless_status tornam o update condicional ao status atual no banco
+        (compare-and-set): se a condição não vale, nada é alterado e o retorno é None.
+        """
         try:
             data["updated_at"] = datetime.utcnow().isoformat()
-            response = self.client.table("leads").update(data).eq("id", lead_id).execute()
+            query = self.client.table("leads").update(data).eq("id", lead_id)
+            if only_status:
+                query = query.in_("status", list(only_status))
+            if unless_status:
+                query = query.not_.in_("status", list(unless_status))
+            response = query.select("id, phone, status").execute()
+            # Sem linha alterada o cache também é descartado: o status dele estava defasado
+            self._invalidate_cached_lead(lead_id, response.data)
+            if not response.data:
+                return None
             logger.info(f"Lead atualizado: {lead_id}")
-            return response.data[0] if response.data else None
+            return Lead.from_row(response.data[0])
         except Exception as e:
             logger.error(f"Erro ao atualizar lead {lead_id}: {e}")
             raise
 
+    def _invalidate_cached_lead(self, lead_id: str, rows: Optional[List[Dict[str, Any]]]):
+        """Remove do cache o lead alterado (pelo telefone retornado no update, se houver)."""
+        phones = [row.get("phone") for row in rows or [] if row.get("phone")]
+        if phones:
+            for phone in phones:
+                self.lead_cache.invalidate(phone)
+        else:
+            self.lead_cache.invalidate_where(lambda lead: bool(lead) and lead.get("id") == lead_id)
+
+    def get_leads_by_status(self, status: str, view: Tuple[str, ...] = LEAD_DASHBOARD_VIEW) -> List[Lead]:
+        """
+        Busca todos os leads de um status, carregando apenas as colunas de `view`.
+        Sem retry próprio: cada página já é repetida em _select_leads_page, e repetir
+        a varredura inteira multiplicaria as tentativas (e refaria páginas já lidas).
+        """
+        return [lead for page in self.iter_leads({"status": status}, view) for lead in page]
+
+    def iter_leads(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        view: Tuple[str, ...] = LEAD_DASHBOARD_VIEW,
+        page_size: int = LEADS_PAGE_SIZE
+    ) -> Iterator[List[Lead]]:
+        """
+        Percorre a tabela leads em páginas (gerador), com paginação por keyset em (created_at, id).
+        Cada página é buscada só quando consumida, então o chamador processa a tabela inteira
+        com memória constante e sem o corte silencioso do limite de linhas do PostgREST.
+        Linhas alteradas durante a iteração não deslocam as páginas seguintes (ao contrário de offset).
+
+        filters: {coluna: valor} — valor escalar (eq), lista/tupla (in) ou None (is null).
+        As colunas created_at e id são sempre incluídas nos leads retornados (cursor).
+        Leads sem created_at vêm no fim, em ordem de id.
+        """
+        select = columns(with_page_key(view))
+        cursor = None
+
+        while True:
+            rows = self._select_leads_page(select, filters or {}, cursor, page_size)
+            # Termina na página vazia (e não na página curta): se o PostgREST limitar
+            # o tamanho da resposta abaixo de page_size, nenhuma linha é perdida
+            if not rows:
+                return
+            yield [Lead.from_row(row) for row in rows]
+            last = rows[-1]
+            cursor = (last["created_at"], last["id"])
+
     @retry_with_logging(max_attempts=3)
-    def get_leads_by_status(self, status: str) -> List[Dict[str, Any]]:
-        """Busca leads por status."""
+    def _select_leads_page(
+        self,
+        select: str,
+        filters: Dict[str, Any],
+        cursor: Optional[Tuple[str, Any]],
+        page_size: int
+    ) -> List[Dict[str, Any]]:
+        """Busca uma página de iter_leads a partir do cursor (created_at, id) da página anterior."""
         try:
-            response = self.client.table("leads").select("*").eq("status", status).execute()
-            return response.data
+            query = self.client.table("leads").select(select)
+            for column, value in filters.items():
+                if value is None:
+                    query = query.is_(column, "null")
+                elif isinstance(value, (list, tuple, set)):
+                    query = query.in_(column, list(value))
+                else:
+                    query = query.eq(column, value)
+
+            # Postgres ordena created_at nulo por último (ASC): depois das linhas com data,
+            # as sem data são percorridas só pelo id
+            if cursor and cursor[0] is None:
+                query = query.is_("created_at", "null").gt("id", cursor[1])
+            elif cursor:
+                created_at, last_id = cursor
+                query = query.or_(
+                    f'created_at.gt."{created_at}",and(created_at.eq."{created_at}",id.gt."{last_id}"),'
+                    f'created_at.is.null'
+                )
+
+            response = query.order("created_at").order("id").limit(page_size).execute()
+            return response.data or []
         except Exception as e:
-            logger.error(f"Erro ao buscar leads por status {status}: {e}")
+            logger.error(f"Erro ao buscar página de leads (filtros {filters}): {e}")
             raise
 
     @retry_with_logging(max_attempts=3)
-    def get_next_lead_to_contact(self) -> Optional[Dict[str, Any]]:
+    def get_next_lead_to_contact(self) -> Optional[Lead]:
         """
         Busca o próximo lead para contato.
         Regra: Status 'new' ou 'follow_up_scheduled' com data <= agora.
@@ -71,19 +347,19 @@ class SupabaseClient:
         try:
             # Prioriza 'new' por enquanto, pode ser ajustado
             response = self.client.table("leads")\
-                .select("*")\
+                .select(columns(LEAD_SEND_VIEW))\
                 .eq("status", "new")\
                 .order("created_at", desc=False)\
                 .limit(1)\
                 .execute()
             
             if response.data:
-                return response.data[0]
+                return Lead.from_row(response.data[0])
             
             # Se não tem 'new', verifica agendados (lógica simples por enquanto)
             now = datetime.utcnow().isoformat()
             response = self.client.table("leads")\
-                .select("*")\
+                .select(columns(LEAD_SEND_VIEW))\
                 .eq("status", "follow_up_scheduled")\
                 .lte("next_contact_at", now)\
                 .order("next_contact_at", desc=False)\
@@ -91,7 +367,7 @@ class SupabaseClient:
                 .execute()
 
             if response.data:
-                return response.data[0]
+                return Lead.from_row(response.data[0])
 
             return None
         except Exception as e:
@@ -99,10 +375,45 @@ class SupabaseClient:
             raise
 
     @retry_with_logging(max_attempts=3)
-    def log_message(self, lead_id: str, direction: str, content: str) -> Dict[str, Any]:
+    def claim_leads(self, worker_id: str, limit: int, lease_seconds: int) -> List[Lead]:
+        """
+        Reivindica até `limit` leads prontos para contato (RPC claim_leads).
+        Mesma prioridade de get_next_lead_to_contact: 'new' por created_at e depois
+        'follow_up_scheduled' vencidos por next_contact_at. Os leads ficam reservados
+        para `worker_id` até o lease expirar.
+        """
+        try:
+            response = self.client.rpc("claim_leads", {
+                "p_worker": worker_id,
+                "p_limit": limit,
+                "p_lease_seconds": lease_seconds
+            }).select(columns(LEAD_SEND_VIEW)).execute()
+            return [Lead.from_row(row) for row in response.data or []]
+        except Exception as e:
+            logger.error(f"Erro ao reivindicar leads para {worker_id}: {e}")
+            raise
+
+    @retry_with_logging(max_attempts=3)
+    def release_lead_claims(self, worker_id: str, lead_ids: List[str]):
+        """Libera leads reivindicados por `worker_id` e não utilizados."""
+        if not lead_ids:
+            return
+        try:
+            self.client.table("leads")\
+                .update({"claimed_by": None, "lease_expires_at": None})\
+                .eq("claimed_by", worker_id)\
+                .in_("id", lead_ids)\
+                .execute()
+        except Exception as e:
+            logger.error(f"Erro ao liberar {len(lead_ids)} leads de {worker_id}: {e}")
+            raise
+
+    @retry_with_logging(max_attempts=3)
+    def log_message(self, lead_id: str, direction: str, content: str, message_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Registra uma mensagem no histórico.
         direction: 'inbound' ou 'outbound'
+        message_id: id da mensagem no WhatsApp (key.id), para os recibos de entrega/leitura
         """
         try:
             data = {
@@ -111,12 +422,89 @@ class SupabaseClient:
                 "content": content,
                 "sent_at": datetime.utcnow().isoformat()
             }
+            if message_id:
+                data["message_id"] = message_id
+                data["delivery_status"] = "sent"
             response = self.client.table("message_logs").insert(data).execute()
             return response.data[0]
         except Exception as e:
             logger.error(f"Erro ao logar mensagem para lead {lead_id}: {e}")
             raise
 
+    @retry_with_logging(max_attempts=3)
+    def list_message_logs(
+        self,
+        since: Optional[str] = None,
+        lead_id: Optional[str] = None,
+        direction: Optional[str] = None,
+        tracked_only: bool = False,
+        select: str = "*",
+        limit: Optional[int] = None,
+        newest_first: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Histórico de mensagens filtrado (dashboard), ordenado por sent_at.
+        tracked_only: apenas mensagens com message_id (que recebem recibos de entrega/leitura).
+        """
+        try:
+            query = self.client.table("message_logs").select(select)
+            if since:
+                query = query.gte("sent_at", since)
+            if lead_id:
+                query = query.eq("lead_id", lead_id)
+            if direction:
+                query = query.eq("direction", direction)
+            if tracked_only:
+                query = query.not_.is_("message_id", "null")
+            query = query.order("sent_at", desc=newest_first)
+            if limit:
+                query = query.limit(limit)
+            return query.execute().data or []
+        except Exception as e:
+            logger.error(f"Erro ao buscar histórico de mensagens: {e}")
+            raise
+
+    @retry_with_logging(max_attempts=3)
+    def count_message_logs(self, since: str, direction: Optional[str] = None) -> int:
+        """Quantidade de mensagens registradas a partir de `since` (ISO), opcionalmente por direção."""
+        try:
+            query = self.client.table("message_logs").select("id", count="exact").gte("sent_at", since)
+            if direction:
+                query = query.eq("direction", direction)
+            return query.execute().count or 0
+        except Exception as e:
+            logger.error(f"Erro ao contar mensagens desde {since}: {e}")
+            raise
+
+    @retry_with_logging(max_attempts=3)
+    def update_message_status(self, message_id: str, status: str, at: Optional[str] = None) -> bool:
+        """
+        Aplica um recibo ('delivered', 'read' ou 'failed') à mensagem (índice em message_id).
+        Nunca regride o estado: cada timestamp só é gravado uma vez e 'read' implica entrega.
+        Retorna True se alguma linha foi atualizada.
+        """
+        at = at or datetime.utcnow().isoformat()
+        table = self.client.table("message_logs")
+        try:
+            if status == "read":
+                updated = table.update({"delivery_status": "read", "read_at": at})\
+                    .eq("message_id", message_id).is_("read_at", "null").execute().data
+                # Leitura sem recibo de entrega anterior: entrega no mesmo instante
+                table.update({"delivered_at": at})\
+                    .eq("message_id", message_id).is_("delivered_at", "null").execute()
+            elif status == "delivered":
+                updated = table.update({"delivery_status": "delivered", "delivered_at": at})\
+                    .eq("message_id", message_id).is_("delivered_at", "null").execute().data
+            elif status == "failed":
+                updated = table.update({"delivery_status": "failed"})\
+                    .eq("message_id", message_id).is_("delivered_at", "null").execute().data
+            else:
+                return False
+            return bool(updated)
+        except Exception as e:
+            logger.error(f"Erro ao atualizar status da mensagem {message_id}: {e}")
+            raise
+
     @retry_with_logging(max_attempts=3)
     def get_agent_state(self) -> Dict[str, Any]:
         """Recupera o estado atual do agente (ex: contadores diários)."""
@@ -124,6 +512,7 @@ class SupabaseClient:
             # Assume que existe uma tabela 'agent_state' com apenas uma linha ou chave fixa
             response = self.client.table("agent_state").select("*").limit(1).execute()
             if response.data:
+                self._agent_state_id = response.data[0].get("id")
                 return response.data[0]
             # Se não existir, cria um estado inicial
             initial_state = {
@@ -131,7 +520,7 @@ class SupabaseClient:
                 "last_active": datetime.utcnow().isoformat(),
                 "current_day": datetime.now().date().isoformat()
             }
-            return self.update_agent_state(initial_state)
+            return self._write_agent_state(initial_state)
         except Exception as e:
             logger.error(f"Erro ao buscar estado do agente: {e}")
             raise
@@ -140,23 +529,60 @@ class SupabaseClient:
     def update_agent_state(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Atualiza o estado do agente."""
         try:
-            # Primeiro verifica se existe para fazer update ou insert
-            # Simplificação: assume que ID 1 é o singleton do estado
-            data["updated_at"] = datetime.utcnow().isoformat()
-            
-            # Tenta update primeiro (assumindo id=1 fixo para simplicidade ou via tabela single row)
-             # Na prática, vamos tentar buscar o primeiro registro de novo para pegar o ID
+            return self._write_agent_state(data)
+        except Exception as e:
+            logger.error(f"Erro ao atualizar estado do agente: {e}")
+            raise
+
+    def _write_agent_state(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Grava no singleton agent_state (update se a linha existe, senão insert).
+        Não tem retry próprio: é chamado de dentro de métodos já decorados.
+        """
+        data["updated_at"] = datetime.utcnow().isoformat()
+
+        # Só consulta o id na primeira escrita; depois reaproveita o valor lembrado
+        if self._agent_state_id is None:
             existing = self.client.table("agent_state").select("id").limit(1).execute()
-            
             if existing.data:
-                state_id = existing.data[0]['id']
-                response = self.client.table("agent_state").update(data).eq("id", state_id).execute()
-            else:
-                response = self.client.table("agent_state").insert(data).execute()
-                
-            return response.data[0]
+                self._agent_state_id = existing.data[0]["id"]
+
+        response = None
+        if self._agent_state_id is not None:
+            response = self.client.table("agent_state").update(data).eq("id", self._agent_state_id).execute()
+
+        if not response or not response.data:
+            # Linha inexistente (ou removida desde a última leitura): cria novamente
+            response = self.client.table("agent_state").insert(data).execute()
+
+        row = response.data[0]
+        self._agent_state_id = row.get("id", self._agent_state_id)
+        return row
+
+    def reserve_send_slot(self, day: str, limit: int) -> Optional[int]:
+        """
+        Reserva atomicamente um envio na cota do dia (RPC reserve_send_slot).
+        Trata a virada do dia na mesma operação.
+        Retorna o total de envios do dia já contando a reserva, ou None se o limite foi atingido.
+        Sem retry: a RPC não é idempotente (um timeout após o commit contaria o envio duas vezes).
+        """
+        try:
+            response = self.client.rpc("reserve_send_slot", {"p_day": day, "p_limit": limit}).execute()
+            return response.data
         except Exception as e:
-            logger.error(f"Erro ao atualizar estado do agente: {e}")
+            logger.error(f"Erro ao reservar envio na cota de {day}: {e}")
+            raise
+
+    def release_send_slot(self, day: str) -> Optional[int]:
+        """
+        Devolve uma reserva não utilizada da cota do dia. Retorna o novo total (ou None).
+        Sem retry pelo mesmo motivo de reserve_send_slot (devolveria duas reservas).
+        """
+        try:
+            response = self.client.rpc("release_send_slot", {"p_day": day}).execute()
+            return response.data
+        except Exception as e:
+            logger.error(f"Erro ao liberar envio na cota de {day}: {e}")
             raise
 
     @retry_with_logging(max_attempts=3)
@@ -176,9 +602,70 @@ class SupabaseClient:
             logger.error(f"Erro ao adicionar à fila de sync: {e}")
             raise
 
-# Instância global
+    @retry_with_logging(max_attempts=3)
+    def claim_sync_jobs(self, worker_id: str, integrations: List[str], limit: int, lease_seconds: int) -> List[Dict[str, Any]]:
+        """
+        Reivindica até `limit` tarefas prontas da sync_queue (RPC claim_sync_jobs, SKIP LOCKED).
+        Cada tarefa reivindicada passa para 'processing' com `attempts` incrementado.
+        """
+        try:
+            response = self.client.rpc("claim_sync_jobs", {
+                "p_worker": worker_id,
+                "p_integrations": integrations,
+                "p_limit": limit,
+                "p_lease_seconds": lease_seconds
+            }).execute()
+            return response.data or []
+        except Exception as e:
+            logger.error(f"Erro ao reivindicar tarefas da fila de sync: {e}")
+            raise
+
+    @retry_with_logging(max_attempts=3)
+    def complete_sync_job(self, job_id: int):
+        """Marca uma tarefa da sync_queue como concluída."""
+        try:
+            self.client.table("sync_queue").update({
+                "status": "done",
+                "processed_at": datetime.utcnow().isoformat(),
+                "locked_by": None,
+                "locked_until": None,
+                "last_error": None
+            }).eq("id", job_id).execute()
+        except Exception as e:
+            logger.error(f"Erro ao concluir tarefa {job_id} da fila de sync: {e}")
+            raise
+
+    @retry_with_logging(max_attempts=3)
+    def fail_sync_job(self, job_id: int, error: str, next_attempt_at: Optional[str]):
+        """
+        Registra a falha de uma tarefa. Com `next_attempt_at` ela volta para 'pending'
+        e será tentada de novo; sem ele vai para 'dead' (dead-letter).
+        """
+        try:
+            self.client.table("sync_queue").update({
+                "status": "pending" if next_attempt_at else "dead",
+                "next_attempt_at": next_attempt_at,
+                "last_error": error[:1000],
+                "locked_by": None,
+                "locked_until": None
+            }).eq("id", job_id).execute()
+        except Exception as e:
+            logger.error(f"Erro ao registrar falha da tarefa {job_id} da fila de sync: {e}")
+            raise
+
+
+def create_storage_client():
+    """Cria o backend de armazenamento configurado em STORAGE_BACKEND."""
+    if STORAGE_BACKEND == "sqlite":
+        from integrations.sqlite_client import SQLiteClient
+        return SQLiteClient(SQLITE_PATH)
+    if STORAGE_BACKEND != "supabase":
+        raise ValueError(f"STORAGE_BACKEND inválido: {STORAGE_BACKEND}")
+    return SupabaseClient()
+
+# Instância global (mantém o nome 'supabase' usado em todo o projeto)
 try:
-    supabase = SupabaseClient()
+    supabase = create_storage_client()
 except Exception as e:
-    logger.warning(f"Não foi possível inicializar SupabaseClient: {e}")
+    logger.warning(f"Não foi possível inicializar o armazenamento ({STORAGE_BACKEND}): {e}")
     supabase = None
@@ -1,11 +1,12 @@
 
-import requests
 from typing import Optional, List, Dict, Any
 from config.settings import (
     TRELLO_API_KEY, 
     TRELLO_TOKEN, 
-    TRELLO_BOARD_ID
+    TRELLO_BOARD_ID,
+    TRELLO_HTTP_TIMEOUT
 )
+from utils.http import get_session
 from utils.logger import logger
 from utils.retry import retry_with_logging
 
@@ -19,12 +20,13 @@ class TrelloClient:
             "key": self.api_key,
             "token": self.token
         }
+        self.session = get_session("trello", timeout=TRELLO_HTTP_TIMEOUT)
 
     def test_connection(self) -> bool:
         """Testa se as credenciais estão válidas obtendo dados do usuário."""
         try:
             url = f"{self.base_url}/members/me"
-            response = requests.get(url, params=self.auth_params, timeout=10)
+            response = self.session.get(url, params=self.auth_params)
             response.raise_for_status()
             logger.info(f"Conexão com Trello estabelecida: {response.json().get('username')}")
             return True
@@ -40,7 +42,7 @@ class TrelloClient:
             
         try:
             url = f"{self.base_url}/boards/{self.board_id}/lists"
-            response = requests.get(url, params=self.auth_params, timeout=10)
+            response = self.session.get(url, params=self.auth_params)
             response.raise_for_status()
             return response.json()
         except Exception as e:
@@ -59,7 +61,7 @@ class TrelloClient:
                 "desc": description,
                 "pos": "top"
             }
-            response = requests.post(url, params=params, timeout=10)
+            response = self.session.post(url, params=params)
             response.raise_for_status()
             card_id = response.json().get("id")
             logger.debug(f"Card criado no Trello: {card_id} ({name})")
@@ -77,7 +79,7 @@ class TrelloClient:
                 **self.auth_params,
                 "idList": list_id
             }
-            response = requests.put(url, params=params, timeout=10)
+            response = self.session.put(url, params=params)
             response.raise_for_status()
             logger.debug(f"Card {card_id} movido para lista {list_id}")
             return True
@@ -93,7 +95,7 @@ class TrelloClient:
                 **self.auth_params,
                 "text": comment
             }
-            response = requests.post(url, params=params, timeout=10)
+            response = self.session.post(url, params=params)
             response.raise_for_status()
             return True
         except Exception as e:
@@ -108,7 +110,7 @@ class TrelloClient:
                 **self.auth_params,
                 "closed": "true"
             }
-            response = requests.put(url, params=params, timeout=10)
+            response = self.session.put(url, params=params)
             response.raise_for_status()
             logger.debug(f"Card {card_id} arquivado.")
             return True
@@ -136,7 +138,7 @@ class TrelloClient:
                 "card_fields": "id,name,desc,idList,shortUrl",
                 "cards_limit": 1
             }
-            response = requests.get(url, params=params, timeout=10)
+            response = self.session.get(url, params=params)
             response.raise_for_status()
             data = response.json()
             cards = data.get("cards", [])
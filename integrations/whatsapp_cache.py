@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from config.settings import (
+    WHATSAPP_CACHE_ENABLED,
+    WHATSAPP_CACHE_PATH,
+    WHATSAPP_CACHE_TTL_DAYS,
+    WHATSAPP_CACHE_NEGATIVE_TTL_DAYS
+)
+from utils.local_store import LocalStore
+from utils.logger import logger
+
+class WhatsAppNumberCache(LocalStore):
+    """
+    Cache persistente do resultado de /chat/whatsappNumbers: telefone -> (existe, jid).
+    Positivos e negativos têm TTLs próprios. Só recebe respostas efetivas da API;
+    erros de verificação nunca são gravados (o número é verificado de novo na próxima vez).
+    """
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS whatsapp_numbers (
+        phone TEXT PRIMARY KEY,
+        exists_on_whatsapp INTEGER NOT NULL,
+        jid TEXT,
+        checked_at TEXT NOT NULL
+    );
+    """
+
+    def __init__(
+        self,
+        path: str = ":memory:",
+        ttl_days: float = WHATSAPP_CACHE_TTL_DAYS,
+        negative_ttl_days: float = WHATSAPP_CACHE_NEGATIVE_TTL_DAYS
+    ):
+        super().__init__(path)
+        self.ttl = timedelta(days=ttl_days)
+        self.negative_ttl = timedelta(days=negative_ttl_days)
+
+    def get(self, phone: str) -> Optional[Tuple[bool, Optional[str]]]:
+        """Retorna (existe, jid) se houver verificação válida, senão None."""
+        return self.get_many([phone]).get(phone)
+
+    def get_many(self, phones: List[str], chunk_size: int = 500) -> Dict[str, Tuple[bool, Optional[str]]]:
+        """Consulta vários telefones. Entradas vencidas contam como ausentes."""
+        now = datetime.utcnow()
+        positive_since = (now - self.ttl).isoformat()
+        negative_since = (now - self.negative_ttl).isoformat()
+        unique_phones = list(dict.fromkeys(p for p in phones if p))
+
+        found = {}
+        for start in range(0, len(unique_phones), chunk_size):
+            chunk = unique_phones[start:start + chunk_size]
+            placeholders = ", ".join("?" for _ in chunk)
+            rows = self.query(
+                f"SELECT phone, exists_on_whatsapp, jid FROM whatsapp_numbers "
+                f"WHERE phone IN ({placeholders}) "
+                f"AND checked_at >= CASE WHEN exists_on_whatsapp THEN ? ELSE ? END",
+                [*chunk, positive_since, negative_since]
+            )
+            for row in rows:
+                found[row["phone"]] = (bool(row["exists_on_whatsapp"]), row["jid"])
+        return found
+
+    def set_many(self, results: Dict[str, Tuple[bool, Optional[str]]]):
+        """Grava respostas da API (nunca chamar com resultados de erro)."""
+        if not results:
+            return
+        checked_at = datetime.utcnow().isoformat()
+        self.executemany(
+            "INSERT OR REPLACE INTO whatsapp_numbers (phone, exists_on_whatsapp, jid, checked_at) VALUES (?, ?, ?, ?)",
+            [(phone, int(exists), jid, checked_at) for phone, (exists, jid) in results.items()]
+        )
+
+    def purge_expired(self) -> int:
+        """Remove entradas vencidas. Retorna quantas foram removidas."""
+        now = datetime.utcnow()
+        return self.execute(
+            "DELETE FROM whatsapp_numbers WHERE checked_at < CASE WHEN exists_on_whatsapp THEN ? ELSE ? END",
+            ((now - self.ttl).isoformat(), (now - self.negative_ttl).isoformat())
+        )
+
+# Instância global
+whatsapp_cache = None
+if WHATSAPP_CACHE_ENABLED:
+    try:
+        whatsapp_cache = WhatsAppNumberCache(WHATSAPP_CACHE_PATH)
+    except Exception as e:
+        logger.warning(f"Não foi possível abrir o cache de números WhatsApp: {e}")
@@ -1,28 +1,57 @@
 
+import argparse
 import sys
 from pathlib import Path
 
 # Adiciona o diretório raiz ao PYTHONPATH
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 
+from config.settings import IMPORT_HISTORY_WORKERS, IMPORT_LLM_WORKERS, IMPORT_WRITE_BATCH_SIZE
 from services.import_chatwoot import chatwoot_importer
+from services.llm_client import StubLLMClient
 from utils.logger import setup_logger, logger
 
 def main():
+    parser = argparse.ArgumentParser(description="Importa e classifica com IA os contatos do Chatwoot.")
+    parser.add_argument("--stub-llm", action="store_true", help="Usa um LLM simulado local (sem OpenAI) para medir o pipeline.")
+    parser.add_argument("--stub-latency", type=float, default=0.5, help="Latência simulada por chamada do LLM stub (segundos).")
+    parser.add_argument("--history-workers", type=int, default=IMPORT_HISTORY_WORKERS, help="Threads buscando histórico no Chatwoot.")
+    parser.add_argument("--llm-workers", type=int, default=IMPORT_LLM_WORKERS, help="Threads de análise no LLM.")
+    parser.add_argument("--incremental", action="store_true", help="Processa só contatos com atividade desde a última importação concluída (para execuções agendadas).")
+    parser.add_argument("--restart", action="store_true", help="Ignora o checkpoint de uma execução interrompida e começa da página 1.")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_WRITE_BATCH_SIZE, help="Leads por lote de escrita no banco.")
+    args = parser.parse_args()
+
     setup_logger("chatwoot_importer")
     logger.info("=== Iniciando Importação Inteligente do Chatwoot ===")
+
+    if chatwoot_importer is None:
+        logger.critical("Importador indisponível: verifique as credenciais do Chatwoot.")
+        return
+
+    if args.stub_llm:
+        chatwoot_importer._llm = StubLLMClient(latency_seconds=args.stub_latency)
     
     try:
-        stats = chatwoot_importer.import_existing_leads()
+        stats = chatwoot_importer.import_existing_leads(
+            history_workers=args.history_workers,
+            llm_workers=args.llm_workers,
+            write_batch_size=args.batch_size,
+            incremental=args.incremental,
+            resume=not args.restart
+        )
         
         logger.info("=== Relatório Final ===")
         logger.info(f"Leads Importados (Novos): {stats['imported']}")
         logger.info(f"Leads Atualizados (Existentes): {stats['updated']}")
-        logger.info(f"Erros/Ignorados: {stats['ignored']}")
+        logger.info(f"Já Atualizados (sem mudança): {stats['unchanged']}")
+        logger.info(f"Erros/Ignorados (reprocessados na próxima execução): {stats['ignored']}")
+        logger.info(f"Pré-classificados (sem LLM): {stats['preclassified']}")
+        logger.info(f"Análises do Cache: {stats['cache_hits']} (LLM chamado: {stats['cache_misses']})")
         logger.info("=======================")
         
     except KeyboardInterrupt:
-        logger.info("Operação interrompida pelo usuário.")
+        logger.info("Operação interrompida pelo usuário. A próxima execução retoma do checkpoint.")
     except Exception as e:
         logger.critical(f"Erro fatal na importação: {e}")
 
@@ -7,6 +7,7 @@ from pathlib import Path
 # Adiciona o diretório raiz ao PYTHONPATH
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 
+from config.settings import IMPORT_CSV_CHUNK_SIZE, IMPORT_CSV_WORKERS
 from services.lead_service import lead_service
 from utils.logger import setup_logger
 
@@ -15,24 +16,39 @@ logger = setup_logger("import_script")
 def main():
     parser = argparse.ArgumentParser(description="Importa leads de um arquivo CSV para o Supabase.")
     parser.add_argument("--file", required=True, help="Caminho para o arquivo CSV de leads.")
+    parser.add_argument("--dry-run", action="store_true", help="Valida e deduplica sem gravar; gera o relatório de rejeições.")
+    parser.add_argument("--report", help="Arquivo CSV de rejeições (padrão em dry-run: <arquivo>.rejeitados.csv).")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CSV_CHUNK_SIZE, help="Linhas por bloco de validação/gravação.")
+    parser.add_argument("--workers", type=int, default=IMPORT_CSV_WORKERS, help="Processos de validação (1 = no próprio processo).")
     
     args = parser.parse_args()
     filepath = args.file
+    report_path = args.report
+    if args.dry_run and not report_path:
+        report_path = str(Path(filepath).with_suffix(".rejeitados.csv"))
     
     if not os.path.exists(filepath):
         print(f"Erro: Arquivo não encontrado: {filepath}")
         return
 
-    print(f"Iniciando importação de: {filepath}...")
+    print(f"Iniciando {'simulação de ' if args.dry_run else ''}importação de: {filepath}...")
     
     try:
-        stats = lead_service.import_from_csv(filepath)
+        stats = lead_service.import_from_csv(
+            filepath,
+            dry_run=args.dry_run,
+            report_path=report_path,
+            chunk_size=args.chunk_size,
+            workers=args.workers
+        )
         
         print("\n--- Relatório de Importação ---")
         print(f"Total processado: {stats['total']}")
-        print(f"Importados com sucesso: {stats['imported']}")
+        print(f"{'Seriam importados' if args.dry_run else 'Importados com sucesso'}: {stats['imported']}")
         print(f"Ignorados (inválidos/duplicados): {stats['skipped']}")
         print(f"Erros: {stats['errors']}")
+        if report_path:
+            print(f"Rejeições: {report_path}")
         print("-------------------------------")
         
     except Exception as e:
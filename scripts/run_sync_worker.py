@@ -0,0 +1,22 @@
+import sys
+from pathlib import Path
+
+# Adiciona o diretório raiz ao PYTHONPATH
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from services.sync_worker import sync_worker
+from utils.logger import logger
+
+def main():
+    """
+    Worker dedicado da fila de sync (Trello etc.).
+    Opcional: o scheduler já processa um lote por minuto; use este processo
+    quando o volume de tarefas exigir consumo contínuo.
+    """
+    try:
+        sync_worker.run_forever()
+    except KeyboardInterrupt:
+        logger.info("Worker da fila de sync interrompido pelo usuário.")
+
+if __name__ == "__main__":
+    main()
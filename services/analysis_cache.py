@@ -0,0 +1,54 @@
+import hashlib
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from config.settings import IMPORT_ANALYSIS_CACHE_ENABLED, IMPORT_ANALYSIS_CACHE_PATH
+from utils.local_store import LocalStore
+from utils.logger import logger
+
+def history_key(history: List[Dict[str, Any]], prompt_version: str, model: str) -> str:
+    """
+    Hash do histórico normalizado (remetente + texto sem espaços extras, na ordem)
+    junto da versão do prompt e do modelo. Mudou qualquer um, muda a chave.
+    """
+    messages = [
+        [msg.get("sender_type") or "", " ".join(str(msg.get("content") or "").split())]
+        for msg in history
+    ]
+    raw = json.dumps([prompt_version, model, messages], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class AnalysisCache(LocalStore):
+    """
+    Cache persistente da análise LLM de conversas: hash do conteúdo -> status e resumo.
+    Reimportações só pagam pelas conversas que mudaram desde a última execução.
+    """
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS analyses (
+        key TEXT PRIMARY KEY,
+        status TEXT NOT NULL,
+        summary TEXT,
+        created_at TEXT NOT NULL
+    );
+    """
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        rows = self.query("SELECT status, summary FROM analyses WHERE key = ?", (key,))
+        return rows[0] if rows else None
+
+    def set(self, key: str, analysis: Dict[str, Any]):
+        self.execute(
+            "INSERT OR REPLACE INTO analyses (key, status, summary, created_at) VALUES (?, ?, ?, ?)",
+            (key, analysis["status"], analysis.get("summary"), datetime.utcnow().isoformat())
+        )
+
+    def __len__(self) -> int:
+        return self.query("SELECT COUNT(*) AS n FROM analyses")[0]["n"]
+
+# Instância global
+analysis_cache = None
+if IMPORT_ANALYSIS_CACHE_ENABLED:
+    try:
+        analysis_cache = AnalysisCache(IMPORT_ANALYSIS_CACHE_PATH)
+    except Exception as e:
+        logger.warning(f"Não foi possível abrir o cache de análises: {e}")
@@ -0,0 +1,156 @@
+from datetime import datetime
+from typing import Any, Dict, Optional
+from config.keywords import DECLINE_KEYWORDS
+from integrations.chatwoot import chatwoot
+from integrations.supabase_client import supabase
+from services.lead_service import lead_service
+from services.trello_service import trello_service
+from utils.keyword_matcher import KeywordMatcher
+from utils.logger import logger
+from utils.validators import normalize_phone
+
+# Status em que o lead ainda está no fluxo automático (o bot pode enviar mensagens)
+AUTOMATED_STATUSES = ("new", "contacted", "follow_up_scheduled")
+
+class ChatwootEventService:
+    """
+    Processa os webhooks do Chatwoot e mantém o estado local atualizado:
+    índice de contatos, estado das conversas e status dos leads.
+    Todas as escritas são por chave indexada (telefone, contact_id, conversation_id, lead id).
+    """
+
+    def __init__(self):
+        self.chatwoot = chatwoot
+        self.db = supabase
+        self.lead_service = lead_service
+        self.decline_matcher = KeywordMatcher(DECLINE_KEYWORDS)
+
+    @property
+    def index(self):
+        return self.chatwoot.contact_index if self.chatwoot else None
+
+    def handle(self, event: Dict[str, Any]) -> str:
+        """Despacha o evento. Retorna o resultado ('processed' ou 'ignored')."""
+        handlers = {
+            "contact_created": self.on_contact_changed,
+            "contact_updated": self.on_contact_changed,
+            "message_created": self.on_message_created,
+            "conversation_status_changed": self.on_conversation_status_changed,
+        }
+        handler = handlers.get(event.get("event"))
+        if not handler:
+            return "ignored"
+        handler(event)
+        return "processed"
+
+    def on_contact_changed(self, contact: Dict[str, Any]):
+        """contact_created / contact_updated: o payload é o próprio contato."""
+        if self.index is not None:
+            self.index.upsert_contacts([contact])
+
+        lead = self._find_lead(contact.get("phone_number"))
+        if lead and contact.get("id") and lead.get("chatwoot_id") != contact["id"]:
+            self.db.update_lead(lead["id"], {"chatwoot_id": contact["id"]})
+
+    def on_message_created(self, event: Dict[str, Any]):
+        """Registra a mensagem no estado da conversa e detecta recusas do contato."""
+        if event.get("private"):
+            return
+
+        conversation = event.get("conversation") or {}
+        sender = self._contact_of(conversation) or {}
+        contact_id = sender.get("id")
+        conversation_id = conversation.get("id")
+        incoming = event.get("message_type") == "incoming"
+        at = self._timestamp(event.get("created_at"))
+
+        if self.index is not None and sender.get("phone_number"):
+            self.index.upsert_contacts([sender])
+
+        rule = self.decline_matcher.match(event.get("content") or "") if incoming else None
+
+        if self.index is not None and conversation_id:
+            self.index.record_conversation(
+                conversation_id,
+                contact_id,
+                status=conversation.get("status"),
+                last_incoming_at=at if incoming else None,
+                last_outgoing_at=None if incoming else at,
+                declined_keyword=rule.keyword if rule else None
+            )
+
+        if rule:
+            lead = self._find_lead(sender.get("phone_number"))
+            # mark_as_declined é condicional no banco: o status do cache pode estar defasado
+            if lead and lead.get("status") != "declined" and self.lead_service.mark_as_declined(lead["id"]):
+                trello_service.enqueue("lead_declined", lead, reason=f"Recusa no Chatwoot: '{rule.keyword}'")
+                logger.info(f"Lead {lead.get('phone')} marcado como recusado (Chatwoot: '{rule.keyword}').")
+
+    def on_conversation_status_changed(self, event: Dict[str, Any]):
+        """
+        Grava o estado da conversa e, se um atendente humano causou a mudança, tira o
+        lead do fluxo automático (handover), para o bot não abordar quem já está com um humano.
+        Mudanças sem humano envolvido (auto-resolve por inatividade, reabertura pela
+        mensagem do próprio bot) mantêm o lead no fluxo.
+        """
+        contact = self._contact_of(event) or {}
+        status = event.get("status") # 'resolved', 'open', etc
+        logger.info(f"Evento Chatwoot: status da conversa com {contact.get('phone_number', '')} mudou para {status}")
+
+        if self.index is not None and event.get("id"):
+            self.index.record_conversation(event["id"], contact.get("id"), status=status)
+
+        agent = self._human_agent(event, status)
+        if not agent:
+            return
+
+        lead = self._find_lead(contact.get("phone_number"))
+        if lead and lead.get("status") in AUTOMATED_STATUSES and self.db.update_lead(lead["id"], {
+            "status": "interacted_externally",
+            "chatwoot_id": contact.get("id") or lead.get("chatwoot_id")
+        }, only_status=AUTOMATED_STATUSES):
+            logger.info(
+                f"Lead {lead.get('phone')} em atendimento humano no Chatwoot "
+                f"({status}, {agent.get('name') or agent.get('id')}). Fluxo automático encerrado."
+            )
+
+    @staticmethod
+    def _human_agent(event: Dict[str, Any], status: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Atendente humano responsável pela mudança de status, ou None.
+        Usa o autor da mudança quando o payload o traz (performer); senão, só uma
+        conversa aberta com atendente atribuído conta como atendimento humano.
+        Bots (agent_bot) nunca contam.
+        """
+        performer = event.get("performer") or {}
+        if performer:
+            return performer if performer.get("type", "user").lower() == "user" else None
+
+        assignee = (event.get("meta") or {}).get("assignee") or {}
+        if status == "open" and assignee.get("id") and (assignee.get("type") or "user").lower() == "user":
+            return assignee
+        return None
+
+    def _find_lead(self, phone: Optional[str]):
+        phone = normalize_phone(phone)
+        return self.db.find_lead_by_phone(phone) if phone and self.db else None
+
+    @staticmethod
+    def _contact_of(payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Contato da conversa (meta.sender), com contact_inbox como fallback para o id."""
+        contact = dict((payload.get("meta") or {}).get("sender") or {})
+        if not contact.get("id"):
+            contact_id = (payload.get("contact_inbox") or {}).get("contact_id")
+            if contact_id:
+                contact["id"] = contact_id
+        return contact or None
+
+    @staticmethod
+    def _timestamp(value: Any) -> str:
+        """created_at do Chatwoot vem como epoch (int) ou ISO; normaliza para ISO."""
+        if isinstance(value, (int, float)):
+            return datetime.utcfromtimestamp(value).isoformat()
+        return value or datetime.utcnow().isoformat()
+
+# Instância global
+chatwoot_events = ChatwootEventService()
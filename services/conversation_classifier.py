@@ -0,0 +1,69 @@
+import time
+from typing import Any, Dict, List, NamedTuple, Optional
+from config.keywords import DECLINE_KEYWORDS
+from config.settings import IMPORT_STALE_DAYS, IMPORT_PRECLASSIFY_MIN_CONFIDENCE
+from utils.keyword_matcher import KeywordMatcher
+
+class PreClassification(NamedTuple):
+    """Classificação local de uma conversa, com a regra que decidiu e sua confiança (0-1)."""
+    status: str
+    summary: str
+    confidence: float
+    rule: str
+
+class ConversationPreClassifier:
+    """
+    Classificador determinístico para conversas óbvias, antes do LLM.
+
+    Regras, na ordem:
+    - recusa: mensagem do contato com palavra-chave de recusa (config/keywords.py);
+      confiança menor se o contato voltou a escrever depois dela.
+    - sem_resposta: só mensagens nossas; fria se a última for antiga.
+    - antiga: última mensagem há mais de `stale_days`.
+    Resultados abaixo de `min_confidence` ficam para o LLM.
+    """
+
+    def __init__(self, stale_days: float = IMPORT_STALE_DAYS, min_confidence: float = IMPORT_PRECLASSIFY_MIN_CONFIDENCE):
+        self.stale_seconds = stale_days * 86400
+        self.min_confidence = min_confidence
+        self.decline_matcher = KeywordMatcher(DECLINE_KEYWORDS)
+
+    def classify(self, history: List[Dict[str, Any]], now: Optional[float] = None) -> Optional[PreClassification]:
+        """
+        Classifica um histórico (mais recente primeiro, como get_conversation_history).
+        Retorna None quando a conversa é ambígua e precisa do LLM.
+        """
+        if not history:
+            return None
+
+        result = self._evaluate(history, now or time.time())
+        if result and result.confidence >= self.min_confidence:
+            return result
+        return None
+
+    def _evaluate(self, history: List[Dict[str, Any]], now: float) -> Optional[PreClassification]:
+        inbound = [m for m in history if m.get("sender_type") == "Contact"]
+        last_at = history[0].get("created_at")
+        stale = bool(last_at) and now - last_at > self.stale_seconds
+
+        for position, msg in enumerate(inbound):
+            rule = self.decline_matcher.match(msg.get("content") or "")
+            if rule:
+                # Recusa na última mensagem do contato é conclusiva; seguida de outras, nem tanto
+                confidence = 0.95 if position == 0 else 0.6
+                return PreClassification("recusou", f"Contato recusou ('{rule.keyword}').", confidence, "recusa")
+
+        if not inbound:
+            if stale:
+                return PreClassification(
+                    "conversa_fria", f"{len(history)} mensagem(ns) nossa(s) sem resposta, a última há muito tempo.", 0.95, "sem_resposta"
+                )
+            confidence = 0.95 if len(history) == 1 else 0.85
+            return PreClassification(
+                "aguardando_resposta", f"{len(history)} mensagem(ns) nossa(s), ainda sem resposta do contato.", confidence, "sem_resposta"
+            )
+
+        if stale:
+            return PreClassification("conversa_fria", "Sem interação há muitos meses.", 0.85, "antiga")
+
+        return None
@@ -1,11 +1,11 @@
 
-import requests
 from typing import List, Dict, Any
 from serpapi import GoogleSearch
-from config.settings import SERPAPI_KEY, SERPAPI_ENABLED
+from config.settings import SERPAPI_KEY, SERPAPI_ENABLED, SERPAPI_HTTP_TIMEOUT
 from integrations.supabase_client import supabase
 from integrations.chatwoot import chatwoot
 from integrations.evolution import evolution
+from utils.http import get_session
 from utils.logger import logger
 from utils.validators import normalize_phone
 
@@ -13,6 +13,7 @@ class GoogleMapsSearcher:
     def __init__(self):
         if not SERPAPI_KEY:
             raise ValueError("SERPAPI_KEY não configurada.")
+        self.session = get_session("serpapi", timeout=SERPAPI_HTTP_TIMEOUT)
 
     def search_businesses(self, query: str, city: str, limit: int = 20) -> List[Dict[str, Any]]:
         """
@@ -35,9 +36,8 @@ class GoogleMapsSearcher:
         }
 
         try:
-            # Usando requests direto como no exemplo do user, ou a lib oficial se preferir
-            # O exemplo do user usava requests, vamos usar requests para garantir compatibilidade
-            response = requests.get("https://serpapi.com/search", params=params, timeout=30)
+            # Usando requests direto (session compartilhada) em vez da lib oficial
+            response = self.session.get("https://serpapi.com/search", params=params)
             response.raise_for_status()
             
             data = response.json()
@@ -79,21 +79,27 @@ class GoogleMapsSearcher:
         }
         
         logger.info("Iniciando validação e salvamento...")
-        
+
+        # 1. Filtra sem telefone e normaliza
+        candidates = []
         for item in results:
             raw_phone = item.get("phone")
-            
-            # 1. Filtra sem telefone
             if not raw_phone:
                 continue
-            
+            candidates.append((item, normalize_phone(raw_phone)))
+        stats["com_telefone"] = len(candidates)
+
+        # 2. Check Duplicidade Supabase (uma consulta em lote para todos os resultados)
+        try:
+            existing = supabase.get_leads_by_phones([phone for _, phone in candidates])
+        except Exception as e:
+            logger.error(f"Erro ao verificar duplicidade no Supabase: {e}")
+            return stats
+
+        new_candidates = []
+        for item, phone in candidates:
             try:
-                # Normaliza
-                phone = normalize_phone(raw_phone)
-                stats["com_telefone"] += 1
-                
-                # 2. Check Duplicidade Supabase
-                if supabase.get_lead_by_phone(phone):
+                if phone in existing:
                     logger.debug(f"Duplicado no Supabase: {phone}")
                     stats["duplicados"] += 1
                     continue
@@ -103,17 +109,26 @@ class GoogleMapsSearcher:
                      logger.debug(f"Duplicado no Chatwoot: {phone}")
                      stats["duplicados"] += 1
                      continue
-                
-                # 4. Valida WhatsApp (Evolution)
-                is_whatsapp = False
-                
+
+                new_candidates.append((item, phone))
+            except Exception as e:
+                logger.error(f"Erro ao processar item {item.get('name')}: {e}")
+
+        # 4. Valida WhatsApp (Evolution) — uma requisição por bloco de números
+        whatsapp = {}
+        if not skip_validation and evolution and new_candidates:
+            whatsapp = evolution.check_numbers_exist([phone for _, phone in new_candidates])
+
+        to_save = []
+        for item, phone in new_candidates:
+            try:
                 if skip_validation:
                      # Se pulou validação, assumimos que é válido (ou pelo menos tentaremos salvar)
                      is_whatsapp = True
                      logger.debug(f"PULANDO validação de WhatsApp para: {phone}")
-                elif evolution:
-                    # check_number_exists pode ser lento, cuidado com rate limit em loops grandes
-                    is_whatsapp = evolution.check_number_exists(phone)
+                else:
+                    # Bloco com falha fica fora do resultado: fail safe, não salva
+                    is_whatsapp = whatsapp.get(phone, (False, None))[0]
                 
                 if not is_whatsapp:
                     logger.debug(f"Não é WhatsApp (ou falha valid.): {phone}")
@@ -122,22 +137,36 @@ class GoogleMapsSearcher:
                 if not skip_validation: # Só conta como 'com_whatsapp' se foi validado
                     stats["com_whatsapp"] += 1
                 
-                # 5. Salva (Criar Lead)
-                lead_data = {
+                to_save.append({
                     "name": item["name"],
                     "phone": phone,
                     "status": "new",
                     "source": "google_maps",
                     "notes": f"Rating: {item.get('rating')} ({item.get('reviews')} reviews). Address: {item.get('address')}",
                     # Campos extras podem ir em 'metadata' se existir coluna JSONB, ou concatenados nas notas
-                }
-                
-                supabase.create_lead(lead_data)
-                stats["salvos"] += 1
-                logger.info(f"Lead salvo: {item['name']} ({phone})")
+                })
                 
             except Exception as e:
                 logger.error(f"Erro ao processar item {item.get('name')}: {e}")
+
+        # 5. Salva (Criar Leads em lote)
+        if not to_save:
+            return stats
+
+        try:
+            outcomes = supabase.bulk_upsert_leads(to_save)
+        except Exception as e:
+            logger.error(f"Erro ao salvar leads em lote: {e}")
+            return stats
+
+        for lead_data, outcome in zip(to_save, outcomes):
+            if outcome["status"] == "created":
+                stats["salvos"] += 1
+                logger.info(f"Lead salvo: {lead_data['name']} ({lead_data['phone']})")
+            elif outcome["status"] == "error":
+                logger.error(f"Erro ao salvar lead {lead_data['name']}: {outcome['error']}")
+            else:
+                stats["duplicados"] += 1
                 
         return stats
 
@@ -1,63 +1,221 @@
-
-import openai
-from typing import List, Dict, Any, Optional
-from config.settings import OPENAI_API_KEY
+import threading
+from datetime import datetime
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from config.settings import (
+    IMPORT_LLM_RPM,
+    IMPORT_LLM_TPM,
+    IMPORT_HISTORY_WORKERS,
+    IMPORT_LLM_WORKERS,
+    IMPORT_WRITE_BATCH_SIZE,
+    IMPORT_PROGRESS_SECONDS,
+    IMPORT_PRECLASSIFY_ENABLED
+)
 from integrations.chatwoot import chatwoot
 from integrations.supabase_client import supabase
+from integrations.models import LEAD_NOTES_VIEW
+from services.analysis_cache import analysis_cache, history_key
+from services.conversation_classifier import ConversationPreClassifier
+from services.import_checkpoint import import_checkpoint
+from services.llm_client import create_llm_client
 from utils.logger import logger
+from utils.pipeline import Pipeline, Stage
+from utils.rate_limiter import RateLimiter
 from utils.validators import normalize_phone
 
+# Incrementar ao mudar SYSTEM_PROMPT, _build_prompt ou _parse_analysis (invalida o cache de análises)
+PROMPT_VERSION = "1"
+SYSTEM_PROMPT = "Você é um analista de CRM experiente."
+VALID_AI_STATUSES = ["aguardando_resposta", "aguardando_followup", "conversa_fria", "recusou", "interessado"]
+ANALYSIS_MAX_TOKENS = 200
+
+# Mapeamento de status da IA para o nosso DB
+# DB Status: new, working, contacted, follow_up_scheduled, converted, lost
+AI_TO_DB_STATUS = {
+    "aguardando_resposta": "contacted",
+    "aguardando_followup": "working",  # ou follow_up_scheduled
+    "conversa_fria": "lost",  # ou new para tentar reativar
+    "recusou": "lost",
+    "interessado": "working"
+}
+
 class ChatwootImporter:
-    def __init__(self):
-        if not OPENAI_API_KEY:
-            raise ValueError("OPENAI_API_KEY não configurada.")
+    """
+    Importa contatos do Chatwoot como leads, classificando cada conversa com IA.
+
+    O processamento é um pipeline em etapas com pool próprio por etapa
+    (histórico no Chatwoot -> análise LLM limitada por RPM/TPM), e as escritas
+    no banco são feitas em lotes pelo consumidor.
+    """
+
+    def __init__(
+        self,
+        llm=None,
+        rate_limiter: Optional[RateLimiter] = None,
+        cache=analysis_cache,
+        checkpoint=import_checkpoint,
+        preclassifier: Optional[ConversationPreClassifier] = None
+    ):
         if not chatwoot:
             raise ValueError("Integração Chatwoot não disponível.")
-        
-        self.client = openai.OpenAI(api_key=OPENAI_API_KEY)
+
+        self.chatwoot = chatwoot
+        self.db = supabase
+        self._llm = llm
+        self.rate_limiter = rate_limiter or RateLimiter(IMPORT_LLM_RPM, IMPORT_LLM_TPM)
+        self.cache = cache
+        self.checkpoint = checkpoint
+        if preclassifier is None and IMPORT_PRECLASSIFY_ENABLED:
+            preclassifier = ConversationPreClassifier()
+        self.preclassifier = preclassifier
+        self.preclassified: Dict[str, int] = {}
+        self.cache_stats = {"hits": 0, "misses": 0}
+        self._stats_lock = threading.Lock()
+
+    @property
+    def llm(self):
+        """Cliente LLM (criado sob demanda conforme IMPORT_LLM_BACKEND)."""
+        if self._llm is None:
+            self._llm = create_llm_client()
+        return self._llm
+
+    def iter_chatwoot_contacts(self) -> Iterator[Dict[str, Any]]:
+        """
+        Gera os contatos do Chatwoot que têm telefone, à medida que as páginas chegam
+        (próximas páginas buscadas em paralelo enquanto a atual é processada).
+        """
+        logger.info("Iniciando busca de contatos no Chatwoot...")
+
+        for c in self.chatwoot.iter_contacts():
+            if c.get("phone_number"):
+                yield self._contact_item(c)
+
+    def _contact_item(self, c: Dict[str, Any], page: Optional[int] = None) -> Dict[str, Any]:
+        return {
+            "contact_id": c.get("id"),
+            "name": c.get("name"),
+            "phone": c.get("phone_number"),
+            "last_activity_at": c.get("last_activity_at"),
+            "page": page
+        }
+
+    def _iter_run_contacts(self, run: Dict[str, Any], pages: "_PageTracker") -> Iterator[Dict[str, Any]]:
+        """
+        Contatos da execução: primeiro os que falharam em execuções anteriores, depois
+        as páginas a partir da seguinte ao checkpoint. No modo incremental para no
+        primeiro contato sem atividade desde o watermark (ordem -last_activity_at).
+        """
+        retries = self.checkpoint.load_retries() if self.checkpoint is not None else []
+        if retries:
+            logger.info(f"Reprocessando {len(retries)} contatos que falharam em execuções anteriores.")
+        retry_ids = {c["contact_id"] for c in retries}
+        for contact in retries:
+            yield {**contact, "page": None}
+
+        since = run["since"]
+        # A ordem muda com atividade nova: a página retomada pode repetir contatos
+        # da última página gravada, até o último contato salvo no checkpoint
+        skip_until = run["last_contact_id"]
+        for page, contacts in self.chatwoot.iter_contact_pages(start_page=run["page"] + 1):
+            if skip_until is not None:
+                ids = [c.get("id") for c in contacts]
+                if skip_until in ids:
+                    contacts = contacts[ids.index(skip_until) + 1:]
+                skip_until = None
+
+            selected = []
+            reached_watermark = False
+            for c in contacts:
+                activity = int(c.get("last_activity_at") or 0)
+                if since and activity <= since:
+                    reached_watermark = True
+                    break
+                run["max_activity"] = max(run["max_activity"], activity)
+                if c.get("phone_number") and c.get("id") not in retry_ids:
+                    selected.append(self._contact_item(c, page))
+
+            pages.open(page, len(selected), contacts[-1].get("id") if contacts else run["last_contact_id"])
+            yield from selected
+            if reached_watermark:
+                return
 
     def list_all_chatwoot_contacts(self) -> List[Dict[str, Any]]:
         """
         Busca todos os contatos do Chatwoot que têm telefone.
         Percorre todas as páginas até acabar.
         """
-        all_contacts = []
-        page = 1
-        
-        logger.info("Iniciando busca de contatos no Chatwoot...")
-        
-        while True:
-            contacts = chatwoot.get_all_contacts(page=page)
-            if not contacts:
-                break
-                
-            for c in contacts:
-                phone = c.get("phone_number")
-                if phone:
-                    all_contacts.append({
-                        "contact_id": c.get("id"),
-                        "name": c.get("name"),
-                        "phone": phone,
-                        "last_activity_at": c.get("last_activity_at")
-                    })
-            
-            logger.info(f"Página {page} processada. Total acumulado: {len(all_contacts)}")
-            page += 1
-            
-        return all_contacts
+        return list(self.iter_chatwoot_contacts())
 
     def get_conversation_summary(self, contact_id: int) -> Dict[str, Any]:
         """
         Busca mensagens e usa IA para gerar resumo e status.
         """
-        history = chatwoot.get_conversation_history(contact_id)
-        
+        return self.analyze_history(self.chatwoot.get_conversation_history(contact_id), contact_id)
+
+    def analyze_history(self, history: List[Dict[str, Any]], contact_id: Any = None) -> Dict[str, Any]:
+        """
+        Classifica um histórico já carregado (respeitando o limite de RPM/TPM).
+        Conversas óbvias são resolvidas pelo pré-classificador local e as já analisadas
+        com o mesmo conteúdo e versão de prompt vêm do cache.
+        """
         if not history:
             return {
                 "summary": "Sem histórico de mensagens.",
                 "status": "new" 
             }
 
+        if self.preclassifier is not None:
+            result = self.preclassifier.classify(history)
+            if result:
+                self._count_preclassified(result.rule)
+                return {"status": result.status, "summary": f"{result.summary} (pré-classificação, confiança {result.confidence:.2f})"}
+
+        key = None
+        if self.cache is not None:
+            key = history_key(history, PROMPT_VERSION, self.llm.model)
+            cached = self._cache_get(key)
+            self._count_cache("hits" if cached else "misses")
+            if cached:
+                return cached
+
+        prompt = self._build_prompt(history)
+
+        try:
+            # Estimativa grosseira (~4 caracteres por token) + resposta máxima
+            self.rate_limiter.acquire(len(SYSTEM_PROMPT + prompt) // 4 + ANALYSIS_MAX_TOKENS)
+            response = self.llm.complete(SYSTEM_PROMPT, prompt, max_tokens=ANALYSIS_MAX_TOKENS)
+            analysis = self._parse_analysis(response.text)
+
+        except Exception as e:
+            logger.error(f"Erro na análise de IA para contato {contact_id}: {e}")
+            return {"status": "manual_review", "summary": "Falha na análise automática."}
+
+        # Resposta fora do formato não é cacheada: tenta de novo na próxima importação
+        if key and analysis["status"] != "manual_review":
+            self._cache_set(key, analysis)
+        return analysis
+
+    def _cache_get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            return self.cache.get(key)
+        except Exception as e:
+            logger.warning(f"Erro ao ler cache de análises: {e}")
+            return None
+
+    def _cache_set(self, key: str, analysis: Dict[str, Any]):
+        try:
+            self.cache.set(key, analysis)
+        except Exception as e:
+            logger.warning(f"Erro ao gravar cache de análises: {e}")
+
+    def _count_cache(self, outcome: str):
+        with self._stats_lock:
+            self.cache_stats[outcome] += 1
+
+    def _count_preclassified(self, rule: str):
+        with self._stats_lock:
+            self.preclassified[rule] = self.preclassified.get(rule, 0) + 1
+
+    def _build_prompt(self, history: List[Dict[str, Any]]) -> str:
         # Formata para o prompt
         messages_text = ""
         for msg in history: # já está ordenado do mais recente, vamos reverter para cronológico no prompt se preciso
@@ -65,7 +223,7 @@ class ChatwootImporter:
             content = msg['content']
             messages_text += f"{role}: {content}\n"
 
-        prompt = f"""
+        return f"""
         Analise a seguinte conversa entre nossa empresa e um lead.
         
         Conversa:
@@ -85,108 +243,269 @@ class ChatwootImporter:
         Resumo: [RESUMO]
         """
 
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "Você é um analista de CRM experiente."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=200,
-                temperature=0.0
-            )
-            
-            content = response.choices[0].message.content.strip()
-            
-            # Parser simples
-            status = "new"  # Default
-            summary = "Erro ao gerar resumo."
-            
-            lines = content.split('\n')
-            for line in lines:
-                if line.startswith("Status:"):
-                    status = line.replace("Status:", "").strip().lower()
-                elif line.startswith("Resumo:"):
-                    summary = line.replace("Resumo:", "").strip()
-            
-            # Normalização de segurança
-            valid_stats = ["aguardando_resposta", "aguardando_followup", "conversa_fria", "recusou", "interessado"]
-            if status not in valid_stats:
-                status = "manual_review" # Fallback
-
-            return {"status": status, "summary": summary}
+    def _parse_analysis(self, content: str) -> Dict[str, Any]:
+        # Parser simples
+        status = "new"  # Default
+        summary = "Erro ao gerar resumo."
+        
+        for line in content.split('\n'):
+            line = line.strip()
+            if line.startswith("Status:"):
+                status = line.replace("Status:", "").strip().lower()
+            elif line.startswith("Resumo:"):
+                summary = line.replace("Resumo:", "").strip()
+        
+        # Normalização de segurança
+        if status not in VALID_AI_STATUSES:
+            status = "manual_review" # Fallback
 
-        except Exception as e:
-            logger.error(f"Erro na análise de IA para contato {contact_id}: {e}")
-            return {"status": "manual_review", "summary": "Falha na análise automática."}
+        return {"status": status, "summary": summary}
+
+    def _fetch_history(self, contact: Dict[str, Any]) -> Dict[str, Any]:
+        """Etapa 1 do pipeline: histórico de conversas do contato."""
+        return {**contact, "history": self.chatwoot.get_conversation_history(contact["contact_id"])}
+
+    def _analyze(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Etapa 2 do pipeline: classificação LLM (libera o histórico da memória)."""
+        if item.get("failed"):
+            return item
+        history = item.pop("history")
+        item["analysis"] = self.analyze_history(history, item["contact_id"])
+        return item
+
+    @staticmethod
+    def _mark_failed(item: Dict[str, Any], error: Exception) -> Dict[str, Any]:
+        """Falha numa etapa: o contato segue até a escrita para ser contabilizado no checkpoint."""
+        return {**item, "failed": str(error)}
 
-    def import_existing_leads(self):
+    def _build_lead_data(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        analysis = item["analysis"]
+        ai_status = analysis["status"]
+        return {
+            "name": item["name"],
+            "phone": normalize_phone(item["phone"]),
+            "status": AI_TO_DB_STATUS.get(ai_status, "new"),
+            "notes": f"[Import Bot] Status Anterior: {ai_status}. Resumo: {analysis['summary']}",
+            "chatwoot_id": item["contact_id"]
+        }
+
+    def _write_batch(self, items: List[Dict[str, Any]], stats: Dict[str, int]) -> List[Dict[str, Any]]:
         """
-        Executa o processo completo de importação.
+        Grava um lote de contatos analisados: uma consulta para achar os leads existentes,
+        atualização das notas dos existentes e criação dos novos em lote.
+        Retorna os contatos que falharam (em alguma etapa ou na gravação), para reprocessar.
         """
-        contacts = self.list_all_chatwoot_contacts()
-        stats = {"imported": 0, "updated": 0, "ignored": 0}
-        
-        logger.info(f"Encontrados {len(contacts)} contatos com telefone. Iniciando análise...")
-        
-        for i, contact in enumerate(contacts):
+        failed = [item for item in items if item.get("failed")]
+        pending = [item for item in items if not item.get("failed")]
+        if not pending:
+            stats["ignored"] += len(failed)
+            return failed
+
+        leads = [self._build_lead_data(item) for item in pending]
+        try:
+            existing = self.db.get_leads_by_phones([lead["phone"] for lead in leads], view=LEAD_NOTES_VIEW)
+        except Exception as e:
+            logger.error(f"Erro ao buscar lote de {len(leads)} leads existentes: {e}")
+            failed += [{**item, "failed": str(e)} for item in pending]
+            stats["ignored"] += len(failed)
+            return failed
+
+        new_items = []
+        for item, lead_data in zip(pending, leads):
+            current = existing.get(lead_data["phone"])
+            if not current:
+                new_items.append((item, lead_data))
+                continue
+            old_notes = current.get("notes", "") or ""
+            if lead_data["notes"] in old_notes:
+                # Já gravado (execução retomada ou contato reprocessado): não duplica a nota
+                stats["unchanged"] += 1
+                continue
             try:
-                phone_raw = contact["phone"]
-                phone_norm = normalize_phone(phone_raw)
-                
-                # Análise de IA
-                analysis = self.get_conversation_summary(contact["contact_id"])
-                
-                # Mapeamento de status para o nosso DB
-                # DB Status: new, working, contacted, follow_up_scheduled, converted, lost
-                db_status = "new"
-                ai_status = analysis["status"]
-                
-                if ai_status == "aguardando_resposta":
-                    db_status = "contacted"
-                elif ai_status == "aguardando_followup":
-                    db_status = "working" # ou follow_up_scheduled
-                elif ai_status == "conversa_fria":
-                    db_status = "lost" # ou new para tentar reativar
-                elif ai_status == "recusou":
-                    db_status = "lost"
-                elif ai_status == "interessado":
-                    db_status = "working"
-                
-                lead_data = {
-                    "name": contact["name"],
-                    "phone": phone_norm,
-                    "status": db_status,
-                    "notes": f"[Import Bot] Status Anterior: {ai_status}. Resumo: {analysis['summary']}",
-                    "chatwoot_id": contact["contact_id"]
-                }
-                
-                # Verifica existência
-                existing = supabase.get_lead_by_phone(phone_norm)
-                
-                if existing:
-                    # Atualiza
-                    old_notes = existing.get("notes", "") or ""
-                    new_notes = f"{old_notes}\n\n{lead_data['notes']}"
-                    supabase.update_lead(existing["id"], {
-                        "notes": new_notes,
-                        # Opcional: atualizar status se quisermos forçar a visão da IA
-                        # "status": db_status 
-                    })
-                    stats["updated"] += 1
-                else:
-                    # Cria
-                    supabase.create_lead(lead_data)
-                    stats["imported"] += 1
-                    
-                if i > 0 and i % 5 == 0:
-                    logger.info(f"Progresso: {i}/{len(contacts)}...")
-                    
+                new_notes = f"{old_notes}\n\n{lead_data['notes']}"
+                self.db.update_lead(current["id"], {
+                    "notes": new_notes,
+                    # Opcional: atualizar status se quisermos forçar a visão da IA
+                    # "status": db_status 
+                })
+                # Contato repetido no mesmo lote acumula as notas
+                current.notes = new_notes
+                stats["updated"] += 1
+            except Exception as e:
+                logger.error(f"Erro ao atualizar lead {lead_data['phone']}: {e}")
+                failed.append({**item, "failed": str(e)})
+
+        if new_items:
+            try:
+                outcomes = self.db.bulk_upsert_leads([lead_data for _, lead_data in new_items])
             except Exception as e:
-                logger.error(f"Erro ao processar contato {contact}: {e}")
-                stats["ignored"] += 1
-                
+                logger.error(f"Erro ao criar lote de {len(new_items)} leads: {e}")
+                outcomes = [{"phone": lead_data["phone"], "status": "error", "error": str(e)} for _, lead_data in new_items]
+
+            for (item, _), outcome in zip(new_items, outcomes):
+                if outcome["status"] == "created":
+                    stats["imported"] += 1
+                elif outcome["status"] == "error":
+                    logger.error(f"Erro ao criar lead {outcome['phone']}: {outcome['error']}")
+                    failed.append({**item, "failed": outcome["error"]})
+                else:
+                    # existing (corrida com outro processo) ou duplicate (repetido no lote)
+                    stats["unchanged"] += 1
+
+        stats["ignored"] += len(failed)
+        return failed
+
+    def import_existing_leads(
+        self,
+        history_workers: int = IMPORT_HISTORY_WORKERS,
+        llm_workers: int = IMPORT_LLM_WORKERS,
+        write_batch_size: int = IMPORT_WRITE_BATCH_SIZE,
+        report_every: float = IMPORT_PROGRESS_SECONDS,
+        incremental: bool = False,
+        resume: bool = True
+    ):
+        """
+        Executa o processo completo de importação.
+
+        O progresso é salvo a cada lote gravado (última página concluída); uma execução
+        interrompida é retomada do checkpoint. Com `incremental`, só processa contatos
+        com atividade depois do watermark da última execução concluída.
+        """
+        stats = {"imported": 0, "updated": 0, "unchanged": 0, "ignored": 0}
+        self.cache_stats = {"hits": 0, "misses": 0}
+        self.preclassified = {}
+        logger.info(f"Analisando conversas com o modelo '{self.llm.model}'.")
+
+        run = self._start_run(incremental, resume)
+        pages = _PageTracker(run["page"])
+
+        stages = [
+            Stage("historico", self._fetch_history, history_workers, on_error=self._mark_failed),
+            Stage("llm", self._analyze, llm_workers, on_error=self._mark_failed)
+        ]
+        pipeline = Pipeline(stages, queue_size=max(write_batch_size, llm_workers * 2), report_every=report_every)
+
+        # Análise começa já com a primeira página (sem esperar a listagem completa)
+        batch = []
+        for item in pipeline.run(self._iter_run_contacts(run, pages)):
+            batch.append(item)
+            if len(batch) >= write_batch_size:
+                self._save_progress(run, pages, batch, self._write_batch(batch, stats))
+                batch = []
+                logger.info(f"Progresso: {stats['imported'] + stats['updated']} leads gravados (página {run['page']} concluída)...")
+        if batch:
+            self._save_progress(run, pages, batch, self._write_batch(batch, stats))
+
+        self._finish_run(run)
+
+        stats["cache_hits"] = self.cache_stats["hits"]
+        stats["cache_misses"] = self.cache_stats["misses"]
+        stats["preclassified"] = sum(self.preclassified.values())
+        if stats["preclassified"]:
+            rules = ", ".join(f"{rule}: {count}" for rule, count in sorted(self.preclassified.items()))
+            logger.info(f"Pré-classificação local: {stats['preclassified']} conversas sem LLM ({rules}).")
+        if self.cache is not None:
+            logger.info(f"Cache de análises: {stats['cache_hits']} acertos, {stats['cache_misses']} chamadas ao LLM.")
+        if self.rate_limiter.waited_seconds:
+            logger.info(f"Limite de RPM/TPM segurou as chamadas por {self.rate_limiter.waited_seconds:.0f}s no total.")
         return stats
 
+    def _start_run(self, incremental: bool, resume: bool) -> Dict[str, Any]:
+        """Retoma a execução salva no checkpoint ou inicia uma nova."""
+        run = self.checkpoint.load_run() if self.checkpoint is not None and resume else None
+        if run:
+            logger.info(
+                f"Retomando importação {'incremental' if run['since'] else 'completa'} "
+                f"iniciada em {run['started_at']} a partir da página {run['page'] + 1} "
+                f"(último contato gravado: {run['last_contact_id']})."
+            )
+            return run
+
+        since = self.checkpoint.get_watermark() if self.checkpoint is not None and incremental else 0
+        if incremental and not since:
+            logger.info("Sem watermark de execução anterior: importação completa.")
+        elif since:
+            logger.info(f"Importação incremental: contatos com atividade após {datetime.fromtimestamp(since).isoformat()}.")
+
+        run = {
+            "since": since,
+            "page": 0,
+            "last_contact_id": None,
+            "max_activity": since,
+            "started_at": datetime.now().isoformat()
+        }
+        if self.checkpoint is not None:
+            self.checkpoint.save_run(run)
+        return run
+
+    def _save_progress(
+        self,
+        run: Dict[str, Any],
+        pages: "_PageTracker",
+        written: List[Dict[str, Any]],
+        failed: List[Dict[str, Any]]
+    ):
+        """
+        Avança o checkpoint até a última página com todos os contatos tratados.
+        Os que falharam vão para a lista de reprocessamento antes do checkpoint
+        (e o watermark) passar por eles; os que deram certo saem dela.
+        """
+        if self.checkpoint is not None:
+            failed_ids = {item["contact_id"] for item in failed}
+            self.checkpoint.add_retries(failed)
+            self.checkpoint.remove_retries(item["contact_id"] for item in written if item["contact_id"] not in failed_ids)
+
+        for item in written:
+            if item["page"] is not None:
+                pages.done(item["page"])
+
+        advanced = pages.advance()
+        if advanced and self.checkpoint is not None:
+            run["page"], run["last_contact_id"] = advanced
+            self.checkpoint.save_run(run)
+
+    def _finish_run(self, run: Dict[str, Any]):
+        """Execução concluída: novo watermark e checkpoint descartado."""
+        if self.checkpoint is None:
+            return
+        self.checkpoint.set_watermark(run["max_activity"])
+        self.checkpoint.clear_run()
+
+class _PageTracker:
+    """
+    Acompanha contatos pendentes por página. Como o pipeline não preserva a ordem,
+    uma página só conta como concluída quando todos os seus contatos foram gravados
+    e todas as anteriores também.
+    """
+
+    def __init__(self, committed_page: int):
+        self.committed_page = committed_page
+        self._pending: Dict[int, int] = {}
+        self._last_ids: Dict[int, Any] = {}
+        self._lock = threading.Lock()
+
+    def open(self, page: int, count: int, last_contact_id: Any):
+        with self._lock:
+            self._pending[page] = self._pending.get(page, 0) + count
+            self._last_ids[page] = last_contact_id
+
+    def done(self, page: int):
+        with self._lock:
+            self._pending[page] -= 1
+
+    def advance(self) -> Optional[Tuple[int, Any]]:
+        """Retorna (página, último contato) do novo checkpoint, ou None se não avançou."""
+        with self._lock:
+            advanced = None
+            while self._pending.get(self.committed_page + 1) == 0:
+                self.committed_page += 1
+                self._pending.pop(self.committed_page)
+                advanced = (self.committed_page, self._last_ids.pop(self.committed_page))
+            return advanced
+
 # Instância global
-chatwoot_importer = ChatwootImporter()
+try:
+    chatwoot_importer = ChatwootImporter()
+except Exception as e:
+    logger.warning(f"Não foi possível inicializar ChatwootImporter: {e}")
+    chatwoot_importer = None
@@ -0,0 +1,103 @@
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+from config.settings import IMPORT_CHECKPOINT_PATH, IMPORT_RETRY_MAX_ATTEMPTS
+from utils.local_store import LocalStore
+from utils.logger import logger
+
+# Campos do contato guardados para reprocessamento
+RETRY_FIELDS = ("contact_id", "name", "phone", "last_activity_at")
+
+class ImportCheckpoint(LocalStore):
+    """
+    Estado persistente da importação do Chatwoot.
+
+    - "run": execução em andamento (última página totalmente gravada, último contato,
+      maior last_activity_at visto). Removido quando a execução termina.
+    - "watermark": maior last_activity_at da última execução concluída; execuções
+      incrementais só processam contatos com atividade depois dele.
+    - import_retry: contatos cuja análise ou gravação falhou. O checkpoint e o watermark
+      seguem em frente; esses contatos são reprocessados no início das próximas execuções.
+    """
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS import_state (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS import_retry (
+        contact_id TEXT PRIMARY KEY,
+        contact TEXT NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        last_error TEXT,
+        updated_at TEXT NOT NULL
+    );
+    """
+
+    def __init__(self, path: str = ":memory:", max_attempts: int = IMPORT_RETRY_MAX_ATTEMPTS):
+        super().__init__(path)
+        self.max_attempts = max_attempts
+
+    def load_run(self) -> Optional[Dict[str, Any]]:
+        value = self._get("run")
+        return json.loads(value) if value else None
+
+    def save_run(self, run: Dict[str, Any]):
+        self._set("run", json.dumps(run))
+
+    def clear_run(self):
+        self.execute("DELETE FROM import_state WHERE key = 'run'")
+
+    def get_watermark(self) -> int:
+        return int(self._get("watermark") or 0)
+
+    def set_watermark(self, value: int):
+        self._set("watermark", str(int(value)))
+
+    def load_retries(self) -> List[Dict[str, Any]]:
+        """Contatos pendentes de reprocessamento (dentro do limite de tentativas)."""
+        rows = self.query(
+            "SELECT contact FROM import_retry WHERE attempts < ? ORDER BY updated_at",
+            (self.max_attempts,)
+        )
+        return [json.loads(row["contact"]) for row in rows]
+
+    def add_retries(self, contacts: Iterable[Dict[str, Any]]):
+        """Registra contatos que falharam (incrementa as tentativas de quem já estava na lista)."""
+        now = datetime.utcnow().isoformat()
+        rows = [
+            (str(c["contact_id"]), json.dumps({k: c.get(k) for k in RETRY_FIELDS}), c.get("failed"), now)
+            for c in contacts
+        ]
+        if not rows:
+            return
+        self.executemany(
+            "INSERT INTO import_retry (contact_id, contact, attempts, last_error, updated_at) VALUES (?, ?, 1, ?, ?) "
+            "ON CONFLICT(contact_id) DO UPDATE SET contact = excluded.contact, attempts = attempts + 1, "
+            "last_error = excluded.last_error, updated_at = excluded.updated_at",
+            rows
+        )
+        ids = [row[0] for row in rows]
+        exhausted = self.query(
+            f"SELECT contact_id, last_error FROM import_retry "
+            f"WHERE contact_id IN ({', '.join('?' for _ in ids)}) AND attempts >= ?",
+            [*ids, self.max_attempts]
+        )
+        for row in exhausted:
+            logger.error(f"Contato {row['contact_id']} desistido após {self.max_attempts} tentativas de importação: {row['last_error']}")
+
+    def remove_retries(self, contact_ids: Iterable[Any]):
+        self.executemany("DELETE FROM import_retry WHERE contact_id = ?", [(str(cid),) for cid in contact_ids])
+
+    def _get(self, key: str) -> Optional[str]:
+        rows = self.query("SELECT value FROM import_state WHERE key = ?", (key,))
+        return rows[0]["value"] if rows else None
+
+    def _set(self, key: str, value: str):
+        self.execute("INSERT OR REPLACE INTO import_state (key, value) VALUES (?, ?)", (key, value))
+
+# Instância global
+try:
+    import_checkpoint = ImportCheckpoint(IMPORT_CHECKPOINT_PATH)
+except Exception as e:
+    logger.warning(f"Não foi possível abrir o checkpoint da importação: {e}")
+    import_checkpoint = None
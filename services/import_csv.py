@@ -0,0 +1,196 @@
+import csv
+import time
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from config.settings import IMPORT_CSV_CHUNK_SIZE, IMPORT_CSV_WORKERS, IMPORT_PROGRESS_SECONDS
+from utils.logger import logger
+from utils.pipeline import ordered_map
+from utils.validators import classify_phones
+
+REPORT_FIELDS = ["line", "phone", "reason", "name", "company", "sector", "city"]
+
+# Linha rejeitada: (número da linha no arquivo, linha original, motivo)
+Rejection = Tuple[int, Dict[str, Any], str]
+
+def validate_csv_chunk(chunk: List[Tuple[int, Dict[str, Any]]]) -> Tuple[List[Tuple[int, Dict[str, Any], Dict[str, Any]]], List[Rejection]]:
+    """
+    Valida e normaliza um bloco de linhas (executado nos processos de validação;
+    função de módulo para ser serializável).
+    Retorna (válidas como (linha, original, lead), rejeitadas).
+    """
+    valid, rejected = [], []
+    phones = classify_phones([row.get("phone", "") for _, row in chunk])
+    for (line, row), (phone, country) in zip(chunk, phones):
+        if not country:
+            rejected.append((line, row, "telefone inválido"))
+            continue
+        valid.append((line, row, {
+            "name": row.get("name"),
+            "phone": phone,
+            "company": row.get("company"),
+            "sector": row.get("sector"),
+            "city": row.get("city"),
+            "status": "new",
+            "metadata": {}
+        }))
+    return valid, rejected
+
+class CsvLeadImporter:
+    """
+    Importação de CSV em streaming, com memória limitada:
+    lê em blocos, valida/normaliza os blocos em `workers` processos (validação é CPU pura:
+    threads não ganhariam nada com o GIL; resultados na ordem do arquivo), remove duplicados
+    dentro do bloco e contra o banco e grava em lote (bulk_upsert_leads). Progresso e ETA
+    são logados durante a execução.
+
+    Duplicados entre blocos ficam a cargo do índice único de telefone: o primeiro bloco grava
+    o lead e os seguintes o recebem como "já existe no banco", sem um conjunto de telefones
+    que cresceria com o arquivo. Em dry-run nada é gravado (as rejeições vão para o relatório);
+    para ainda apontar os duplicados no arquivo, só nesse modo os telefones vistos são
+    guardados, com memória proporcional aos telefones únicos.
+    """
+
+    def __init__(
+        self,
+        db,
+        chunk_size: int = IMPORT_CSV_CHUNK_SIZE,
+        workers: int = IMPORT_CSV_WORKERS,
+        report_every: Optional[float] = IMPORT_PROGRESS_SECONDS
+    ):
+        self.db = db
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.report_every = report_every
+
+    def run(self, filepath: str, dry_run: bool = False, report_path: Optional[str] = None) -> Dict[str, int]:
+        """
+        Importa `filepath`. Colunas esperadas: name, phone, company, sector, city.
+        Retorna {total, imported, skipped, errors}; em dry-run, `imported` conta os
+        leads que seriam criados.
+        """
+        stats = {"total": 0, "imported": 0, "skipped": 0, "errors": 0}
+        expected_rows = self._count_rows(filepath)
+        seen_phones = set()
+        started = last_report = time.monotonic()
+
+        report_file = open(report_path, "w", newline="", encoding="utf-8") if report_path else None
+        report = csv.DictWriter(report_file, fieldnames=REPORT_FIELDS, extrasaction="ignore") if report_file else None
+        if report:
+            report.writeheader()
+
+        try:
+            with open(filepath, mode="r", encoding="utf-8", newline="") as f:
+                chunks = self._iter_chunks(csv.DictReader(f))
+                if self.workers > 1:
+                    validated = ordered_map(validate_csv_chunk, chunks, workers=self.workers, processes=True)
+                else:
+                    # Um worker: valida no próprio processo (sem custo de serialização)
+                    validated = map(validate_csv_chunk, chunks)
+                for valid, rejected in validated:
+                    stats["total"] += len(valid) + len(rejected)
+
+                    unique = []
+                    if not dry_run:
+                        seen_phones = set()
+                    for line, row, lead in valid:
+                        if lead["phone"] in seen_phones:
+                            rejected.append((line, row, "duplicado no arquivo"))
+                        else:
+                            seen_phones.add(lead["phone"])
+                            unique.append((line, row, lead))
+
+                    rejected.extend(self._write_chunk(unique, stats, dry_run))
+                    stats["skipped"] += sum(1 for _, _, reason in rejected if not reason.startswith("erro"))
+                    self._report_rejections(report, rejected)
+
+                    if self.report_every and time.monotonic() - last_report >= self.report_every:
+                        self._log_progress(stats, expected_rows, started)
+                        last_report = time.monotonic()
+        except FileNotFoundError:
+            logger.error(f"Arquivo não encontrado: {filepath}")
+            raise
+        finally:
+            if report_file:
+                report_file.close()
+
+        self._log_progress(stats, expected_rows, started)
+        if report_path:
+            logger.info(f"Relatório de rejeições gravado em {report_path}")
+        return stats
+
+    def _iter_chunks(self, reader: csv.DictReader) -> Iterator[List[Tuple[int, Dict[str, Any]]]]:
+        # Linha 1 é o cabeçalho; line_num acompanha campos com quebra de linha
+        rows = ((reader.line_num, row) for row in reader)
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+    def _write_chunk(self, unique: List[Tuple[int, Dict[str, Any], Dict[str, Any]]], stats: Dict[str, int], dry_run: bool) -> List[Rejection]:
+        """Deduplica contra o banco e grava (ou só conta, em dry-run). Retorna as rejeições."""
+        if not unique:
+            return []
+        rejected = []
+
+        if dry_run:
+            try:
+                existing = self.db.get_leads_by_phones([lead["phone"] for _, _, lead in unique])
+            except Exception as e:
+                logger.error(f"Erro ao consultar bloco de {len(unique)} telefones: {e}")
+                stats["errors"] += len(unique)
+                return [(line, row, f"erro: {e}") for line, row, _ in unique]
+            for line, row, lead in unique:
+                if lead["phone"] in existing:
+                    rejected.append((line, row, "já existe no banco"))
+                else:
+                    stats["imported"] += 1
+            return rejected
+
+        try:
+            outcomes = self.db.bulk_upsert_leads([lead for _, _, lead in unique])
+        except Exception as e:
+            logger.error(f"Erro ao importar bloco de {len(unique)} linhas: {e}")
+            stats["errors"] += len(unique)
+            return [(line, row, f"erro: {e}") for line, row, _ in unique]
+
+        for (line, row, _), outcome in zip(unique, outcomes):
+            if outcome["status"] == "created":
+                stats["imported"] += 1
+            elif outcome["status"] == "error":
+                stats["errors"] += 1
+                rejected.append((line, row, f"erro: {outcome['error']}"))
+            else:
+                rejected.append((line, row, "já existe no banco"))
+        return rejected
+
+    @staticmethod
+    def _report_rejections(report: Optional[csv.DictWriter], rejected: List[Rejection]):
+        if not report:
+            return
+        for line, row, reason in sorted(rejected, key=lambda r: r[0]):
+            report.writerow({**row, "line": line, "reason": reason})
+
+    @staticmethod
+    def _count_rows(filepath: str) -> Optional[int]:
+        """Estimativa de linhas para o ETA (conta quebras de linha em blocos binários)."""
+        try:
+            with open(filepath, "rb") as f:
+                lines = sum(block.count(b"\n") for block in iter(lambda: f.read(1 << 20), b""))
+            return max(lines - 1, 0)
+        except OSError:
+            return None
+
+    @staticmethod
+    def _log_progress(stats: Dict[str, int], expected_rows: Optional[int], started: float):
+        elapsed = time.monotonic() - started
+        rate = stats["total"] / elapsed if elapsed > 0 else 0.0
+        progress = f"{stats['total']} linhas"
+        if expected_rows:
+            remaining = max(expected_rows - stats["total"], 0)
+            eta = remaining / rate if rate else 0
+            progress = f"{stats['total']}/{expected_rows} linhas ({stats['total'] / expected_rows:.0%}), ETA {eta:.0f}s"
+        logger.info(
+            f"Importação CSV: {progress} | {rate:.0f} linhas/s | "
+            f"importados: {stats['imported']}, ignorados: {stats['skipped']}, erros: {stats['errors']}"
+        )
@@ -0,0 +1,136 @@
+import atexit
+import os
+import socket
+import threading
+import time
+from collections import deque
+from typing import Optional, Dict, Any
+from config.settings import LEAD_QUEUE_BATCH_SIZE, LEAD_QUEUE_LEASE_SECONDS, MESSAGE_INTERVAL_MINUTES
+from integrations.models import LEAD_SEND_VIEW
+from integrations.supabase_client import supabase
+from utils.logger import logger
+
+class LeadQueue:
+    """
+    Fila local de leads prontos para contato.
+    Reivindica um lote de leads de uma vez (claimed_by / lease_expires_at) e os
+    serve da memória. Leads cujo lease expirou são descartados localmente, pois
+    já voltaram a ficar disponíveis para outros processos.
+
+    O scheduler consome um lead a cada `interval_seconds`, então o lease precisa cobrir
+    o lote inteiro: sem lease explícito ele é derivado do lote; com lease explícito,
+    o lote é limitado ao que o lease consegue cobrir.
+
+    Como um lead pode ficar horas no buffer, ele é relido do banco ao ser servido:
+    se o status mudou (respondeu, pediu parada) ou o claim não é mais deste worker,
+    ele é descartado em vez de enviado.
+    """
+
+    # Margem para não servir um lead com o lease prestes a expirar
+    LEASE_SAFETY_SECONDS = 60
+
+    def __init__(
+        self,
+        db,
+        batch_size: int = LEAD_QUEUE_BATCH_SIZE,
+        lease_seconds: int = LEAD_QUEUE_LEASE_SECONDS,
+        worker_id: Optional[str] = None,
+        interval_seconds: int = MESSAGE_INTERVAL_MINUTES * 60
+    ):
+        self.db = db
+        if not lease_seconds:
+            lease_seconds = batch_size * interval_seconds + self.LEASE_SAFETY_SECONDS
+        if lease_seconds <= self.LEASE_SAFETY_SECONDS:
+            raise ValueError(
+                f"lease_seconds ({lease_seconds}) deve ser maior que a margem de segurança ({self.LEASE_SAFETY_SECONDS}s)."
+            )
+
+        # O k-ésimo lead do lote é servido ~k intervalos após o claim
+        coverable = (lease_seconds - self.LEASE_SAFETY_SECONDS - 1) // max(interval_seconds, 1) + 1
+        if batch_size > coverable:
+            logger.warning(
+                f"Lote da fila reduzido de {batch_size} para {coverable}: "
+                f"lease de {lease_seconds}s não cobre um lead a cada {interval_seconds}s."
+            )
+            batch_size = coverable
+
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+
+        self._buffer = deque()  # (lead, expira_em) com expira_em em time.monotonic()
+        self._lock = threading.Lock()
+
+    def next(self) -> Optional[Dict[str, Any]]:
+        """
+        Retorna o próximo lead reivindicado (dados atuais do banco), buscando um novo
+        lote se necessário.
+        """
+        with self._lock:
+            while True:
+                self._drop_expired()
+                if not self._buffer:
+                    self._refill()
+                if not self._buffer:
+                    return None
+                entry = self._buffer.popleft()
+                try:
+                    lead = self._revalidate(entry[0])
+                except Exception:
+                    # Falha ao reler: o lead volta para o buffer e o erro segue para o chamador
+                    self._buffer.appendleft(entry)
+                    raise
+                if lead:
+                    return lead
+
+    def release_all(self, leads=()):
+        """
+        Libera no banco os leads reivindicados que não chegaram a ser usados: os do
+        buffer e `leads` (já retirados com next(), mas não enviados).
+        """
+        with self._lock:
+            lead_ids = [lead["id"] for lead in leads] + [lead["id"] for lead, _ in self._buffer]
+            self._buffer.clear()
+
+        if not lead_ids:
+            return
+        try:
+            self.db.release_lead_claims(self.worker_id, lead_ids)
+            logger.info(f"{len(lead_ids)} leads reivindicados foram liberados.")
+        except Exception as e:
+            logger.warning(f"Erro ao liberar leads reivindicados (expiram pelo lease): {e}")
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def _refill(self):
+        leads = self.db.claim_leads(self.worker_id, self.batch_size, self.lease_seconds)
+        expires_at = time.monotonic() + self.lease_seconds - self.LEASE_SAFETY_SECONDS
+        for lead in leads:
+            self._buffer.append((lead, expires_at))
+        if leads:
+            logger.debug(f"{len(leads)} leads reivindicados por {self.worker_id}.")
+
+    def _revalidate(self, lead: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Relê o lead; None se ele não está mais pronto para contato por este worker."""
+        current = self.db.get_lead_by_id(lead["id"], view=LEAD_SEND_VIEW + ("claimed_by",))
+        if not current or current.get("status") != lead.get("status") or current.get("claimed_by") != self.worker_id:
+            logger.info(
+                f"Lead {lead.get('phone') or lead['id']} descartado da fila: "
+                f"status atual {current.get('status') if current else 'removido'}."
+            )
+            return None
+        return current
+
+    def _drop_expired(self):
+        now = time.monotonic()
+        dropped = 0
+        while self._buffer and self._buffer[0][1] <= now:
+            self._buffer.popleft()
+            dropped += 1
+        if dropped:
+            logger.debug(f"{dropped} leads descartados por lease expirado.")
+
+# Instância global
+lead_queue = LeadQueue(supabase)
+atexit.register(lead_queue.release_all)
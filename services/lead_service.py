@@ -1,69 +1,29 @@
 
-import csv
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any
 from integrations.supabase_client import supabase
 from integrations.chatwoot import chatwoot
-from utils.validators import validate_phone, normalize_phone
+from services.import_csv import CsvLeadImporter
+from services.lead_queue import lead_queue
 from utils.logger import logger
 
+# Status em que uma resposta do lead não muda mais nada
+RESPONSE_FINAL_STATUSES = ("responded", "declined", "converted")
+
 class LeadService:
     def __init__(self):
         self.db = supabase
         self.chat_api = chatwoot
+        self.queue = lead_queue
 
-    def import_from_csv(self, filepath: str) -> Dict[str, int]:
+    def import_from_csv(self, filepath: str, dry_run: bool = False, report_path: Optional[str] = None, **options: Any) -> Dict[str, int]:
         """
         Importa leads de um arquivo CSV.
         Colunas esperadas: name, phone, company, sector, city
+        O arquivo é processado em streaming, em blocos (ver CsvLeadImporter);
+        `options` repassa chunk_size, workers e report_every.
         """
-        stats = {"total": 0, "imported": 0, "skipped": 0, "errors": 0}
-        
-        try:
-            with open(filepath, mode='r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                
-                for row in reader:
-                    stats["total"] += 1
-                    
-                    try:
-                        raw_phone = row.get("phone", "")
-                        if not validate_phone(raw_phone):
-                            logger.warning(f"Telefone inválido ignorado: {raw_phone}")
-                            stats["skipped"] += 1
-                            continue
-                            
-                        normalized = normalize_phone(raw_phone)
-                        
-                        # Verifica se já existe no banco (Supabase)
-                        existing = self.db.get_lead_by_phone(normalized)
-                        if existing:
-                            stats["skipped"] += 1
-                            continue
-
-                        # Prepara dados
-                        lead_data = {
-                            "name": row.get("name"),
-                            "phone": normalized,
-                            "company": row.get("company"),
-                            "sector": row.get("sector"),
-                            "city": row.get("city"),
-                            "status": "new",
-                            "metadata": {}
-                        }
-                        
-                        self.db.create_lead(lead_data)
-                        stats["imported"] += 1
-                        
-                    except Exception as e:
-                        logger.error(f"Erro ao importar linha {stats['total']}: {e}")
-                        stats["errors"] += 1
-                        
-        except FileNotFoundError:
-            logger.error(f"Arquivo não encontrado: {filepath}")
-            raise
-            
-        return stats
+        return CsvLeadImporter(self.db, **options).run(filepath, dry_run=dry_run, report_path=report_path)
 
     def get_next_to_contact(self) -> Optional[Dict[str, Any]]:
         """
@@ -74,7 +34,7 @@ class LeadService:
         max_attempts_search = 10  # Evita loop infinito se todos estiverem duplicados
         
         for _ in range(max_attempts_search):
-            lead = self.db.get_next_lead_to_contact()
+            lead = self.queue.next()
             if not lead:
                 return None
                 
@@ -120,19 +80,23 @@ class LeadService:
             "contact_count": 1 # Assumindo incremento simples, ideal seria ler e somar
         })
 
-    def mark_as_responded(self, lead_id: str):
-        """Atualiza status para respondido (handover)."""
-        self.db.update_lead(lead_id, {
+    def mark_as_responded(self, lead_id: str) -> bool:
+        """
+        Atualiza status para respondido (handover).
+        Condicional no banco: não sobrescreve respondido/recusado/convertido, mesmo que o
+        status visto pelo chamador (cache) esteja defasado. Retorna True se mudou o status.
+        """
+        return self.db.update_lead(lead_id, {
             "status": "responded",
             "responded_at": datetime.utcnow().isoformat()
-        })
+        }, unless_status=RESPONSE_FINAL_STATUSES) is not None
 
-    def mark_as_declined(self, lead_id: str):
-        """Atualiza status para recusado."""
-        self.db.update_lead(lead_id, {
+    def mark_as_declined(self, lead_id: str) -> bool:
+        """Atualiza status para recusado (uma vez só). Retorna True se mudou o status."""
+        return self.db.update_lead(lead_id, {
             "status": "declined",
             "declined_at": datetime.utcnow().isoformat()
-        })
+        }, unless_status=("declined",)) is not None
 
     def schedule_followup(self, lead_id: str, days: int):
         """Agenda follow-up."""
@@ -0,0 +1,62 @@
+import hashlib
+import time
+from typing import NamedTuple, Optional
+from config.settings import OPENAI_API_KEY, IMPORT_LLM_BACKEND, IMPORT_LLM_MODEL
+from utils.logger import logger
+
+class LLMResponse(NamedTuple):
+    text: str
+    tokens: int
+
+class OpenAIChatClient:
+    """Cliente de chat da OpenAI (análise de conversas na importação)."""
+
+    def __init__(self, model: str = IMPORT_LLM_MODEL, api_key: Optional[str] = OPENAI_API_KEY):
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY não configurada.")
+        import openai
+        self.model = model
+        self.client = openai.OpenAI(api_key=api_key)
+
+    def complete(self, system: str, prompt: str, max_tokens: int = 200) -> LLMResponse:
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": system},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=max_tokens,
+            temperature=0.0
+        )
+        usage = getattr(response, "usage", None)
+        return LLMResponse(
+            response.choices[0].message.content.strip(),
+            getattr(usage, "total_tokens", 0) or 0
+        )
+
+class StubLLMClient:
+    """
+    Cliente local determinístico para medir o pipeline sem rede nem custo.
+    Simula a latência da API e responde no mesmo formato esperado pelo parser.
+    """
+    STATUSES = ("aguardando_resposta", "aguardando_followup", "conversa_fria", "recusou", "interessado")
+
+    def __init__(self, latency_seconds: float = 0.5):
+        self.model = "stub"
+        self.latency_seconds = latency_seconds
+
+    def complete(self, system: str, prompt: str, max_tokens: int = 200) -> LLMResponse:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        digest = int(hashlib.sha1(prompt.encode("utf-8")).hexdigest(), 16)
+        status = self.STATUSES[digest % len(self.STATUSES)]
+        return LLMResponse(f"Status: {status}\nResumo: Resumo simulado ({len(prompt)} caracteres).", len(prompt) // 4)
+
+def create_llm_client(backend: str = IMPORT_LLM_BACKEND):
+    """Cria o cliente configurado em IMPORT_LLM_BACKEND ("openai" ou "stub")."""
+    if backend == "stub":
+        logger.info("Usando StubLLMClient (sem chamadas à OpenAI).")
+        return StubLLMClient()
+    if backend == "openai":
+        return OpenAIChatClient()
+    raise ValueError(f"IMPORT_LLM_BACKEND inválido: {backend}")
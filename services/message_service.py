@@ -1,12 +1,15 @@
 
 import random
+from concurrent.futures import Future
 from typing import Dict, Any, Optional
+from config.keywords import STOP_KEYWORDS
 from config.templates import format_message
 from integrations.evolution import evolution
 from integrations.chatwoot import chatwoot
 from integrations.supabase_client import supabase
-from services.lead_service import lead_service
+from services.lead_service import lead_service, RESPONSE_FINAL_STATUSES
 from services.trello_service import trello_service
+from utils.keyword_matcher import KeywordMatcher
 from utils.logger import logger
 
 class MessageService:
@@ -15,6 +18,7 @@ class MessageService:
         self.chatwoot = chatwoot
         self.db = supabase
         self.lead_service = lead_service
+        self.stop_matcher = KeywordMatcher(STOP_KEYWORDS)
 
     def send_first_contact(self, lead: Dict[str, Any]) -> bool:
         """
@@ -42,18 +46,23 @@ class MessageService:
 
         # 3. Envia Mensagem
         try:
-            # Usa send_text_in_parts para parecer mais natural se for longo
-            self.evolution.send_text_in_parts(phone, message_text)
+            # Envio em partes para parecer mais natural se for longo.
+            # Aguarda só a primeira parte (lead alcançado); as demais seguem em segundo
+            # plano, intercaladas com os envios para outros leads.
+            ticket = self.evolution.send_text_in_parts_async(phone, message_text)
+            first_part = ticket.first.result()
+            ticket.done.add_done_callback(lambda done: self._log_incomplete_send(phone, done))
             
             # 4. Logs e Atualizações
-            self.db.log_message(lead["id"], "outbound", message_text)
+            # Recibos de entrega/leitura chegam pela primeira parte
+            self.db.log_message(lead["id"], "outbound", message_text, message_id=self.evolution.message_id(first_part))
             self.lead_service.mark_as_contacted(lead["id"], template_id)
             
             # Agenda follow-up automático para daqui 2 dias (exemplo)
             self.lead_service.schedule_followup(lead["id"], days=2)
             
             # 5. Trello Integration
-            trello_service.create_lead_card(lead)
+            trello_service.enqueue("create_lead_card", lead)
             
             logger.info(f"Primeiro contato enviado para {phone} (Template {template_id})")
             return True
@@ -82,9 +91,9 @@ class MessageService:
             text = f"{nome}, essa é minha última tentativa. Caso faça sentido no futuro, estou à disposição."
 
         try:
-            self.evolution.send_text_message(phone, text)
+            response = self.evolution.send_text_message(phone, text)
             
-            self.db.log_message(lead["id"], "outbound", text)
+            self.db.log_message(lead["id"], "outbound", text, message_id=self.evolution.message_id(response))
             
             # Se for o último follow-up, talvez não agende o próximo ou mude status
             if followup_number < 3:
@@ -103,8 +112,9 @@ class MessageService:
         """
         Processa mensagens recebidas (Webhook).
         """
-        # Verifica se é um lead nosso
-        lead = self.db.get_lead_by_phone(phone)
+        # Verifica se é um lead nosso (cache local; inclui números que não são leads).
+        # O status do cache pode estar defasado: as transições abaixo são condicionais no banco
+        lead = self.db.find_lead_by_phone(phone)
         
         if not lead:
             logger.info(f"Mensagem recebida de desconhecido {phone}. Ignorando processamento de lead.")
@@ -113,21 +123,43 @@ class MessageService:
         # Loga a mensagem inbound
         self.db.log_message(lead["id"], "inbound", content)
         
-        # Palavras de parada (Stop words)
-        content_lower = content.lower()
-        stop_words = ["pare", "stop", "nao quero", "não quero", "remover", "sair"]
+        # Palavras de parada (Stop words, config/keywords.py)
+        rule = self.stop_matcher.match(content)
         
-        if any(w in content_lower for w in stop_words):
-            self.lead_service.mark_as_declined(lead["id"])
-            trello_service.on_lead_declined(lead, reason="Solicitou parada (Stop word)")
-            logger.info(f"Lead {phone} solicitou parada.")
+        if rule:
+            if self.lead_service.mark_as_declined(lead["id"]):
+                trello_service.enqueue("lead_declined", lead, reason=f"Solicitou parada (Stop word: '{rule.keyword}')")
+            logger.info(f"Lead {phone} solicitou parada ('{rule.keyword}').")
             return
 
-        # Se respondeu qualquer outra coisa, marcamos como respondido (Handover)
-        if lead["status"] not in ["responded", "declined", "converted"]:
-            self.lead_service.mark_as_responded(lead["id"])
-            trello_service.on_lead_responded(lead)
-            logger.info(f"Lead {phone} respondeu. Status atualizado para 'responded'.")
+        # Se respondeu qualquer outra coisa, marcamos como respondido (Handover).
+        # O filtro pelo status do cache evita a escrita no caso comum; o update condicional
+        # garante que um status final gravado por outro processo não é sobrescrito
+        if lead["status"] not in RESPONSE_FINAL_STATUSES:
+            if self.lead_service.mark_as_responded(lead["id"]):
+                trello_service.enqueue("lead_responded", lead)
+                logger.info(f"Lead {phone} respondeu. Status atualizado para 'responded'.")
+            else:
+                logger.info(f"Lead {phone} respondeu, mas já estava em status final. Nada a atualizar.")
+
+    def handle_status_update(self, message_id: str, status: str) -> bool:
+        """
+        Processa recibo de entrega/leitura (Webhook messages.update).
+        """
+        try:
+            updated = self.db.update_message_status(message_id, status)
+        except Exception as e:
+            logger.error(f"Erro ao registrar status '{status}' da mensagem {message_id}: {e}")
+            return False
+
+        if updated:
+            logger.debug(f"Mensagem {message_id}: {status}")
+        return updated
+
+    def _log_incomplete_send(self, phone: str, done: Future):
+        """Registra falha nas partes enviadas em segundo plano."""
+        if done.exception():
+            logger.error(f"Mensagem para {phone} incompleta (partes restantes falharam): {done.exception()}")
 
     def _check_exists_in_chatwoot(self, phone: str) -> bool:
         """Verifica se o contato já existe no Chatwoot."""
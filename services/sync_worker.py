@@ -0,0 +1,128 @@
+import os
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Any, Optional
+from config.settings import (
+    SYNC_BATCH_SIZE,
+    SYNC_MAX_WORKERS,
+    SYNC_MAX_ATTEMPTS,
+    SYNC_BACKOFF_SECONDS,
+    SYNC_LEASE_SECONDS
+)
+from integrations.supabase_client import supabase
+from services.trello_service import trello_service
+from utils.logger import logger
+
+# handler(action, payload) -> None; deve lançar exceção em caso de falha
+SyncHandler = Callable[[str, Dict[str, Any]], None]
+
+class SyncWorker:
+    """
+    Consumidor da tabela sync_queue (entrega at-least-once).
+    Reivindica lotes de tarefas das integrações registradas, executa os handlers
+    com concorrência limitada, registra tentativas com backoff exponencial e
+    move para 'dead' as tarefas que esgotam as tentativas.
+    """
+
+    def __init__(
+        self,
+        db,
+        batch_size: int = SYNC_BATCH_SIZE,
+        max_workers: int = SYNC_MAX_WORKERS,
+        max_attempts: int = SYNC_MAX_ATTEMPTS,
+        backoff_seconds: int = SYNC_BACKOFF_SECONDS,
+        lease_seconds: int = SYNC_LEASE_SECONDS,
+        worker_id: Optional[str] = None
+    ):
+        self.db = db
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.lease_seconds = lease_seconds
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.handlers: Dict[str, SyncHandler] = {}
+
+    def register(self, integration: str, handler: SyncHandler):
+        """Registra o handler de uma integração (ex: 'trello')."""
+        self.handlers[integration] = handler
+
+    def run_once(self) -> Dict[str, int]:
+        """Processa um lote de tarefas. Retorna contadores do lote."""
+        stats = {"claimed": 0, "done": 0, "retry": 0, "dead": 0}
+        if not self.handlers or not self.db:
+            return stats
+
+        try:
+            jobs = self.db.claim_sync_jobs(self.worker_id, list(self.handlers), self.batch_size, self.lease_seconds)
+        except Exception as e:
+            logger.error(f"Erro ao buscar tarefas da fila de sync: {e}")
+            return stats
+
+        stats["claimed"] = len(jobs)
+        if not jobs:
+            return stats
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(jobs))) as pool:
+            for outcome in pool.map(self._process, jobs):
+                stats[outcome] += 1
+
+        logger.info(
+            f"Fila de sync: {stats['done']} concluídas, {stats['retry']} reagendadas, "
+            f"{stats['dead']} em dead-letter (de {stats['claimed']})."
+        )
+        return stats
+
+    def run_forever(self, poll_interval: int = 30):
+        """Loop contínuo: processa lotes enquanto houver tarefas, depois aguarda."""
+        logger.info(f"Worker da fila de sync iniciado ({self.worker_id}): {', '.join(self.handlers)}")
+        while True:
+            stats = self.run_once()
+            if stats["claimed"] < self.batch_size:
+                time.sleep(poll_interval)
+
+    def _process(self, job: Dict[str, Any]) -> str:
+        job_id = job["id"]
+        integration = job.get("integration")
+        action = job.get("action")
+        attempts = job.get("attempts") or 1
+
+        try:
+            self.handlers[integration](action, job.get("payload") or {})
+        except Exception as e:
+            return self._fail(job_id, f"{integration}/{action}", attempts, e)
+
+        try:
+            self.db.complete_sync_job(job_id)
+        except Exception as e:
+            # O lock vence e a tarefa é reprocessada (at-least-once)
+            logger.error(f"Tarefa {job_id} executada mas não marcada como concluída: {e}")
+        return "done"
+
+    def _fail(self, job_id: int, name: str, attempts: int, error: Exception) -> str:
+        if attempts >= self.max_attempts:
+            next_attempt_at = None
+            outcome = "dead"
+            logger.error(f"Tarefa {job_id} ({name}) movida para dead-letter após {attempts} tentativas: {error}")
+        else:
+            delay = self.backoff_seconds * (2 ** (attempts - 1))
+            next_attempt_at = (datetime.utcnow() + timedelta(seconds=delay)).isoformat()
+            outcome = "retry"
+            logger.warning(f"Tarefa {job_id} ({name}) falhou (tentativa {attempts}), nova tentativa em {delay}s: {error}")
+
+        try:
+            self.db.fail_sync_job(job_id, str(error), next_attempt_at)
+        except Exception as e:
+            logger.error(f"Erro ao registrar falha da tarefa {job_id}: {e}")
+        return outcome
+
+def create_sync_worker() -> SyncWorker:
+    """Cria o worker com os handlers de todas as integrações conhecidas."""
+    worker = SyncWorker(supabase)
+    worker.register("trello", trello_service.handle_sync_action)
+    return worker
+
+# Instância global
+sync_worker = create_sync_worker()
@@ -3,6 +3,7 @@ from typing import Dict, Any, Optional
 from datetime import datetime
 from integrations.trello import trello_client
 from integrations.supabase_client import supabase
+from integrations.models import Lead
 from config.settings import (
     TRELLO_LIST_COLD,
     TRELLO_LIST_CONNECTION,
@@ -70,42 +71,52 @@ class TrelloService:
             logger.error(f"Erro no create_lead_card para lead {lead.get('id')}: {e}")
             return None
 
-    def on_lead_responded(self, lead: Dict[str, Any]):
+    def on_lead_responded(self, lead: Dict[str, Any], at: Optional[datetime] = None) -> bool:
         """
         Move card de COLD para CONNECTION quando lead responde.
         """
-        card_id = self._get_card_id(lead)
-        if not card_id or not TRELLO_LIST_CONNECTION:
-            return
+        at = at or datetime.now()
+        return self._move_lead_card(
+            lead, TRELLO_LIST_CONNECTION,
+            f"Cliente respondeu em {at.strftime('%d/%m/%Y %H:%M')}"
+        )
 
-        if self.client.move_card(card_id, TRELLO_LIST_CONNECTION):
-            self.client.add_comment(card_id, f"Cliente respondeu em {datetime.now().strftime('%d/%m/%Y %H:%M')}")
-
-    def on_lead_interested(self, lead: Dict[str, Any]):
+    def on_lead_interested(self, lead: Dict[str, Any]) -> bool:
         """
         Move card para INTERESTED.
         """
-        card_id = self._get_card_id(lead)
-        if not card_id or not TRELLO_LIST_INTERESTED:
-            return
-
-        if self.client.move_card(card_id, TRELLO_LIST_INTERESTED):
-            self.client.add_comment(card_id, "Cliente demonstrou interesse!")
+        return self._move_lead_card(lead, TRELLO_LIST_INTERESTED, "Cliente demonstrou interesse!")
 
-    def on_lead_declined(self, lead: Dict[str, Any], reason: str = "Desconhecido"):
+    def on_lead_declined(self, lead: Dict[str, Any], reason: str = "Desconhecido") -> bool:
         """
         Move card para ARCHIVED.
         """
+        # Opcional: Arquivar de fato (sumir da lista) ou deixar na lista 'Arquivados'
+        # Users request: "Move card to ARCHIVED" -> lista visual.
+        # Também podemos chamar self.client.archive_card(card_id) se quiser sumir com ele.
+        # Vamos manter na lista visual por enquanto.
+        return self._move_lead_card(
+            lead, TRELLO_LIST_ARCHIVED,
+            f"Cliente recusou ou pediu para parar. Motivo: {reason}"
+        )
+
+    def _move_lead_card(self, lead: Dict[str, Any], list_id: Optional[str], comment: str) -> bool:
+        """
+        Move o card do lead e comenta.
+        Retorna True se concluído (ou lista não configurada) e False se o card
+        não foi encontrado ou não pôde ser movido.
+        """
+        if not list_id:
+            return True
+
         card_id = self._get_card_id(lead)
-        if not card_id or not TRELLO_LIST_ARCHIVED:
-            return
+        if not card_id:
+            return False
 
-        if self.client.move_card(card_id, TRELLO_LIST_ARCHIVED):
-            self.client.add_comment(card_id, f"Cliente recusou ou pediu para parar. Motivo: {reason}")
-            # Opcional: Arquivar de fato (sumir da lista) ou deixar na lista 'Arquivados'
-            # Users request: "Move card to ARCHIVED" -> lista visual.
-            # Também podemos chamar self.client.archive_card(card_id) se quiser sumir com ele.
-            # Vamos manter na lista visual por enquanto.
+        if self.client.move_card(card_id, list_id):
+            self.client.add_comment(card_id, comment)
+            return True
+        return False
 
     def _get_card_id(self, lead: Dict[str, Any]) -> Optional[str]:
         """Recupera ID do card do lead, buscando no Trello se não tiver no DB."""
@@ -116,7 +127,8 @@ class TrelloService:
         # 2. Se não tem, tenta buscar no Trello pelo telefone
         phone = lead.get("phone")
         if phone:
-            card_id = self.client.find_card_by_desc_term(phone)
+            card = self.client.find_card_by_desc_term(phone)
+            card_id = card.get("id") if card else None
             if card_id:
                 # Atualiza DB para evitar busca futura
                 try:
@@ -126,12 +138,77 @@ class TrelloService:
         
         return None
 
-    def sync_pending_actions(self):
+    def enqueue(self, action: str, lead: Dict[str, Any], **extra: Any):
+        """
+        Agenda uma ação do Trello na sync_queue, tirando a chamada HTTP do caminho
+        de envio/webhook. Ações: create_lead_card, lead_responded, lead_interested, lead_declined.
+        """
+        payload = {
+            "lead": lead.to_dict() if isinstance(lead, Lead) else dict(lead),
+            "queued_at": datetime.now().isoformat(),
+            **extra
+        }
+        try:
+            self.db.add_to_sync_queue("trello", action, payload)
+        except Exception as e:
+            logger.error(f"Erro ao enfileirar ação Trello '{action}' para lead {lead.get('id')}: {e}")
+
+    def handle_sync_action(self, action: str, payload: Dict[str, Any]):
+        """
+        Executa uma ação da sync_queue (handler do SyncWorker).
+        Lança exceção em caso de falha para que a tarefa seja tentada novamente.
+        """
+        lead = payload.get("lead") or {}
+
+        if action == "create_lead_card":
+            # Entrega at-least-once: não duplica o card se uma tentativa anterior já o criou
+            if not TRELLO_LIST_COLD or self._get_card_id(lead):
+                return
+            if not self.create_lead_card(lead):
+                raise RuntimeError(f"Falha ao criar card para lead {lead.get('id')}")
+            return
+
+        if action == "lead_responded":
+            queued_at = payload.get("queued_at")
+            ok = self.on_lead_responded(lead, at=datetime.fromisoformat(queued_at) if queued_at else None)
+        elif action == "lead_interested":
+            ok = self.on_lead_interested(lead)
+        elif action == "lead_declined":
+            ok = self.on_lead_declined(lead, reason=payload.get("reason", "Desconhecido"))
+        else:
+            raise ValueError(f"Ação Trello desconhecida: {action}")
+
+        if not ok:
+            # Ex: card ainda não criado (create_lead_card pendente na fila)
+            raise RuntimeError(f"Card do lead {lead.get('id')} não encontrado ou não movido")
+
+    def sync_all_leads_with_trello(self) -> Dict[str, int]:
+        """
+        Vincula leads sem trello_card_id aos cards já existentes no board (busca pelo telefone).
+        Percorre a tabela em páginas (iter_leads), sem carregar todos os leads em memória.
+        """
+        stats = {"total": 0, "linked": 0, "not_found": 0}
+
+        for page in self.db.iter_leads({"trello_card_id": None}, view=("id", "phone")):
+            for lead in page:
+                stats["total"] += 1
+                if self._get_card_id(lead):
+                    stats["linked"] += 1
+                else:
+                    stats["not_found"] += 1
+
+        logger.info(
+            f"Sync Trello: {stats['linked']} leads vinculados, "
+            f"{stats['not_found']} sem card (de {stats['total']})."
+        )
+        return stats
+
+    def sync_pending_actions(self) -> Dict[str, int]:
         """
-        Placeholder para retries.
-        Pode ler de uma tabela 'sync_queue' no BD.
+        Processa um lote das ações do Trello pendentes na tabela 'sync_queue'.
         """
-        pass
+        from services.sync_worker import sync_worker
+        return sync_worker.run_once()
 
 # Instância global
 trello_service = TrelloService()
@@ -0,0 +1,3 @@
+-- Garante unicidade do telefone em leads.
+-- Necessário para o upsert em lote (on_conflict=phone) usado nas importações.
+create unique index if not exists leads_phone_key on leads (phone);
@@ -0,0 +1,50 @@
+-- Reserva atômica de envio sobre o singleton agent_state.
+-- Um único UPDATE condicional incrementa messages_sent_today somente se o limite
+-- do dia ainda não foi atingido, tratando a virada do dia na mesma operação.
+-- O lock de linha do UPDATE serializa processos concorrentes.
+
+create or replace function reserve_send_slot(p_day date, p_limit integer)
+returns integer
+language plpgsql
+as $$
+declare
+  v_count integer;
+begin
+  if not exists (select 1 from agent_state) then
+    insert into agent_state (messages_sent_today, current_day, last_active, updated_at)
+    values (0, p_day, now(), now());
+  end if;
+
+  update agent_state
+     set messages_sent_today = case when current_day::date = p_day then messages_sent_today + 1 else 1 end,
+         current_day = p_day,
+         last_active = now(),
+         updated_at = now()
+   where id = (select id from agent_state order by id limit 1)
+     and (case when current_day::date = p_day then messages_sent_today else 0 end) < p_limit
+  returning messages_sent_today into v_count;
+
+  -- null quando o limite do dia já foi atingido
+  return v_count;
+end;
+$$;
+
+-- Devolve uma reserva não utilizada (envio falhou). Não afeta o contador de outro dia.
+create or replace function release_send_slot(p_day date)
+returns integer
+language plpgsql
+as $$
+declare
+  v_count integer;
+begin
+  update agent_state
+     set messages_sent_today = messages_sent_today - 1,
+         updated_at = now()
+   where id = (select id from agent_state order by id limit 1)
+     and current_day::date = p_day
+     and messages_sent_today > 0
+  returning messages_sent_today into v_count;
+
+  return v_count;
+end;
+$$;
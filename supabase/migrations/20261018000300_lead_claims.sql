@@ -0,0 +1,38 @@
+-- Fila de leads com reivindicação (claim) em lote e lease.
+-- Vários processos do scheduler podem puxar trabalho sem pegar o mesmo lead:
+-- FOR UPDATE SKIP LOCKED pula linhas já travadas por outra transação e o lease
+-- (lease_expires_at) devolve automaticamente à fila os leads não utilizados.
+
+alter table leads add column if not exists claimed_by text;
+alter table leads add column if not exists lease_expires_at timestamptz;
+
+create index if not exists leads_due_new_idx on leads (created_at) where status = 'new';
+create index if not exists leads_due_followup_idx on leads (next_contact_at) where status = 'follow_up_scheduled';
+
+create or replace function claim_leads(p_worker text, p_limit integer, p_lease_seconds integer)
+returns setof leads
+language sql
+as $$
+  with due as (
+    select id
+      from leads
+     where (status = 'new' or (status = 'follow_up_scheduled' and next_contact_at <= now()))
+       and (lease_expires_at is null or lease_expires_at < now())
+     order by case when status = 'new' then 0 else 1 end,
+              case when status = 'new' then created_at else next_contact_at end
+     limit p_limit
+     for update skip locked
+  ),
+  claimed as (
+    update leads l
+       set claimed_by = p_worker,
+           lease_expires_at = now() + make_interval(secs => p_lease_seconds)
+      from due
+     where l.id = due.id
+    returning l.*
+  )
+  select *
+    from claimed
+   order by case when status = 'new' then 0 else 1 end,
+            case when status = 'new' then created_at else next_contact_at end;
+$$;
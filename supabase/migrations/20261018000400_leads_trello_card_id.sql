@@ -0,0 +1,2 @@
+-- Coluna usada pelo TrelloService e pela consulta compacta do webhook (find_lead_by_phone).
+alter table leads add column if not exists trello_card_id text;
@@ -0,0 +1,40 @@
+-- Consumo durável da sync_queue (entrega at-least-once).
+-- status: pending -> processing -> done | pending (nova tentativa) | dead (dead-letter)
+
+alter table sync_queue add column if not exists attempts integer not null default 0;
+alter table sync_queue add column if not exists next_attempt_at timestamptz;
+alter table sync_queue add column if not exists locked_by text;
+alter table sync_queue add column if not exists locked_until timestamptz;
+alter table sync_queue add column if not exists last_error text;
+alter table sync_queue add column if not exists processed_at timestamptz;
+
+create index if not exists sync_queue_due_idx on sync_queue (integration, status, next_attempt_at, created_at);
+
+-- Reivindica um lote de tarefas prontas. Tarefas em 'processing' com lock vencido
+-- (worker caiu no meio) voltam a ser elegíveis.
+create or replace function claim_sync_jobs(p_worker text, p_integrations text[], p_limit integer, p_lease_seconds integer)
+returns setof sync_queue
+language sql
+as $$
+  with due as (
+    select id
+      from sync_queue
+     where integration = any(p_integrations)
+       and ((status = 'pending' and (next_attempt_at is null or next_attempt_at <= now()))
+            or (status = 'processing' and locked_until < now()))
+     order by created_at
+     limit p_limit
+     for update skip locked
+  ),
+  claimed as (
+    update sync_queue q
+       set status = 'processing',
+           locked_by = p_worker,
+           locked_until = now() + make_interval(secs => p_lease_seconds),
+           attempts = q.attempts + 1
+      from due
+     where q.id = due.id
+    returning q.*
+  )
+  select * from claimed order by created_at;
+$$;
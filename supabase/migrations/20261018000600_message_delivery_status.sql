@@ -0,0 +1,10 @@
+-- Recibos de entrega/leitura (webhook messages.update da Evolution).
+-- message_id é a key.id devolvida pelo sendText; o webhook localiza a linha por ele.
+alter table message_logs add column if not exists message_id text;
+alter table message_logs add column if not exists delivery_status text;
+alter table message_logs add column if not exists delivered_at timestamptz;
+alter table message_logs add column if not exists read_at timestamptz;
+
+create index if not exists message_logs_message_id_idx
+    on message_logs (message_id)
+    where message_id is not null;
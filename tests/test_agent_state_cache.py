@@ -0,0 +1,53 @@
+import unittest
+from unittest.mock import MagicMock
+import sys
+from pathlib import Path
+
+# Add project root
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from core.agent_state import AgentStateCache
+
+class TestAgentStateCache(unittest.TestCase):
+
+    def setUp(self):
+        self.db = MagicMock()
+        self.db.get_agent_state.return_value = {"id": 1, "messages_sent_today": 2, "current_day": "2026-01-05"}
+        self.db.update_agent_state.side_effect = lambda data: {"id": 1, **data}
+        # Intervalo alto: os testes chamam flush() explicitamente
+        self.cache = AgentStateCache(self.db, ttl_seconds=3600, flush_interval=3600)
+
+    def test_reads_are_served_locally(self):
+        self.cache.get()
+        self.cache.get()
+        self.assertEqual(self.db.get_agent_state.call_count, 1)
+
+    def test_updates_are_coalesced_into_one_write(self):
+        self.cache.increment("messages_sent_today")
+        self.cache.update({"last_active": "t1"})
+        self.cache.update({"last_heartbeat": "t2"})
+        self.cache.increment("messages_sent_today")
+
+        self.assertEqual(self.cache.get()["messages_sent_today"], 4)
+        self.db.update_agent_state.assert_not_called()
+
+        self.cache.flush()
+
+        self.db.update_agent_state.assert_called_once_with(
+            {"messages_sent_today": 4, "last_active": "t1", "last_heartbeat": "t2"}
+        )
+        self.cache.flush()
+        self.assertEqual(self.db.update_agent_state.call_count, 1)
+
+    def test_failed_flush_keeps_pending_fields(self):
+        self.db.update_agent_state.side_effect = Exception("timeout")
+        self.cache.update({"last_active": "t1"})
+        self.cache.flush()
+        self.cache._timer.cancel()
+
+        self.db.update_agent_state.side_effect = lambda data: {"id": 1, **data}
+        self.cache.flush()
+        self.assertEqual(self.db.update_agent_state.call_args[0][0], {"last_active": "t1"})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+from unittest.mock import MagicMock
+import sys
+from pathlib import Path
+
+# Add project root
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from integrations.supabase_client import SupabaseClient
+from utils.cache import TTLCache
+
+class TestBulkUpsertLeads(unittest.TestCase):
+
+    def setUp(self):
+        # Evita o __init__ (credenciais); só precisamos do client mockado
+        self.db = SupabaseClient.__new__(SupabaseClient)
+        self.db.client = MagicMock()
+        self.db.lead_cache = TTLCache()
+        self.table = self.db.client.table.return_value
+
+    def test_outcomes_keep_input_order(self):
+        # Pré-carregamento: 5511 já existe
+        self.table.select.return_value.in_.return_value.execute.return_value.data = [
+            {"id": "lead_1", "phone": "5511"}
+        ]
+        # Insert: 5522 criado, 5533 ignorado (inserido por outro processo)
+        self.table.upsert.return_value.select.return_value.execute.return_value.data = [
+            {"id": "lead_2", "phone": "5522"}
+        ]
+
+        outcomes = self.db.bulk_upsert_leads([
+            {"phone": "5511"},
+            {"phone": "5522"},
+            {"phone": "5522"},
+            {"phone": "5533"},
+            {"phone": ""},
+        ])
+
+        self.assertEqual(
+            [o["status"] for o in outcomes],
+            ["existing", "created", "duplicate", "existing", "error"]
+        )
+        self.assertEqual(outcomes[1]["lead"]["id"], "lead_2")
+
+        # Apenas a primeira ocorrência de cada telefone novo vai para o insert
+        inserted = self.table.upsert.call_args[0][0]
+        self.assertEqual([row["phone"] for row in inserted], ["5522", "5533"])
+        self.assertEqual(self.table.upsert.call_args[1]["on_conflict"], "phone")
+
+    def test_batches_respect_batch_size(self):
+        self.table.select.return_value.in_.return_value.execute.return_value.data = []
+        self.table.upsert.return_value.select.return_value.execute.side_effect = lambda: MagicMock(
+            data=[{"id": row["phone"], "phone": row["phone"]} for row in self.table.upsert.call_args[0][0]]
+        )
+
+        leads = [{"phone": f"55{i}"} for i in range(5)]
+        outcomes = self.db.bulk_upsert_leads(leads, batch_size=2)
+
+        self.assertEqual(self.table.upsert.call_count, 3)
+        self.assertTrue(all(o["status"] == "created" for o in outcomes))
+
+if __name__ == '__main__':
+    unittest.main()
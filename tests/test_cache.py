@@ -0,0 +1,88 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+import sys
+from pathlib import Path
+
+# Add project root
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from utils.cache import TTLCache
+
+class TestTTLCache(unittest.TestCase):
+
+    def test_lru_eviction(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")       # "a" passa a ser o mais recente
+        cache.set("c", 3)    # remove "b"
+
+        self.assertEqual(cache.get("a"), (True, 1))
+        self.assertEqual(cache.get("b"), (False, None))
+
+    def test_negative_entries_use_their_own_ttl(self):
+        cache = TTLCache(ttl=300, negative_ttl=10)
+        with patch("utils.cache.time.monotonic", return_value=0):
+            cache.set("lead", {"id": 1})
+            cache.set("desconhecido", None)
+
+        with patch("utils.cache.time.monotonic", return_value=11):
+            self.assertEqual(cache.get("lead"), (True, {"id": 1}))
+            self.assertEqual(cache.get("desconhecido"), (False, None))
+
+    def test_get_or_load_caches_misses(self):
+        cache = TTLCache()
+        calls = []
+        loader = lambda: calls.append(1)
+
+        self.assertIsNone(cache.get_or_load("5511", loader))
+        self.assertIsNone(cache.get_or_load("5511", loader))
+        self.assertEqual(len(calls), 1)
+
+    def test_concurrent_loads_share_one_request(self):
+        cache = TTLCache()
+        calls = []
+        started = threading.Event()
+
+        def slow_loader():
+            calls.append(1)
+            started.set()
+            time.sleep(0.1)
+            return {"id": 1}
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_load("5511", slow_loader))) for _ in range(5)]
+        threads[0].start()
+        started.wait()
+        for t in threads[1:]:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"id": 1}] * 5)
+
+    def test_errors_are_not_cached(self):
+        cache = TTLCache()
+
+        def failing():
+            raise ValueError("timeout")
+
+        with self.assertRaises(ValueError):
+            cache.get_or_load("5511", failing)
+        self.assertEqual(cache.get_or_load("5511", lambda: {"id": 2}), {"id": 2})
+
+    def test_invalidate_during_load_skips_caching(self):
+        cache = TTLCache()
+
+        def loader():
+            cache.invalidate("5511")  # ex: update_lead concorrente
+            return {"status": "new"}
+
+        cache.get_or_load("5511", loader)
+        self.assertEqual(cache.get("5511"), (False, None))
+
+if __name__ == '__main__':
+    unittest.main()
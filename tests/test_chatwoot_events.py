@@ -0,0 +1,84 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+from pathlib import Path
+
+# Add project root
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from integrations.chatwoot_index import ChatwootContactIndex
+from integrations.sqlite_client import SQLiteClient
+from services.chatwoot_events import ChatwootEventService
+
+class TestChatwootEvents(unittest.TestCase):
+
+    def setUp(self):
+        self.db = SQLiteClient(":memory:")
+        self.index = ChatwootContactIndex(":memory:")
+        self.lead = self.db.create_lead({"name": "Ana", "phone": "5545999881234", "status": "contacted"})
+
+        self.events = ChatwootEventService()
+        self.events.db = self.db
+        self.events.chatwoot = MagicMock(contact_index=self.index)
+        self.events.lead_service = MagicMock()
+        self.events.lead_service.mark_as_declined.side_effect = lambda lead_id: self.db.update_lead(lead_id, {"status": "declined"})
+
+        trello = patch("services.chatwoot_events.trello_service")
+        self.trello = trello.start()
+        self.addCleanup(trello.stop)
+
+    def _status(self):
+        return self.db.get_lead_by_phone("5545999881234")["status"]
+
+    def test_contact_created_updates_index_and_lead(self):
+        result = self.events.handle({"event": "contact_created", "id": 77, "phone_number": "+5545999881234", "name": "Ana"})
+
+        self.assertEqual(result, "processed")
+        self.assertEqual(self.index.lookup("5545999881234"), 77)
+        self.assertEqual(self.db.find_lead_by_phone("5545999881234")["chatwoot_id"], 77)
+
+    def test_incoming_decline_marks_lead_and_conversation(self):
+        self.events.handle({
+            "event": "message_created",
+            "message_type": "incoming",
+            "content": "Obrigado, mas NAO tenho interesse",
+            "created_at": 1760000000,
+            "conversation": {"id": 5, "status": "open", "meta": {"sender": {"id": 77, "phone_number": "+5545999881234"}}}
+        })
+
+        self.assertEqual(self._status(), "declined")
+        self.assertEqual(self.index.declined_keyword(77), "não tenho interesse")
+        self.trello.enqueue.assert_called_once()
+
+    def _status_changed(self, status, **extra):
+        self.events.handle({
+            "event": "conversation_status_changed",
+            "id": 5,
+            "status": status,
+            "meta": {"sender": {"id": 77, "phone_number": "+5545999881234"}, **extra.pop("meta", {})},
+            **extra
+        })
+
+    def test_status_change_by_agent_hands_lead_over(self):
+        self._status_changed("open", meta={"assignee": {"id": 3, "name": "Carla", "type": "user"}})
+
+        self.assertEqual(self._status(), "interacted_externally")
+        self.assertEqual(self.index.get_conversations(77)[0]["status"], "open")
+        self.assertEqual(self.events.handle({"event": "conversation_typing_on"}), "ignored")
+
+    def test_resolved_by_agent_hands_lead_over(self):
+        self._status_changed("resolved", performer={"id": 3, "type": "user"})
+        self.assertEqual(self._status(), "interacted_externally")
+
+    def test_auto_resolve_keeps_lead_in_flow(self):
+        # Auto-resolve por inatividade: sem autor humano, mesmo com atendente atribuído
+        self._status_changed("resolved", meta={"assignee": {"id": 3, "type": "user"}})
+        # Reabertura causada pela mensagem do próprio bot / por um agent bot
+        self._status_changed("open")
+        self._status_changed("open", performer={"id": 9, "type": "agent_bot"})
+
+        self.assertEqual(self._status(), "contacted")
+        self.assertEqual(self.index.get_conversations(77)[0]["status"], "open")
+
+if __name__ == '__main__':
+    unittest.main()
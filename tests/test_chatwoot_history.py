@@ -0,0 +1,69 @@
+import unittest
+from unittest.mock import MagicMock
+import sys
+from pathlib import Path
+
+# Add project root
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from integrations.chatwoot import ChatwootClient
+
+class TestConversationHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.chatwoot = ChatwootClient.__new__(ChatwootClient)
+        self.chatwoot.base_url = "http://chatwoot"
+        self.chatwoot.account_id = 1
+        self.chatwoot.headers = {}
+        self.chatwoot.session = MagicMock()
+
+        # 6 conversas; a conversa N tem mensagens em N*100 + (0..4)
+        conversations = [{"id": n, "last_activity_at": n * 100 + 4} for n in (2, 6, 1, 5, 3, 4)]
+        resp = MagicMock()
+        resp.json.return_value = {"payload": conversations}
+        self.chatwoot.session.get.return_value = resp
+
+        self.fetched = []
+
+        def messages(conv):
+            self.fetched.append(conv["id"])
+            return [{"content": f"{conv['id']}-{i}", "sender_type": "Contact", "created_at": conv["id"] * 100 + i}
+                    for i in range(5)]
+
+        self.chatwoot._get_conversation_messages = messages
+
+    def test_newest_messages_first_with_early_stop(self):
+        history = self.chatwoot.get_conversation_history(42, limit=6, max_workers=2)
+
+        self.assertEqual([m["content"] for m in history], ["6-4", "6-3", "6-2", "6-1", "6-0", "5-4"])
+        # Conversas 6 e 5 bastam: a leitura para após a primeira janela
+        self.assertEqual(sorted(self.fetched), [5, 6])
+
+    def test_reads_more_windows_when_needed(self):
+        history = self.chatwoot.get_conversation_history(42, limit=12, max_workers=2)
+
+        self.assertEqual(len(history), 12)
+        self.assertEqual(history[-1]["content"], "4-3")
+        self.assertEqual(sorted(self.fetched), [3, 4, 5, 6])
+
+class TestContactStreaming(unittest.TestCase):
+
+    def test_iter_contacts_prefetches_in_order(self):
+        chatwoot = ChatwootClient.__new__(ChatwootClient)
+        requested = []
+
+        def get_all_contacts(page):
+            requested.append(page)
+            return [{"id": page * 10 + i} for i in range(2)] if page <= 3 else []
+
+        chatwoot.get_all_contacts = get_all_contacts
+
+        contacts = [c["id"] for c in chatwoot.iter_contacts(prefetch=2)]
+
+        self.assertEqual(contacts, [10, 11, 20, 21, 30, 31])
+        # Para na primeira página vazia; no máximo `prefetch` páginas além dela
+        self.assertIn(4, requested)
+        self.assertLessEqual(max(requested), 5)
+
+if __name__ == '__main__':
+    unittest.main()
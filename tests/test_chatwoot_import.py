@@ -0,0 +1,317 @@
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+import sys
+from pathlib import Path
+
+# Add project root
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from integrations.sqlite_client import SQLiteClient
+from services.analysis_cache import AnalysisCache, history_key
+from services.conversation_classifier import ConversationPreClassifier
+from services.import_checkpoint import ImportCheckpoint
+from services.import_chatwoot import ChatwootImporter
+from services.llm_client import LLMResponse, StubLLMClient
+from utils.pipeline import Pipeline, Stage
+from utils.rate_limiter import RateLimiter
+
+class TestPipeline(unittest.TestCase):
+
+    def test_runs_all_stages_and_counts_errors(self):
+        def fail_on_seven(n):
+            if n == 7:
+                raise ValueError("boom")
+            return n * 10
+
+        stages = [Stage("double", lambda n: n * 2, workers=3), Stage("times_ten", fail_on_seven, workers=2)]
+        # 3.5 vira 7 na primeira etapa e falha na segunda
+        results = sorted(Pipeline(stages, queue_size=2, report_every=None).run([1, 2, 3.5, 4]))
+
+        self.assertEqual(results, [20, 40, 80])
+        self.assertEqual(stages[0].processed, 4)
+        self.assertEqual(stages[1].processed, 3)
+        self.assertEqual(stages[1].errors, 1)
+
+    def test_none_drops_item(self):
+        stages = [Stage("even", lambda n: n if n % 2 == 0 else None, workers=2)]
+        self.assertEqual(sorted(Pipeline(stages, report_every=None).run(range(6))), [0, 2, 4])
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_blocks_when_requests_exhausted(self):
+        limiter = RateLimiter(rpm=600)  # 10 por segundo, balde inicial de 600
+        limiter._requests = 1
+        limiter.acquire()
+        started = time.monotonic()
+        limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+
+    def test_token_budget(self):
+        limiter = RateLimiter(tpm=6000)  # 100 tokens por segundo
+        limiter.acquire(5990)
+        started = time.monotonic()
+        limiter.acquire(20)
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+        self.assertGreater(limiter.waited_seconds, 0)
+
+    def test_unlimited(self):
+        limiter = RateLimiter()
+        for _ in range(100):
+            limiter.acquire(10 ** 6)
+        self.assertEqual(limiter.waited_seconds, 0)
+
+class TestChatwootImport(unittest.TestCase):
+
+    def setUp(self):
+        self.db = SQLiteClient(":memory:")
+        self.db.create_lead({"name": "Existente", "phone": "5545999880000", "status": "new", "notes": "antiga"})
+
+        # 12 contatos em páginas de 4, do mais recente (atividade 1012) ao mais antigo
+        self.contacts = [
+            {"id": i, "name": f"Contato {i}", "phone_number": f"+55459998800{i:02d}", "last_activity_at": 1012 - i}
+            for i in range(12)
+        ]
+        self.chatwoot = MagicMock()
+        self.chatwoot.iter_contact_pages.side_effect = self._pages
+        self.chatwoot.get_conversation_history.side_effect = lambda contact_id: (
+            [] if contact_id == 5 else [{"sender_type": "Contact", "content": f"Oi {contact_id}"}]
+        )
+
+        self.llm = MagicMock(model="fake")
+        self.llm.complete.return_value = LLMResponse("Status: interessado\nResumo: Quer saber mais.", 50)
+
+        self.importer = ChatwootImporter.__new__(ChatwootImporter)
+        self.importer.chatwoot = self.chatwoot
+        self.importer.db = self.db
+        self.importer._llm = self.llm
+        self.importer.rate_limiter = RateLimiter()
+        self.importer.cache = None
+        self.importer.cache_stats = {"hits": 0, "misses": 0}
+        self.importer._stats_lock = threading.Lock()
+        self.importer.checkpoint = None
+        self.importer.preclassifier = None
+        self.importer.preclassified = {}
+
+    def _pages(self, start_page=1):
+        page = start_page
+        while self.contacts[(page - 1) * 4:page * 4]:
+            yield page, self.contacts[(page - 1) * 4:page * 4]
+            page += 1
+
+    def test_import_pipeline_writes_in_batches(self):
+        stats = self.importer.import_existing_leads(history_workers=3, llm_workers=4, write_batch_size=5, report_every=None)
+
+        self.assertEqual((stats["imported"], stats["updated"], stats["ignored"]), (11, 1, 0))
+        # Histórico vazio não chama o LLM
+        self.assertEqual(self.llm.complete.call_count, 11)
+
+        existing = self.db.get_lead_by_phone("5545999880000", view=("id", "notes", "status"))
+        self.assertTrue(existing["notes"].startswith("antiga\n\n[Import Bot] Status Anterior: interessado"))
+        self.assertEqual(existing["status"], "new")
+
+        created = self.db.get_lead_by_phone("5545999880003", view=("status", "chatwoot_id"))
+        self.assertEqual(created["status"], "working")
+        self.assertEqual(created["chatwoot_id"], 3)
+
+    def test_history_errors_are_ignored(self):
+        self.chatwoot.get_conversation_history.side_effect = RuntimeError("timeout")
+
+        stats = self.importer.import_existing_leads(history_workers=2, llm_workers=2, write_batch_size=5, report_every=None)
+
+        self.assertEqual((stats["imported"], stats["updated"], stats["ignored"]), (0, 0, 12))
+
+    def test_analysis_parses_stub_and_invalid_output(self):
+        self.importer._llm = StubLLMClient(latency_seconds=0)
+        analysis = self.importer.analyze_history([{"sender_type": "User", "content": "Olá"}])
+        self.assertIn(analysis["status"], StubLLMClient.STATUSES)
+
+        self.llm.complete.return_value = LLMResponse("Não sei", 10)
+        self.importer._llm = self.llm
+        self.assertEqual(self.importer.analyze_history([{"sender_type": "User", "content": "Olá"}])["status"], "manual_review")
+
+    def test_cache_skips_llm_for_unchanged_history(self):
+        self.importer.cache = AnalysisCache(":memory:")
+        history = [{"sender_type": "Contact", "content": "Tenho  interesse"}]
+
+        first = self.importer.analyze_history(history)
+        # Mesmo conteúdo com espaços diferentes reaproveita a análise
+        second = self.importer.analyze_history([{"sender_type": "Contact", "content": " Tenho interesse "}])
+        changed = self.importer.analyze_history(history + [{"sender_type": "User", "content": "Ótimo!"}])
+
+        self.assertEqual(first, second)
+        self.assertEqual(changed["status"], "interessado")
+        self.assertEqual(self.llm.complete.call_count, 2)
+        self.assertEqual(self.importer.cache_stats, {"hits": 1, "misses": 2})
+
+    def test_cache_key_depends_on_prompt_version_and_model(self):
+        history = [{"sender_type": "Contact", "content": "Oi"}]
+        self.assertNotEqual(history_key(history, "1", "gpt-4o-mini"), history_key(history, "2", "gpt-4o-mini"))
+        self.assertNotEqual(history_key(history, "1", "gpt-4o-mini"), history_key(history, "1", "stub"))
+
+    def test_unparsable_analysis_is_not_cached(self):
+        self.importer.cache = AnalysisCache(":memory:")
+        self.llm.complete.return_value = LLMResponse("???", 5)
+
+        self.importer.analyze_history([{"sender_type": "Contact", "content": "Oi"}])
+
+        self.assertEqual(len(self.importer.cache), 0)
+
+    def test_incremental_run_stops_at_watermark(self):
+        checkpoint = ImportCheckpoint(":memory:")
+        self.importer.checkpoint = checkpoint
+
+        self.importer.import_existing_leads(write_batch_size=5, report_every=None)
+        self.assertEqual(checkpoint.get_watermark(), 1012)
+        self.assertIsNone(checkpoint.load_run())
+
+        # Dois contatos tiveram atividade nova desde a última execução
+        self.contacts[6]["last_activity_at"] = 2000
+        self.contacts[9]["last_activity_at"] = 1500
+        self.contacts.sort(key=lambda c: -c["last_activity_at"])
+        self.llm.complete.reset_mock()
+        self.llm.complete.return_value = LLMResponse("Status: interessado\nResumo: Pediu proposta.", 50)
+
+        stats = self.importer.import_existing_leads(write_batch_size=5, report_every=None, incremental=True)
+
+        self.assertEqual((stats["imported"], stats["updated"]), (0, 2))
+        self.assertEqual(self.llm.complete.call_count, 2)
+        self.assertEqual(checkpoint.get_watermark(), 2000)
+
+    def test_interrupted_run_resumes_after_last_written_page(self):
+        checkpoint = ImportCheckpoint(":memory:")
+        self.importer.checkpoint = checkpoint
+
+        # Falha fatal ao buscar a página 3: páginas 1 e 2 já foram gravadas
+        def failing_pages(start_page=1):
+            for page, contacts in self._pages(start_page):
+                if page == 3:
+                    raise RuntimeError("Chatwoot fora do ar")
+                yield page, contacts
+        self.chatwoot.iter_contact_pages.side_effect = failing_pages
+
+        with self.assertRaises(RuntimeError):
+            self.importer.import_existing_leads(write_batch_size=2, report_every=None)
+        run = checkpoint.load_run()
+        self.assertEqual((run["page"], run["last_contact_id"]), (2, 7))
+
+        self.chatwoot.iter_contact_pages.side_effect = self._pages
+        self.llm.complete.reset_mock()
+        stats = self.importer.import_existing_leads(write_batch_size=2, report_every=None)
+
+        self.chatwoot.iter_contact_pages.assert_called_with(start_page=3)
+        self.assertEqual(stats["imported"], 4)
+        self.assertEqual(self.llm.complete.call_count, 4)
+        self.assertIsNone(checkpoint.load_run())
+
+    def test_preclassifier_short_circuits_llm(self):
+        self.importer.preclassifier = ConversationPreClassifier()
+        # Contato 0: só mensagem nossa; contato 1: recusa; demais: conversa recente ambígua
+        histories = {
+            0: [{"sender_type": "User", "content": "Olá, tudo bem?", "created_at": time.time()}],
+            1: [{"sender_type": "Contact", "content": "Não tenho interesse, obrigado", "created_at": time.time()}],
+        }
+        self.chatwoot.get_conversation_history.side_effect = lambda contact_id: histories.get(
+            contact_id, [{"sender_type": "Contact", "content": "Quanto custa?", "created_at": time.time()}]
+        )
+
+        stats = self.importer.import_existing_leads(write_batch_size=5, report_every=None)
+
+        self.assertEqual(stats["preclassified"], 2)
+        self.assertEqual(self.importer.preclassified, {"recusa": 1, "sem_resposta": 1})
+        self.assertEqual(self.llm.complete.call_count, 10)
+        declined = self.db.get_lead_by_phone("5545999880001", view=("status", "notes"))
+        self.assertEqual(declined["status"], "lost")
+        self.assertIn("recusou", declined["notes"])
+
+    def test_failed_contact_is_retried_after_watermark_moves(self):
+        checkpoint = ImportCheckpoint(":memory:")
+        self.importer.checkpoint = checkpoint
+        history = [{"sender_type": "Contact", "content": "Oi"}]
+        failures = {3}
+
+        def flaky_history(contact_id):
+            if contact_id in failures:
+                failures.discard(contact_id)
+                raise RuntimeError("timeout")
+            return history
+        self.chatwoot.get_conversation_history.side_effect = flaky_history
+
+        stats = self.importer.import_existing_leads(write_batch_size=5, report_every=None)
+        self.assertEqual(stats["ignored"], 1)
+        self.assertEqual(checkpoint.get_watermark(), 1012)
+        self.assertIsNone(self.db.get_lead_by_phone("5545999880003"))
+
+        # Nada novo desde o watermark, mas o contato que falhou volta na execução seguinte
+        stats = self.importer.import_existing_leads(write_batch_size=5, report_every=None, incremental=True)
+
+        self.assertEqual(stats["imported"], 1)
+        self.assertIsNotNone(self.db.get_lead_by_phone("5545999880003"))
+        self.assertEqual(checkpoint.load_retries(), [])
+
+    def test_resume_skips_written_contacts_and_does_not_duplicate_notes(self):
+        checkpoint = ImportCheckpoint(":memory:")
+        self.importer.checkpoint = checkpoint
+        # Página 1 (contatos 0-3) gravada; contato 4 da página 2 também, antes da queda
+        self.importer.import_existing_leads(write_batch_size=5, report_every=None)
+        checkpoint.save_run({"since": 0, "page": 1, "last_contact_id": 3, "max_activity": 1012, "started_at": "x"})
+        # Um contato novo entra no topo: o contato 3 (último gravado) desce para a página 2
+        self.contacts.insert(0, {"id": 99, "name": "Novo", "phone_number": "+5545999889999", "last_activity_at": 5000})
+        self.llm.complete.reset_mock()
+
+        stats = self.importer.import_existing_leads(write_batch_size=5, report_every=None)
+
+        # Página 2 retomada: [3, 4, 5, 6] sem o 3; contatos 4-11 já gravados não ganham nota repetida
+        self.assertEqual(self.chatwoot.iter_contact_pages.call_args.kwargs, {"start_page": 2})
+        self.assertEqual(self.llm.complete.call_count, 7)  # contato 5 não tem histórico
+        self.assertEqual((stats["imported"], stats["updated"], stats["unchanged"]), (0, 0, 8))
+        notes = self.db.get_lead_by_phone("5545999880004", view=("notes",))["notes"]
+        self.assertEqual(notes.count("[Import Bot]"), 1)
+
+    def test_page_tracker_waits_for_earlier_pages(self):
+        from services.import_chatwoot import _PageTracker
+        pages = _PageTracker(0)
+        pages.open(1, 2, 11)
+        pages.open(2, 1, 22)
+
+        pages.done(2)
+        self.assertIsNone(pages.advance())
+        pages.done(1)
+        pages.done(1)
+        self.assertEqual(pages.advance(), (2, 22))
+
+class TestConversationPreClassifier(unittest.TestCase):
+
+    def setUp(self):
+        self.classifier = ConversationPreClassifier(stale_days=180, min_confidence=0.8)
+        self.now = 1_800_000_000
+        self.day = 86400
+
+    def _msg(self, sender, content, days_ago=1):
+        return {"sender_type": sender, "content": content, "created_at": self.now - days_ago * self.day}
+
+    def test_single_outbound_without_reply(self):
+        result = self.classifier.classify([self._msg("User", "Olá!")], now=self.now)
+        self.assertEqual((result.status, result.rule), ("aguardando_resposta", "sem_resposta"))
+
+        old = self.classifier.classify([self._msg("User", "Olá!", days_ago=400)], now=self.now)
+        self.assertEqual(old.status, "conversa_fria")
+
+    def test_decline_only_conclusive_when_last_from_contact(self):
+        history = [self._msg("Contact", "No me interesa"), self._msg("User", "Hola!", 2)]
+        self.assertEqual(self.classifier.classify(history, now=self.now).status, "recusou")
+
+        # Voltou a conversar depois de recusar: ambíguo, vai para o LLM
+        history = [self._msg("Contact", "Na verdade, quanto custa?"), self._msg("Contact", "Não quero", 2)]
+        self.assertIsNone(self.classifier.classify(history, now=self.now))
+
+    def test_stale_and_ambiguous(self):
+        stale = [self._msg("Contact", "Vou pensar", days_ago=300), self._msg("User", "Proposta", days_ago=301)]
+        self.assertEqual(self.classifier.classify(stale, now=self.now).rule, "antiga")
+
+        recent = [self._msg("Contact", "Vou pensar"), self._msg("User", "Proposta", 2)]
+        self.assertIsNone(self.classifier.classify(recent, now=self.now))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+from unittest.mock import MagicMock
+import sys
+from pathlib import Path
+
+# Add project root
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from integrations.chatwoot import ChatwootClient
+from integrations.chatwoot_index import ChatwootContactIndex
+
+def contact(cid, phone, activity):
+    return {"id": cid, "phone_number": phone, "name": f"C{cid}", "last_activity_at": activity}
+
+class TestChatwootContactIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = ChatwootContactIndex(":memory:")
+        self.pages = {
+            1: [contact(3, "+55 45 99988-1234", 300), contact(2, "+5545988776655", 200)],
+            2: [contact(1, "+595981000111", 100), {"id": 9, "phone_number": None}],
+        }
+        self.fetched = []
+
+    def _fetch(self, page):
+        self.fetched.append(page)
+        return self.pages.get(page, [])
+
+    def test_seed_then_incremental_refresh(self):
+        self.index.sync(self._fetch)
+        self.assertEqual(self.fetched, [1, 2, 3])
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(self.index.lookup("5545999881234"), 3)
+        self.assertTrue(self.index.is_fresh())
+
+        # Novo contato com atividade recente: só a primeira página é relida
+        self.pages[1] = [contact(4, "+5511911112222", 400), contact(3, "+5545999881234", 300)]
+        self.pages[2] = [contact(2, "+5545988776655", 200), contact(1, "+595981000111", 100)]
+        self.fetched.clear()
+        self.index.sync(self._fetch)
+
+        self.assertEqual(self.fetched, [1, 2])
+        self.assertEqual(self.index.lookup("5511911112222"), 4)
+
+    def test_page_limit_does_not_mark_seeded(self):
+        self.index.sync(self._fetch, max_pages=1)
+        self.assertFalse(self.index.is_fresh())
+
+    def test_client_uses_index_before_http_search(self):
+        client = ChatwootClient.__new__(ChatwootClient)
+        client.contact_index = self.index
+        client._search_contact_by_phone = MagicMock(return_value=7)
+
+        # Índice vazio e não sincronizado: cai na busca HTTP e registra o resultado
+        self.assertEqual(client.find_contact_by_phone("5545911110000"), 7)
+        self.assertEqual(self.index.lookup("5545911110000"), 7)
+
+        self.index.sync(self._fetch)
+        client._search_contact_by_phone.reset_mock()
+        self.assertEqual(client.find_contact_by_phone("+55 45 99988-1234"), 3)
+        # Índice recente: ausência vale como "não existe", sem HTTP
+        self.assertIsNone(client.find_contact_by_phone("5545900000000"))
+        client._search_contact_by_phone.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+from unittest.mock import MagicMock
+import sys
+from pathlib import Path
+
+# Add project root
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from integrations.evolution import EvolutionClient
+from integrations.whatsapp_cache import WhatsAppNumberCache
+
+class TestEvolutionBatchCheck(unittest.TestCase):
+
+    def setUp(self):
+        # Sem credenciais no ambiente de teste: monta o cliente manualmente
+        self.evolution = EvolutionClient.__new__(EvolutionClient)
+        self.evolution.base_url = "http://evolution"
+        self.evolution.instance = "sdr"
+        self.evolution.headers = {}
+        self.evolution.session = MagicMock()
+        self.evolution.number_cache = None
+
+    def test_chunk_response_maps_numbers(self):
+        resp = MagicMock()
+        resp.json.return_value = [
+            # Fora da ordem do pedido e reformatados: casados pelos dígitos / JID
+            {"number": "554588776655", "exists": False},
+            {"number": "+55 45 99988-1234", "exists": True, "jid": "5545999881234@s.whatsapp.net"},
+            {"number": "595981000111", "exists": True, "jid": "595981000111@s.whatsapp.net"},
+            # Sem correspondência: fica fora do resultado (não verificado)
+            {"number": "5511900000000", "exists": True},
+        ]
+        self.evolution.session.post.return_value = resp
+
+        result = self.evolution._check_numbers_chunk(["5545999881234", "5545988776655", "+595 981 000111", "5547911112222"])
+
+        self.assertEqual(self.evolution.session.post.call_args.kwargs["json"]["numbers"][0], "5545999881234")
+        self.assertEqual(result, {
+            "5545999881234": (True, "5545999881234@s.whatsapp.net"),
+            "5545988776655": (False, None),
+            "+595 981 000111": (True, "595981000111@s.whatsapp.net"),
+        })
+
+    def test_chunks_and_omits_failed_chunks(self):
+        calls = []
+
+        def fake_chunk(phones):
+            calls.append(phones)
+            if "55c" in phones:
+                raise ConnectionError("timeout")
+            return {p: (True, f"{p}@s.whatsapp.net") for p in phones}
+
+        self.evolution._check_numbers_chunk = fake_chunk
+
+        result = self.evolution.check_numbers_exist(["55a", "55b", "55a", "55c", "55d", ""], chunk_size=2, max_workers=2)
+
+        self.assertEqual(sorted(calls), [["55a", "55b"], ["55c", "55d"]])
+        self.assertEqual(set(result), {"55a", "55b"})
+        self.assertEqual(result["55a"], (True, "55a@s.whatsapp.net"))
+
+    def test_cache_skips_api_and_never_stores_errors(self):
+        calls = []
+
+        def fake_chunk(phones):
+            calls.append(phones)
+            if "55err" in phones:
+                raise ConnectionError("timeout")
+            return {p: (p == "55yes", None) for p in phones}
+
+        self.evolution._check_numbers_chunk = fake_chunk
+        self.evolution.number_cache = WhatsAppNumberCache(":memory:")
+
+        self.evolution.check_numbers_exist(["55yes", "55no"], chunk_size=1)
+        self.evolution.check_numbers_exist(["55err"])
+        calls.clear()
+
+        result = self.evolution.check_numbers_exist(["55yes", "55no", "55err"])
+
+        self.assertEqual(calls, [["55err"]])
+        self.assertEqual(result, {"55yes": (True, None), "55no": (False, None)})
+
+class TestEvolutionStatusWebhook(unittest.TestCase):
+
+    def test_parse_v1_and_v2_status_updates(self):
+        v1 = {"event": "messages.update", "data": [
+            {"key": {"id": "A1", "fromMe": True}, "update": {"status": 3}},
+            {"key": {"id": "A2", "fromMe": True}, "update": {"status": 2}},
+        ]}
+        v2 = {"event": "messages.update", "data": {"keyId": "B1", "remoteJid": "55@s.whatsapp.net", "status": "READ"}}
+
+        self.assertEqual(EvolutionClient.parse_status_updates(v1), [("A1", "delivered")])
+        self.assertEqual(EvolutionClient.parse_status_updates(v2), [("B1", "read")])
+        self.assertEqual(EvolutionClient.message_id({"key": {"id": "C1"}, "status": "PENDING"}), "C1")
+
+class TestWhatsAppNumberCache(unittest.TestCase):
+
+    def test_positive_and_negative_ttl(self):
+        cache = WhatsAppNumberCache(":memory:", ttl_days=30, negative_ttl_days=7)
+        cache.set_many({"55yes": (True, "55yes@s.whatsapp.net"), "55no": (False, None)})
+        self.assertEqual(cache.get("55yes"), (True, "55yes@s.whatsapp.net"))
+        self.assertEqual(cache.get("55no"), (False, None))
+
+        # Verificados há 10 dias: negativo vencido, positivo ainda válido
+        cache.execute("UPDATE whatsapp_numbers SET checked_at = datetime('now', '-10 days')")
+        self.assertEqual(cache.get_many(["55yes", "55no"]), {"55yes": (True, "55yes@s.whatsapp.net")})
+        self.assertEqual(cache.purge_expired(), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+from pathlib import Path
+
+# Add project root
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from utils.http import get_session, close_sessions
+
+class TestHttpSessions(unittest.TestCase):
+
+    def tearDown(self):
+        close_sessions()
+
+    def test_session_is_shared_per_integration(self):
+        self.assertIs(get_session("trello"), get_session("trello"))
+        self.assertIsNot(get_session("trello"), get_session("chatwoot"))
+
+    def test_pool_size_per_host(self):
+        session = get_session("evolution", pool_maxsize=3)
+        self.assertEqual(session.get_adapter("https://api.example.com")._pool_maxsize, 3)
+
+    @patch('requests.Session.send')
+    def test_default_timeout_unless_explicit(self, mock_send):
+        mock_send.return_value = MagicMock(status_code=200)
+        session = get_session("serpapi", timeout=30)
+
+        session.get("https://serpapi.com/search")
+        self.assertEqual(mock_send.call_args.kwargs["timeout"], 30)
+
+        session.get("https://serpapi.com/search", timeout=5)
+        self.assertEqual(mock_send.call_args.kwargs["timeout"], 5)
+
+if __name__ == '__main__':
+    unittest.main()
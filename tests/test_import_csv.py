@@ -0,0 +1,76 @@
+import csv
+import os
+import tempfile
+import unittest
+import sys
+from pathlib import Path
+
+# Add project root
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from integrations.sqlite_client import SQLiteClient
+from services.import_csv import CsvLeadImporter
+from utils.pipeline import ordered_map
+
+class TestCsvLeadImporter(unittest.TestCase):
+
+    def setUp(self):
+        self.db = SQLiteClient(":memory:")
+        self.db.create_lead({"name": "Existente", "phone": "5545999881000", "status": "new"})
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "leads.csv")
+
+        rows = [{"name": f"Lead {i}", "phone": f"+55 45 99988-{1000 + i}", "company": "ACME", "sector": "", "city": "Foz"} for i in range(10)]
+        rows.insert(3, {"name": "Inválido", "phone": "123", "company": "", "sector": "", "city": ""})
+        rows.append({"name": "Repetido", "phone": "5545999881005", "company": "", "sector": "", "city": ""})
+        with open(self.path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=["name", "phone", "company", "sector", "city"])
+            writer.writeheader()
+            writer.writerows(rows)
+
+        self.importer = CsvLeadImporter(self.db, chunk_size=3, workers=2, report_every=None)
+
+    def _report(self, path):
+        with open(path, newline="", encoding="utf-8") as f:
+            return {row["line"]: row["reason"] for row in csv.DictReader(f)}
+
+    def test_import_in_chunks(self):
+        stats = self.importer.run(self.path)
+
+        self.assertEqual(stats, {"total": 12, "imported": 9, "skipped": 3, "errors": 0})
+        self.assertIsNotNone(self.db.get_lead_by_phone("5545999881009"))
+
+    def test_duplicates_across_chunks_rely_on_unique_phone(self):
+        report_path = os.path.join(self.tmp.name, "rejeitados.csv")
+
+        self.importer.run(self.path, report_path=report_path)
+
+        # Sem conjunto de telefones entre blocos: o duplicado da linha 13 é barrado pelo banco
+        self.assertEqual(self._report(report_path)["13"], "já existe no banco")
+
+    def test_dry_run_writes_report_without_inserting(self):
+        report_path = os.path.join(self.tmp.name, "rejeitados.csv")
+
+        stats = self.importer.run(self.path, dry_run=True, report_path=report_path)
+
+        self.assertEqual(stats["imported"], 9)
+        self.assertIsNone(self.db.get_lead_by_phone("5545999881009"))
+        # Linha 1 é o cabeçalho
+        self.assertEqual(self._report(report_path), {
+            "2": "já existe no banco",
+            "5": "telefone inválido",
+            "13": "duplicado no arquivo"
+        })
+
+    def test_single_worker_validates_in_process(self):
+        importer = CsvLeadImporter(self.db, chunk_size=3, workers=1, report_every=None)
+        self.assertEqual(importer.run(self.path), {"total": 12, "imported": 9, "skipped": 3, "errors": 0})
+
+    def test_ordered_map_keeps_input_order(self):
+        self.assertEqual(list(ordered_map(lambda n: n * n, range(20), workers=4, window=3)), [n * n for n in range(20)])
+        # Em processos: função de módulo (serializável)
+        self.assertEqual(list(ordered_map(abs, range(-10, 10), workers=2, window=3, processes=True)), [abs(n) for n in range(-10, 10)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+import sys
+from pathlib import Path
+
+# Add project root
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from config.keywords import DECLINE_KEYWORDS, STOP_KEYWORDS
+from utils.keyword_matcher import KeywordMatcher, normalize_text
+
+class TestKeywordMatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.stop = KeywordMatcher(STOP_KEYWORDS)
+        self.decline = KeywordMatcher(DECLINE_KEYWORDS)
+
+    def test_accent_and_case_insensitive(self):
+        self.assertEqual(normalize_text("NÃO Quero"), "nao quero")
+        self.assertEqual(self.stop.match("Nao   QUERO mais, obrigado").keyword, "não quero")
+        self.assertEqual(self.decline.match("No me interesá, gracias").group, "es")
+
+    def test_word_boundaries(self):
+        self.assertIsNone(self.stop.match("Eles saíram cedo, parece que volta amanhã"))
+        self.assertEqual(self.stop.match("quero sair da lista").keyword, "sair")
+        self.assertEqual(self.stop.match("STOP!").keyword, "stop")
+
+    def test_longest_phrase_wins(self):
+        matcher = KeywordMatcher(["não", "não tenho interesse"])
+        self.assertEqual(matcher.match("nao tenho interesse").keyword, "não tenho interesse")
+        self.assertIsNone(KeywordMatcher([]).match("qualquer coisa"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+import sys
+from pathlib import Path
+
+# Add project root
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from integrations.models import Lead, columns, LEAD_WEBHOOK_VIEW
+
+class TestLeadModel(unittest.TestCase):
+
+    def test_dict_style_access(self):
+        lead = Lead.from_row({"id": "1", "phone": "5545999881234", "status": "new", "city": None})
+
+        self.assertEqual(lead["id"], "1")
+        self.assertEqual(lead.get("phone"), "5545999881234")
+        self.assertIsNone(lead.get("city", "N/A"))  # carregado com valor nulo
+        self.assertEqual(lead.get("sector", "N/A"), "N/A")  # fora da projeção
+        self.assertIn("status", lead)
+        self.assertNotIn("notes", lead)
+        with self.assertRaises(KeyError):
+            lead["notes"]
+
+    def test_unknown_columns_are_ignored(self):
+        lead = Lead.from_row({"id": "1", "coluna_nova": "x"})
+        self.assertEqual(lead.to_dict(), {"id": "1"})
+
+    def test_no_instance_dict(self):
+        lead = Lead(id="1")
+        self.assertFalse(hasattr(lead, "__dict__"))
+
+    def test_columns(self):
+        self.assertEqual(columns(LEAD_WEBHOOK_VIEW), "id, phone, name, company, status, trello_card_id, chatwoot_id")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+from pathlib import Path
+
+# Add project root
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from services.lead_queue import LeadQueue
+
+class TestLeadQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.db = MagicMock()
+        self.queue = LeadQueue(self.db, batch_size=3, lease_seconds=600, worker_id="worker_1", interval_seconds=60)
+        # Estado atual no banco: por padrão, inalterado e ainda reivindicado por este worker
+        self.current = {}
+        self.db.get_lead_by_id.side_effect = lambda lead_id, view: self.current.get(
+            lead_id, {"id": lead_id, "claimed_by": "worker_1"}
+        )
+
+    def test_serves_batch_from_memory(self):
+        self.db.claim_leads.return_value = [{"id": "a"}, {"id": "b"}, {"id": "c"}]
+
+        served = [self.queue.next()["id"] for _ in range(3)]
+
+        self.assertEqual(served, ["a", "b", "c"])
+        self.db.claim_leads.assert_called_once_with("worker_1", 3, 600)
+
+    def test_returns_none_when_nothing_is_due(self):
+        self.db.claim_leads.return_value = []
+        self.assertIsNone(self.queue.next())
+
+    def test_expired_claims_are_dropped(self):
+        self.db.claim_leads.side_effect = [[{"id": "a"}, {"id": "b"}], [{"id": "c"}]]
+
+        with patch("services.lead_queue.time.monotonic", return_value=0):
+            self.assertEqual(self.queue.next()["id"], "a")
+
+        # Depois do lease, "b" já pode estar com outro processo
+        with patch("services.lead_queue.time.monotonic", return_value=601):
+            self.assertEqual(self.queue.next()["id"], "c")
+
+    def test_release_all_returns_unused_claims(self):
+        self.db.claim_leads.return_value = [{"id": "a"}, {"id": "b"}, {"id": "c"}]
+        self.queue.next()
+
+        self.queue.release_all()
+
+        self.db.release_lead_claims.assert_called_once_with("worker_1", ["b", "c"])
+        self.assertEqual(len(self.queue), 0)
+
+    def test_lead_whose_status_changed_is_not_served(self):
+        self.db.claim_leads.return_value = [
+            {"id": "a", "status": "follow_up_scheduled"},
+            {"id": "b", "status": "follow_up_scheduled"},
+            {"id": "c", "status": "new"},
+        ]
+        # Enquanto estavam no buffer: "a" respondeu, "b" foi reivindicado por outro worker
+        self.current = {
+            "a": {"id": "a", "status": "responded", "claimed_by": "worker_1"},
+            "b": {"id": "b", "status": "follow_up_scheduled", "claimed_by": "worker_2"},
+            "c": {"id": "c", "status": "new", "claimed_by": "worker_1", "contact_count": 0},
+        }
+
+        self.assertEqual(self.queue.next(), self.current["c"])
+        self.assertEqual(len(self.queue), 0)
+
+    def test_revalidation_error_keeps_lead_in_buffer(self):
+        self.db.claim_leads.return_value = [{"id": "a"}]
+        self.db.get_lead_by_id.side_effect = ConnectionError("timeout")
+
+        with self.assertRaises(ConnectionError):
+            self.queue.next()
+        self.assertEqual(len(self.queue), 1)
+
+    def test_release_all_includes_popped_leads(self):
+        self.db.claim_leads.return_value = [{"id": "a"}, {"id": "b"}]
+        lead = self.queue.next()
+
+        self.queue.release_all([lead])
+
+        self.db.release_lead_claims.assert_called_once_with("worker_1", ["a", "b"])
+
+    def test_lease_derived_from_batch_and_interval(self):
+        queue = LeadQueue(self.db, batch_size=10, lease_seconds=0, interval_seconds=1800)
+        self.assertEqual(queue.lease_seconds, 10 * 1800 + LeadQueue.LEASE_SAFETY_SECONDS)
+        self.assertEqual(queue.batch_size, 10)
+
+    def test_batch_capped_to_what_lease_covers(self):
+        # Lease de 30 min com um envio a cada 30 min: só o primeiro lead chega a tempo
+        queue = LeadQueue(self.db, batch_size=10, lease_seconds=1800, interval_seconds=1800)
+        self.assertEqual(queue.batch_size, 1)
+
+        queue = LeadQueue(self.db, batch_size=10, lease_seconds=3 * 600 + 60, interval_seconds=600)
+        self.assertEqual(queue.batch_size, 3)
+
+    def test_rejects_lease_within_safety_margin(self):
+        with self.assertRaises(ValueError):
+            LeadQueue(self.db, lease_seconds=LeadQueue.LEASE_SAFETY_SECONDS)
+
+if __name__ == '__main__':
+    unittest.main()
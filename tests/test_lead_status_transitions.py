@@ -0,0 +1,84 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+from pathlib import Path
+
+# Add project root
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from integrations.sqlite_client import SQLiteClient
+from integrations.supabase_client import SupabaseClient
+from services.lead_service import LeadService, RESPONSE_FINAL_STATUSES
+from services.message_service import MessageService
+from utils.cache import TTLCache
+
+PHONE = "5545999881234"
+
+class TestLeadStatusTransitions(unittest.TestCase):
+
+    def setUp(self):
+        self.db = SQLiteClient(":memory:")
+        self.lead = self.db.create_lead({"name": "Ana", "phone": PHONE, "status": "contacted"})
+
+        self.lead_service = LeadService.__new__(LeadService)
+        self.lead_service.db = self.db
+
+        self.service = MessageService.__new__(MessageService)
+        self.service.db = self.db
+        self.service.lead_service = self.lead_service
+        self.service.stop_matcher = MagicMock(match=MagicMock(return_value=None))
+
+        trello = patch("services.message_service.trello_service")
+        self.trello = trello.start()
+        self.addCleanup(trello.stop)
+
+    def _status(self):
+        return self.db.get_lead_by_phone(PHONE)["status"]
+
+    def test_conditional_update(self):
+        self.assertIsNone(self.db.update_lead(self.lead["id"], {"status": "responded"}, only_status=("new",)))
+        self.assertEqual(self._status(), "contacted")
+
+        self.assertTrue(self.lead_service.mark_as_declined(self.lead["id"]))
+        # Segunda recusa não altera nada (declined_at preservado)
+        self.assertFalse(self.lead_service.mark_as_declined(self.lead["id"]))
+        self.assertFalse(self.lead_service.mark_as_responded(self.lead["id"]))
+        self.assertEqual(self._status(), "declined")
+
+    def test_stale_cached_status_does_not_overwrite_declined(self):
+        # Cache deste processo ainda vê 'contacted'; outro processo já recusou o lead
+        stale = self.db.find_lead_by_phone(PHONE)
+        self.db.update_lead(self.lead["id"], {"status": "declined"})
+        self.service.db = MagicMock(find_lead_by_phone=MagicMock(return_value=stale))
+
+        self.service.handle_incoming(PHONE, "ok, obrigado")
+
+        self.assertEqual(self._status(), "declined")
+        self.trello.enqueue.assert_not_called()
+
+    def test_incoming_reply_marks_responded(self):
+        self.service.handle_incoming(PHONE, "Oi, pode me mandar mais informações?")
+
+        self.assertEqual(self._status(), "responded")
+        self.trello.enqueue.assert_called_once()
+
+class TestSupabaseConditionalUpdate(unittest.TestCase):
+
+    def setUp(self):
+        self.db = SupabaseClient.__new__(SupabaseClient)
+        self.db.client = MagicMock()
+        self.db.lead_cache = TTLCache(maxsize=16, ttl=120, negative_ttl=15)
+        self.query = self.db.client.table.return_value.update.return_value.eq.return_value
+
+    def test_unless_status_filters_in_the_update(self):
+        self.db.lead_cache.set(PHONE, {"id": "L1", "phone": PHONE, "status": "contacted"})
+        self.query.not_.in_.return_value.select.return_value.execute.return_value.data = []
+
+        self.assertIsNone(self.db.update_lead("L1", {"status": "responded"}, unless_status=RESPONSE_FINAL_STATUSES))
+
+        self.query.not_.in_.assert_called_once_with("status", list(RESPONSE_FINAL_STATUSES))
+        # Update sem efeito: a entrada defasada sai do cache
+        self.assertEqual(self.db.lead_cache.get(PHONE), (False, None))
+
+if __name__ == '__main__':
+    unittest.main()
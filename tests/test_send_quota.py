@@ -0,0 +1,84 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+from pathlib import Path
+
+# Add project root
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from integrations.supabase_client import SupabaseClient
+from core import scheduler
+
+class TestSendSlotRpc(unittest.TestCase):
+
+    def setUp(self):
+        # Evita o __init__ (credenciais); só precisamos do client mockado
+        self.db = SupabaseClient.__new__(SupabaseClient)
+        self.db.client = MagicMock()
+        self.rpc = self.db.client.rpc
+
+    def test_reserve_and_release_call_rpc(self):
+        self.rpc.return_value.execute.return_value.data = 7
+        self.assertEqual(self.db.reserve_send_slot("2026-10-18", 20), 7)
+        self.rpc.assert_called_with("reserve_send_slot", {"p_day": "2026-10-18", "p_limit": 20})
+
+        self.rpc.return_value.execute.return_value.data = 6
+        self.assertEqual(self.db.release_send_slot("2026-10-18"), 6)
+        self.rpc.assert_called_with("release_send_slot", {"p_day": "2026-10-18"})
+
+    def test_failures_are_not_retried(self):
+        # Timeout pode ter ocorrido depois do commit: repetir contaria/devolveria em dobro
+        self.rpc.return_value.execute.side_effect = TimeoutError("timeout")
+
+        with self.assertRaises(TimeoutError):
+            self.db.reserve_send_slot("2026-10-18", 20)
+        with self.assertRaises(TimeoutError):
+            self.db.release_send_slot("2026-10-18")
+
+        self.assertEqual(self.rpc.return_value.execute.call_count, 2)
+
+class TestProcessNextLeadReservation(unittest.TestCase):
+
+    def setUp(self):
+        patches = {
+            "is_working_hours": patch.object(scheduler, "is_working_hours", return_value=True),
+            "warmup": patch.object(scheduler, "warmup"),
+            "lead_service": patch.object(scheduler, "lead_service"),
+            "message_service": patch.object(scheduler, "message_service"),
+            "lead_queue": patch.object(scheduler, "lead_queue"),
+        }
+        self.mocks = {name: p.start() for name, p in patches.items()}
+        for p in patches.values():
+            self.addCleanup(p.stop)
+
+        self.warmup = self.mocks["warmup"]
+        self.warmup.can_send_now.return_value = True
+        self.warmup.reserve_send_slot.return_value = True
+        self.mocks["lead_service"].get_next_to_contact.return_value = {"id": "lead_1", "phone": "5545999880000", "status": "new"}
+        self.send = self.mocks["message_service"].send_first_contact
+
+    def test_successful_send_keeps_reservation(self):
+        self.send.return_value = True
+        scheduler.process_next_lead()
+        self.warmup.release_send_slot.assert_not_called()
+
+    def test_failed_send_releases_reservation(self):
+        self.send.return_value = False
+        scheduler.process_next_lead()
+        self.warmup.release_send_slot.assert_called_once()
+
+    def test_exception_during_send_releases_reservation(self):
+        self.send.side_effect = RuntimeError("Evolution fora do ar")
+        scheduler.process_next_lead()
+        self.warmup.release_send_slot.assert_called_once()
+
+    def test_no_release_when_quota_not_reserved(self):
+        self.warmup.reserve_send_slot.return_value = False
+        scheduler.process_next_lead()
+        self.send.assert_not_called()
+        self.warmup.release_send_slot.assert_not_called()
+        # O lead retirado da fila e não enviado é devolvido
+        self.mocks["lead_queue"].release_all.assert_called_once_with([{"id": "lead_1", "phone": "5545999880000", "status": "new"}])
+
+if __name__ == '__main__':
+    unittest.main()
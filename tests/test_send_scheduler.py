@@ -0,0 +1,94 @@
+import threading
+import time
+import unittest
+import sys
+from pathlib import Path
+
+# Add project root
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from utils.send_scheduler import PartSendScheduler
+
+class TestPartSendScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def _send(self, recipient, part):
+        with self.lock:
+            self.sent.append((recipient, part, time.monotonic()))
+        return {"key": f"{recipient}:{part}"}
+
+    def test_interleaves_recipients_and_keeps_order(self):
+        scheduler = PartSendScheduler(self._send, gap_seconds=0.2, max_workers=2)
+
+        start = time.monotonic()
+        tickets = [scheduler.submit(r, [f"{r}1", f"{r}2", f"{r}3"]) for r in ("a", "b")]
+        results = [t.done.result(timeout=5) for t in tickets]
+        elapsed = time.monotonic() - start
+
+        self.assertEqual(results[0], [{"key": "a:a1"}, {"key": "a:a2"}, {"key": "a:a3"}])
+        for r in ("a", "b"):
+            parts = [(p, at) for rr, p, at in self.sent if rr == r]
+            self.assertEqual([p for p, _ in parts], [f"{r}1", f"{r}2", f"{r}3"])
+            # Intervalo por destinatário preservado
+            self.assertGreaterEqual(parts[1][1] - parts[0][1], 0.19)
+        # Em série seriam 5 intervalos; intercalado, 2
+        self.assertLess(elapsed, 0.8)
+
+    def test_same_recipient_messages_do_not_overlap(self):
+        scheduler = PartSendScheduler(self._send, gap_seconds=0.05)
+
+        first = scheduler.submit("a", ["m1p1", "m1p2"])
+        second = scheduler.submit("a", ["m2p1"])
+        second.done.result(timeout=5)
+
+        self.assertTrue(first.done.done())
+        self.assertEqual([p for _, p, _ in self.sent], ["m1p1", "m1p2", "m2p1"])
+
+    def test_failure_is_rescheduled_then_gives_up(self):
+        attempts = {"n": 0}
+
+        def flaky(recipient, part):
+            attempts["n"] += 1
+            if part == "bad" or attempts["n"] == 1:
+                raise ConnectionError("timeout")
+            return part
+
+        scheduler = PartSendScheduler(flaky, gap_seconds=0.01, max_attempts=3, retry_backoff_seconds=0.01)
+
+        self.assertEqual(scheduler.submit("a", ["ok"]).done.result(timeout=5), ["ok"])
+
+        ticket = scheduler.submit("b", ["bad", "never"])
+        with self.assertRaises(ConnectionError):
+            ticket.first.result(timeout=5)
+        with self.assertRaises(ConnectionError):
+            ticket.done.result(timeout=5)
+
+    def test_shutdown_drains_pending_parts(self):
+        scheduler = PartSendScheduler(self._send, gap_seconds=0.05, max_workers=2)
+        ticket = scheduler.submit("a", ["p1", "p2", "p3"])
+        queued = scheduler.submit("a", ["m2"])
+        ticket.first.result(timeout=5)
+
+        self.assertTrue(scheduler.shutdown(wait=True, timeout=5))
+
+        self.assertEqual([p for _, p, _ in self.sent], ["p1", "p2", "p3", "m2"])
+        self.assertTrue(queued.done.done())
+        with self.assertRaises(RuntimeError):
+            scheduler.submit("b", ["x"])
+
+    def test_shutdown_timeout_fails_incomplete_messages(self):
+        scheduler = PartSendScheduler(self._send, gap_seconds=10)
+        ticket = scheduler.submit("a", ["p1", "p2"])
+        ticket.first.result(timeout=5)
+
+        self.assertFalse(scheduler.shutdown(wait=True, timeout=0.05))
+
+        with self.assertRaises(RuntimeError):
+            ticket.done.result(timeout=1)
+        self.assertEqual([p for _, p, _ in self.sent], ["p1"])
+
+if __name__ == '__main__':
+    unittest.main()
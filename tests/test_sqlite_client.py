@@ -0,0 +1,140 @@
+import unittest
+from unittest.mock import patch
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add project root
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from integrations.sqlite_client import SQLiteClient
+from integrations.models import LEAD_NOTES_VIEW
+
+class TestSQLiteClient(unittest.TestCase):
+
+    def setUp(self):
+        self.db = SQLiteClient(":memory:")
+
+    def test_create_and_lookup_lead(self):
+        created = self.db.create_lead({"name": "Ana", "phone": "5545999881234", "metadata": {"origem": "csv"}})
+
+        lead = self.db.get_lead_by_phone("5545999881234")
+        self.assertEqual(lead["id"], created["id"])
+        self.assertEqual(lead["status"], "new")
+        self.assertEqual(self.db.find_lead_by_phone("5545999881234")["name"], "Ana")
+        self.assertIsNone(self.db.find_lead_by_phone("5545000000000"))
+
+        self.db.update_lead(created["id"], {"notes": "Resumo"})
+        self.assertEqual(self.db.get_lead_by_phone("5545999881234", view=LEAD_NOTES_VIEW)["notes"], "Resumo")
+
+    def test_bulk_upsert_leads(self):
+        self.db.create_lead({"phone": "5511"})
+
+        outcomes = self.db.bulk_upsert_leads([{"phone": "5511"}, {"phone": "5522"}, {"phone": "5522"}])
+
+        self.assertEqual([o["status"] for o in outcomes], ["existing", "created", "duplicate"])
+        self.assertEqual(len(self.db.get_leads_by_status("new")), 2)
+
+    def test_iter_leads_keyset_pages(self):
+        base = datetime(2026, 1, 1)
+        for i in range(7):
+            # Pares com o mesmo created_at exercitam o desempate por id
+            created_at = (base + timedelta(minutes=i // 2)).isoformat()
+            self.db.create_lead({"id": f"lead-{i}", "phone": f"55{i}", "created_at": created_at,
+                                 "status": "new" if i % 3 else "declined"})
+
+        pages = list(self.db.iter_leads(view=("id",), page_size=3))
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual([lead["id"] for page in pages for lead in page], [f"lead-{i}" for i in range(7)])
+
+        filtered = [lead["id"] for page in self.db.iter_leads({"status": "declined"}, page_size=2) for lead in page]
+        self.assertEqual(filtered, ["lead-0", "lead-3", "lead-6"])
+        self.assertEqual(len(self.db.get_leads_by_status("new")), 4)
+
+    def test_iter_leads_with_null_created_at(self):
+        self.db.create_lead({"id": "lead-a", "phone": "551", "created_at": None})
+        self.db.create_lead({"id": "lead-b", "phone": "552", "created_at": None})
+        self.db.create_lead({"id": "lead-c", "phone": "553", "created_at": "2026-01-01T00:00:00"})
+
+        pages = list(self.db.iter_leads(view=("id",), page_size=1))
+        self.assertEqual([lead["id"] for page in pages for lead in page], ["lead-a", "lead-b", "lead-c"])
+
+    def test_dashboard_queries(self):
+        from dashboard.dash_utils import data
+
+        lead = self.db.create_lead({"name": "Ana", "phone": "5545999881234", "company": "ACME"})
+        now = datetime.now().isoformat()
+        self.db.log_message(lead["id"], "outbound", "Olá", message_id="MSG1")
+        self.db.log_message(lead["id"], "inbound", "Oi!")
+        self.db.update_message_status("MSG1", "read", at=now)
+
+        with patch.object(data, "supabase", self.db):
+            self.assertEqual(data.get_kpis_today(), {
+                "new_leads": 1, "sent_today": 1, "responded_today": 1, "response_rate": 100.0
+            })
+            metrics = data.get_delivery_metrics()
+            self.assertEqual((metrics["tracked"], metrics["read"]), (1, 1))
+            self.assertEqual(len(data.get_message_logs_dataframe()), 2)
+
+            conversations = data.get_conversations()
+            self.assertEqual(len(conversations), 1)
+            self.assertEqual((conversations[0]["name"], conversations[0]["last_message"]), ("Ana", "Oi!"))
+            self.assertEqual([m["content"] for m in data.get_lead_history(lead["id"])], ["Olá", "Oi!"])
+
+        self.assertEqual(self.db.get_lead_by_id(lead["id"], view=("id", "phone"))["phone"], "5545999881234")
+
+    def test_message_status_never_regresses(self):
+        self.db.log_message("lead-1", "outbound", "Oi", message_id="MSG1")
+
+        self.assertTrue(self.db.update_message_status("MSG1", "read", at="2026-01-01T10:05:00"))
+        # Recibo de entrega atrasado não regride a leitura
+        self.assertFalse(self.db.update_message_status("MSG1", "delivered", at="2026-01-01T10:06:00"))
+        self.assertFalse(self.db.update_message_status("UNKNOWN", "delivered"))
+
+        row = self.db._query("SELECT delivery_status, delivered_at, read_at FROM message_logs WHERE message_id = 'MSG1'")[0]
+        self.assertEqual(row, {"delivery_status": "read", "delivered_at": "2026-01-01T10:05:00", "read_at": "2026-01-01T10:05:00"})
+
+    def test_next_lead_priority(self):
+        past = (datetime.utcnow() - timedelta(hours=1)).isoformat()
+        self.db.create_lead({"phone": "5511", "status": "follow_up_scheduled", "next_contact_at": past})
+        self.assertEqual(self.db.get_next_lead_to_contact()["phone"], "5511")
+
+        self.db.create_lead({"phone": "5522"})
+        self.assertEqual(self.db.get_next_lead_to_contact()["phone"], "5522")
+
+    def test_claims_do_not_overlap(self):
+        self.db.bulk_upsert_leads([{"phone": f"55{i}"} for i in range(5)])
+
+        first = self.db.claim_leads("worker_a", 3, 600)
+        second = self.db.claim_leads("worker_b", 3, 600)
+
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 2)
+        self.assertFalse({l["id"] for l in first} & {l["id"] for l in second})
+
+        self.db.release_lead_claims("worker_a", [first[0]["id"]])
+        self.assertEqual([l["id"] for l in self.db.claim_leads("worker_c", 3, 600)], [first[0]["id"]])
+
+    def test_send_quota(self):
+        self.assertEqual(self.db.reserve_send_slot("2026-01-05", 2), 1)
+        self.assertEqual(self.db.reserve_send_slot("2026-01-05", 2), 2)
+        self.assertIsNone(self.db.reserve_send_slot("2026-01-05", 2))
+
+        self.assertEqual(self.db.release_send_slot("2026-01-05"), 1)
+        # Virada do dia reinicia o contador na mesma operação
+        self.assertEqual(self.db.reserve_send_slot("2026-01-06", 2), 1)
+        self.assertEqual(self.db.get_agent_state()["current_day"], "2026-01-06")
+
+    def test_agent_state_and_logs(self):
+        state = self.db.get_agent_state()
+        self.assertEqual(state["messages_sent_today"], 0)
+
+        self.db.update_agent_state({"last_heartbeat": "2026-01-05T10:00:00"})
+        self.assertEqual(self.db.get_agent_state()["id"], state["id"])
+
+        log = self.db.log_message("lead_1", "outbound", "Olá")
+        self.assertEqual(log["direction"], "outbound")
+        self.db.add_to_sync_queue("trello", "create_card", {"lead_id": "lead_1"})
+
+if __name__ == '__main__':
+    unittest.main()
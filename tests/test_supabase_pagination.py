@@ -0,0 +1,115 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+from pathlib import Path
+
+# Add project root
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from integrations.supabase_client import SupabaseClient
+
+class FakeQuery:
+    """Query builder do PostgREST que registra os filtros e devolve as linhas com created_at/id acima do cursor."""
+
+    def __init__(self, table):
+        self.table = table
+        self.calls = []
+        table.queries.append(self)
+
+    def __getattr__(self, name):
+        def method(*args, **kwargs):
+            self.calls.append((name, args))
+            return self
+        return method
+
+    def execute(self):
+        self.table.executes += 1
+        if self.table.fail_on and self.table.fail_on(self):
+            raise ConnectionError("timeout")
+        rows = self.table.rows
+        cursor = self.table.cursor_of(self)
+        if cursor:
+            # created_at nulo passa no filtro or_ (created_at.is.null)
+            rows = [r for r in rows if r["created_at"] is None or (r["created_at"], r["id"]) > cursor]
+        if ("is_", ("created_at", "null")) in self.calls:
+            last_id = next(args[1] for name, args in self.calls if name == "gt")
+            rows = [r for r in rows if r["created_at"] is None and r["id"] > last_id]
+        limit = next(args[0] for name, args in self.calls if name == "limit")
+        return MagicMock(data=rows[:limit])
+
+class FakeTable:
+    def __init__(self, rows):
+        # Como o Postgres em ORDER BY created_at ASC: nulos por último
+        self.rows = sorted(rows, key=lambda r: (r["created_at"] is None, r["created_at"] or "", r["id"]))
+        self.queries = []
+        self.executes = 0
+        self.fail_on = None
+
+    def cursor_of(self, query):
+        """Reconstrói o cursor a partir do filtro or_ enviado."""
+        for name, args in query.calls:
+            if name == "or_":
+                # created_at.gt."<c>",and(created_at.eq."<c>",id.gt."<id>")
+                parts = args[0].split('"')
+                return (parts[1], int(parts[5]))
+        return None
+
+class TestSupabaseLeadPagination(unittest.TestCase):
+
+    def setUp(self):
+        self.db = SupabaseClient.__new__(SupabaseClient)
+        self.db.client = MagicMock()
+        self.table = FakeTable([
+            {"id": i, "created_at": f"2026-01-0{1 + i // 2}T00:00:00", "status": "new"}
+            for i in range(1, 6)
+        ])
+        self.db.client.table.side_effect = lambda name: FakeQuery(self.table)
+
+    def test_keyset_cursor_filter(self):
+        pages = list(self.db.iter_leads({"status": "new"}, view=("id",), page_size=2))
+
+        self.assertEqual([[lead["id"] for lead in page] for page in pages], [[1, 2], [3, 4], [5]])
+        first, second = self.table.queries[0], self.table.queries[1]
+        self.assertNotIn("or_", [name for name, _ in first.calls])
+        self.assertIn(("eq", ("status", "new")), second.calls)
+        # Cursor pela última linha da página anterior: (created_at, id) da linha 2
+        self.assertIn(
+            ("or_", ('created_at.gt."2026-01-02T00:00:00",and(created_at.eq."2026-01-02T00:00:00",id.gt."2"),'
+                     'created_at.is.null',)),
+            second.calls
+        )
+        self.assertEqual([c for c in second.calls if c[0] == "order"], [("order", ("created_at",)), ("order", ("id",))])
+
+    def test_null_created_at_is_paged_by_id(self):
+        self.table.rows += [{"id": i, "created_at": None, "status": "new"} for i in (6, 7, 8)]
+
+        pages = list(self.db.iter_leads(view=("id",), page_size=2))
+
+        self.assertEqual([lead["id"] for page in pages for lead in page], [1, 2, 3, 4, 5, 6, 7, 8])
+        self.assertTrue(any(("gt", ("id", 6)) in q.calls for q in self.table.queries))
+
+    def test_failed_page_is_retried_without_restarting_the_scan(self):
+        # A segunda página falha sempre: só ela é repetida, e a varredura não recomeça
+        self.table.fail_on = lambda query: any(name == "or_" for name, _ in query.calls)
+
+        with patch.object(SupabaseClient._select_leads_page.retry, "sleep"):
+            with self.assertRaises(ConnectionError):
+                self.db.get_leads_by_status("new", view=("id",))
+
+        # 1 primeira página + 3 tentativas da segunda (com retry externo seriam 12)
+        self.assertEqual(self.table.executes, 4)
+
+class TestSupabaseLeadLookups(unittest.TestCase):
+
+    def test_get_leads_by_ids_selects_id_once(self):
+        db = SupabaseClient.__new__(SupabaseClient)
+        db.client = MagicMock()
+        select = db.client.table.return_value.select
+        select.return_value.in_.return_value.execute.return_value.data = [{"id": "L1", "name": "Ana"}]
+
+        self.assertEqual(db.get_leads_by_ids(["L1", "L1"], view=("id", "name"))["L1"]["name"], "Ana")
+        select.assert_called_once_with("id, name")
+        select.return_value.in_.assert_called_once_with("id", ["L1"])
+
+if __name__ == '__main__':
+    unittest.main()
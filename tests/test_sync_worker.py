@@ -0,0 +1,63 @@
+import unittest
+import sys
+from pathlib import Path
+
+# Add project root
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from integrations.sqlite_client import SQLiteClient
+from services.sync_worker import SyncWorker
+
+class TestSyncWorker(unittest.TestCase):
+
+    def setUp(self):
+        self.db = SQLiteClient(":memory:")
+        self.worker = SyncWorker(self.db, batch_size=10, max_workers=2, max_attempts=2, backoff_seconds=60, worker_id="test")
+        self.calls = []
+
+    def _job(self, job_id):
+        return self.db._query("SELECT * FROM sync_queue WHERE id = ?", (job_id,))[0]
+
+    def test_successful_job_is_done(self):
+        self.worker.register("trello", lambda action, payload: self.calls.append((action, payload)))
+        self.db.add_to_sync_queue("trello", "create_lead_card", {"lead": {"id": 1}})
+
+        stats = self.worker.run_once()
+
+        self.assertEqual(stats, {"claimed": 1, "done": 1, "retry": 0, "dead": 0})
+        self.assertEqual(self.calls, [("create_lead_card", {"lead": {"id": 1}})])
+        self.assertEqual(self._job(1)["status"], "done")
+        # Nada mais a reivindicar
+        self.assertEqual(self.worker.run_once()["claimed"], 0)
+
+    def test_failure_retries_with_backoff_then_dead_letter(self):
+        def failing(action, payload):
+            raise RuntimeError("Trello fora do ar")
+
+        self.worker.register("trello", failing)
+        self.db.add_to_sync_queue("trello", "lead_responded", {"lead": {"id": 1}})
+
+        self.assertEqual(self.worker.run_once()["retry"], 1)
+        job = self._job(1)
+        self.assertEqual(job["status"], "pending")
+        self.assertEqual(job["attempts"], 1)
+        self.assertIsNotNone(job["next_attempt_at"])
+        self.assertIn("Trello fora do ar", job["last_error"])
+
+        # Backoff: ainda não está pronta
+        self.assertEqual(self.worker.run_once()["claimed"], 0)
+
+        self.db.conn.execute("UPDATE sync_queue SET next_attempt_at = NULL WHERE id = 1")
+        self.assertEqual(self.worker.run_once()["dead"], 1)
+        self.assertEqual(self._job(1)["status"], "dead")
+        self.assertEqual(self.worker.run_once()["claimed"], 0)
+
+    def test_only_registered_integrations_are_claimed(self):
+        self.worker.register("trello", lambda action, payload: None)
+        self.db.add_to_sync_queue("chatwoot", "noop", {})
+
+        self.assertEqual(self.worker.run_once()["claimed"], 0)
+        self.assertEqual(self._job(1)["status"], "pending")
+
+if __name__ == '__main__':
+    unittest.main()
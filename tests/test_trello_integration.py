@@ -17,7 +17,7 @@ class TestTrelloIntegration(unittest.TestCase):
         self.trello.token = "fake_token"
         self.trello.board_id = "fake_board"
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_connection_success(self, mock_get):
         # Mock Response
         mock_resp = MagicMock()
@@ -27,7 +27,7 @@ class TestTrelloIntegration(unittest.TestCase):
         
         self.assertTrue(self.trello.test_connection())
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_create_card(self, mock_post):
         mock_resp = MagicMock()
         mock_resp.status_code = 200
@@ -37,7 +37,7 @@ class TestTrelloIntegration(unittest.TestCase):
         card_id = self.trello.create_card("list_1", "Test Card")
         self.assertEqual(card_id, "card_123")
         
-    @patch('requests.put')
+    @patch('requests.Session.put')
     def test_move_card(self, mock_put):
         mock_resp = MagicMock()
         mock_resp.status_code = 200
@@ -46,7 +46,7 @@ class TestTrelloIntegration(unittest.TestCase):
         success = self.trello.move_card("card_123", "list_2")
         self.assertTrue(success)
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_find_card_by_phone(self, mock_get):
         mock_resp = MagicMock()
         mock_resp.status_code = 200
@@ -0,0 +1,40 @@
+import unittest
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+# Add project root
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from utils.validators import classify_phone, classify_phones, normalize_phones, validate_phone
+
+PHONES = ["+55 (45) 99988-1000", "595 981 123 456", "+54 9 11 2345-6789", "5511", None, "554599988100"]
+EXPECTED = [
+    ("5545999881000", "BR"),
+    ("595981123456", "PY"),
+    ("5491123456789", "AR"),
+    ("5511", None),
+    ("", None),
+    ("554599988100", "BR"),
+]
+
+class TestPhoneValidators(unittest.TestCase):
+
+    def test_classify_phones_sequence(self):
+        self.assertEqual(classify_phones(PHONES), EXPECTED)
+
+    def test_classify_phones_series_matches_scalar(self):
+        result = classify_phones(pd.Series(PHONES))
+
+        self.assertEqual(list(result["phone"]), [digits for digits, _ in EXPECTED])
+        self.assertEqual([None if pd.isna(c) else c for c in result["country"]], [country for _, country in EXPECTED])
+        self.assertEqual([classify_phone(p) for p in PHONES], [country for _, country in EXPECTED])
+
+    def test_normalize_phones_and_validate(self):
+        self.assertEqual(normalize_phones(["+55 11", 5545, ""]), ["5511", "5545", ""])
+        self.assertTrue(validate_phone("+55 45 99988-1000"))
+        self.assertFalse(validate_phone("+1 555 0100"))
+
+if __name__ == '__main__':
+    unittest.main()
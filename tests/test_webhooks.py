@@ -0,0 +1,41 @@
+import unittest
+from unittest.mock import patch
+import sys
+from pathlib import Path
+
+# Add project root
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from api import webhooks
+
+EVENT = {"event": "conversation_status_changed", "id": 5, "status": "open"}
+
+class TestChatwootWebhookAuth(unittest.TestCase):
+
+    def setUp(self):
+        self.client = webhooks.app.test_client()
+        events = patch.object(webhooks, "chatwoot_events")
+        self.events = events.start()
+        self.addCleanup(events.stop)
+        self.events.handle.return_value = "processed"
+
+    def _post(self, url="/webhook/chatwoot", **kwargs):
+        return self.client.post(url, json=EVENT, **kwargs)
+
+    def test_requires_valid_token(self):
+        with patch.object(webhooks, "CHATWOOT_WEBHOOK_TOKEN", "s3cr3t"):
+            self.assertEqual(self._post().status_code, 401)
+            self.assertEqual(self._post("/webhook/chatwoot?token=errado").status_code, 401)
+            self.events.handle.assert_not_called()
+
+            self.assertEqual(self._post("/webhook/chatwoot?token=s3cr3t").status_code, 200)
+            self.assertEqual(self._post(headers={"X-Webhook-Secret": "s3cr3t"}).status_code, 200)
+            self.assertEqual(self.events.handle.call_count, 2)
+
+    def test_rejects_when_token_not_configured(self):
+        with patch.object(webhooks, "CHATWOOT_WEBHOOK_TOKEN", None):
+            self.assertEqual(self._post("/webhook/chatwoot?token=").status_code, 503)
+        self.events.handle.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
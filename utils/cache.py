@@ -0,0 +1,121 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+class _InFlight:
+    """Carga em andamento compartilhada entre chamadas concorrentes para a mesma chave."""
+    __slots__ = ("event", "value", "error", "stale")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+        # Invalidado durante a carga: o resultado é entregue mas não cacheado
+        self.stale = False
+
+class TTLCache:
+    """
+    Cache LRU limitado com expiração por entrada.
+    Valores None são cacheados como "não encontrado" (cache negativo) com TTL próprio.
+    get_or_load garante uma única carga por chave em andamento (single-flight).
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300, negative_ttl: float = 60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+
+        self._data: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._inflight: Dict[Hashable, _InFlight] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """Retorna (encontrado, valor). Entradas expiradas contam como ausentes."""
+        with self._lock:
+            return self._get_locked(key)
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._set_locked(key, value)
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+            if key in self._inflight:
+                self._inflight[key].stale = True
+
+    def invalidate_where(self, predicate: Callable[[Any], bool]):
+        """Remove as entradas cujo valor satisfaz `predicate` (varredura linear)."""
+        with self._lock:
+            for key in [k for k, (v, _) in self._data.items() if predicate(v)]:
+                del self._data[key]
+            self._mark_inflight_stale()
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._mark_inflight_stale()
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Retorna o valor cacheado ou executa `loader` uma única vez por chave,
+        mesmo com várias threads pedindo a mesma chave ao mesmo tempo.
+        Erros do loader não são cacheados e são repassados a todos que aguardavam.
+        """
+        with self._lock:
+            hit, value = self._get_locked(key)
+            if hit:
+                return value
+
+            call = self._inflight.get(key)
+            owner = call is None
+            if owner:
+                call = self._inflight[key] = _InFlight()
+
+        if not owner:
+            call.event.wait()
+            if call.error:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = loader()
+            with self._lock:
+                if not call.stale:
+                    self._set_locked(key, call.value)
+            return call.value
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call.event.set()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _mark_inflight_stale(self):
+        for call in self._inflight.values():
+            call.stale = True
+
+    def _get_locked(self, key: Hashable) -> Tuple[bool, Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return False, None
+
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return False, None
+
+        self._data.move_to_end(key)
+        return True, value
+
+    def _set_locked(self, key: Hashable, value: Any):
+        ttl = self.negative_ttl if value is None else self.ttl
+        self._data[key] = (value, time.monotonic() + ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
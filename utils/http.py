@@ -0,0 +1,55 @@
+import threading
+from typing import Dict, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from config.settings import HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE
+
+class PooledSession(requests.Session):
+    """
+    Session com keep-alive e timeout padrão.
+    Chamadas sem `timeout` explícito usam o timeout da integração.
+    """
+
+    def __init__(self, timeout: float, pool_connections: int, pool_maxsize: int):
+        super().__init__()
+        self.default_timeout = timeout
+        # Sem retry no adapter: os retries ficam no retry_with_logging dos clientes
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    def request(self, method, url, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.default_timeout
+        return super().request(method, url, **kwargs)
+
+_sessions: Dict[str, PooledSession] = {}
+_lock = threading.Lock()
+
+def get_session(
+    name: str,
+    timeout: float = 10,
+    pool_connections: int = HTTP_POOL_CONNECTIONS,
+    pool_maxsize: Optional[int] = None
+) -> PooledSession:
+    """
+    Retorna a session compartilhada da integração `name` (criada na primeira chamada).
+    Todas as instâncias de um cliente no processo reaproveitam as mesmas conexões TCP/TLS.
+
+    pool_connections: quantidade de hosts com pool mantido.
+    pool_maxsize: conexões mantidas por host (deve cobrir o número de threads concorrentes).
+    """
+    with _lock:
+        session = _sessions.get(name)
+        if session is None:
+            session = _sessions[name] = PooledSession(
+                timeout, pool_connections, pool_maxsize or HTTP_POOL_MAXSIZE
+            )
+        return session
+
+def close_sessions():
+    """Fecha todas as sessions (libera as conexões do pool)."""
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
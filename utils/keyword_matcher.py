@@ -0,0 +1,56 @@
+import re
+import unicodedata
+from typing import Dict, Iterable, List, NamedTuple, Optional, Union
+
+class KeywordMatch(NamedTuple):
+    """Regra que disparou: palavra-chave como configurada e seu grupo (ex: idioma)."""
+    keyword: str
+    group: str
+
+def normalize_text(text: str) -> str:
+    """Remove acentos e normaliza maiúsculas/minúsculas (casefold)."""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+class KeywordMatcher:
+    """
+    Detecta palavras-chave numa única passada de regex compilada.
+    Texto e palavras-chave são normalizados (acentos, maiúsculas) e o casamento
+    é por palavra inteira: "sair" não dispara dentro de "saíram".
+    """
+
+    def __init__(self, keywords: Union[Dict[str, Iterable[str]], Iterable[str]]):
+        groups = keywords if isinstance(keywords, dict) else {"default": keywords}
+
+        self.rules: List[KeywordMatch] = []
+        seen = set()
+        for group, words in groups.items():
+            for word in words:
+                normalized = " ".join(normalize_text(word).split())
+                if normalized and normalized not in seen:
+                    seen.add(normalized)
+                    self.rules.append(KeywordMatch(word, group))
+
+        # Um grupo nomeado por regra (m.lastgroup identifica a regra);
+        # frases mais longas primeiro para vencer prefixos na mesma posição
+        order = sorted(range(len(self.rules)), key=lambda i: -len(self.rules[i].keyword))
+        alternatives = [
+            f"(?P<r{i}>{self._phrase_pattern(self.rules[i].keyword)})"
+            for i in order
+        ]
+        self._pattern = re.compile(rf"(?<!\w)(?:{'|'.join(alternatives)})(?!\w)") if alternatives else None
+
+    @staticmethod
+    def _phrase_pattern(keyword: str) -> str:
+        # Qualquer sequência de espaços entre as palavras da frase
+        return r"\s+".join(re.escape(word) for word in normalize_text(keyword).split())
+
+    def match(self, text: str) -> Optional[KeywordMatch]:
+        """Primeira regra encontrada no texto, ou None."""
+        if not self._pattern or not text:
+            return None
+        found = self._pattern.search(normalize_text(text))
+        return self.rules[int(found.lastgroup[1:])] if found else None
+
+    def __contains__(self, text: str) -> bool:
+        return self.match(text) is not None
@@ -0,0 +1,49 @@
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+class LocalStore:
+    """
+    Banco SQLite local do processo (arquivo em data/) para caches e índices
+    que não precisam ir ao Supabase. Subclasses definem SCHEMA.
+    """
+    SCHEMA = ""
+
+    def __init__(self, path: str = ":memory:"):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        self.path = str(path)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA busy_timeout=5000")
+        self.conn.executescript(self.SCHEMA)
+        self._lock = threading.RLock()
+
+    def query(self, sql: str, params: Any = ()) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(row) for row in self.conn.execute(sql, params).fetchall()]
+
+    def execute(self, sql: str, params: Any = ()) -> int:
+        """Executa um comando de escrita. Retorna o número de linhas afetadas."""
+        with self._lock:
+            return self.conn.execute(sql, params).rowcount
+
+    def executemany(self, sql: str, rows: Iterable[Any]):
+        """Escreve várias linhas numa única transação."""
+        with self._lock:
+            self.conn.execute("BEGIN")
+            try:
+                self.conn.executemany(sql, rows)
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            else:
+                self.conn.execute("COMMIT")
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
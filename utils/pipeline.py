@@ -0,0 +1,172 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, List, Optional
+from utils.logger import logger
+
+_DONE = object()
+
+def ordered_map(
+    fn: Callable[[Any], Any],
+    items: Iterable[Any],
+    workers: int = 4,
+    window: Optional[int] = None,
+    processes: bool = False
+) -> Iterator[Any]:
+    """
+    Aplica `fn` em paralelo e gera os resultados na ordem de entrada.
+    No máximo `window` itens (padrão: 2x workers) ficam em processamento ou
+    aguardando o consumidor, então a memória não cresce com o tamanho da entrada.
+
+    processes=True usa processos em vez de threads: necessário para trabalho de CPU
+    em Python puro, que threads não paralelizam (GIL). `fn`, itens e resultados
+    precisam ser serializáveis (pickle); `fn` deve ser uma função de módulo.
+    """
+    window = window or workers * 2
+    pending = deque()
+    if processes:
+        pool = ProcessPoolExecutor(max_workers=max(1, workers))
+    else:
+        pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="ordered-map")
+    try:
+        for item in items:
+            pending.append(pool.submit(fn, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+        pool.shutdown(wait=False)
+
+class Stage:
+    """
+    Etapa do pipeline: `fn(item)` executada por `workers` threads.
+    Retornar None descarta o item. Exceções são contadas; o item é descartado, ou
+    substituído pelo retorno de `on_error(item, exc)` quando informado (ex: para
+    que a última etapa contabilize a falha).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[[Any], Any],
+        workers: int = 1,
+        on_error: Optional[Callable[[Any, Exception], Any]] = None
+    ):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.on_error = on_error
+        self.processed = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+        self._alive = 0
+
+    def throughput(self, elapsed: float) -> float:
+        """Itens por segundo desde o início do pipeline."""
+        return self.processed / elapsed if elapsed > 0 else 0.0
+
+class Pipeline:
+    """
+    Pipeline em etapas com filas limitadas entre elas (memória constante).
+    Cada etapa tem seu próprio pool de threads; o consumidor recebe os resultados
+    da última etapa pelo gerador run() e relata a vazão por etapa periodicamente.
+    A ordem de saída não é garantida.
+    """
+
+    def __init__(self, stages: List[Stage], queue_size: int = 100, report_every: Optional[float] = 30):
+        self.stages = stages
+        self.queue_size = queue_size
+        self.report_every = report_every
+        self.fed = 0
+        self.started_at: Optional[float] = None
+        self._source_error: Optional[BaseException] = None
+
+    def run(self, items: Iterable[Any]) -> Iterator[Any]:
+        """Processa `items` e gera os resultados da última etapa."""
+        self.started_at = time.monotonic()
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+
+        threading.Thread(target=self._feed, args=(items, queues[0]), name="pipeline-source", daemon=True).start()
+        for i, stage in enumerate(self.stages):
+            downstream_workers = self.stages[i + 1].workers if i + 1 < len(self.stages) else 1
+            stage._alive = stage.workers
+            for n in range(stage.workers):
+                threading.Thread(
+                    target=self._work,
+                    args=(stage, queues[i], queues[i + 1], downstream_workers),
+                    name=f"pipeline-{stage.name}-{n}",
+                    daemon=True
+                ).start()
+
+        last_report = time.monotonic()
+        output = queues[-1]
+        while True:
+            item = output.get()
+            if item is _DONE:
+                break
+            yield item
+            if self.report_every and time.monotonic() - last_report >= self.report_every:
+                self.report()
+                last_report = time.monotonic()
+
+        self.report()
+        if self._source_error:
+            raise self._source_error
+
+    def report(self):
+        """Loga itens processados, erros e vazão de cada etapa."""
+        elapsed = time.monotonic() - (self.started_at or time.monotonic())
+        parts = [
+            f"{s.name}: {s.processed} ({s.throughput(elapsed):.1f}/s, {s.errors} erros)"
+            for s in self.stages
+        ]
+        logger.info(f"Pipeline {elapsed:.0f}s | entrada: {self.fed} | " + " | ".join(parts))
+
+    def _feed(self, items: Iterable[Any], out: queue.Queue):
+        try:
+            for item in items:
+                out.put(item)
+                self.fed += 1
+        except BaseException as e:
+            logger.error(f"Erro na fonte do pipeline: {e}")
+            self._source_error = e
+        finally:
+            for _ in range(self.stages[0].workers if self.stages else 1):
+                out.put(_DONE)
+
+    def _work(self, stage: Stage, inbox: queue.Queue, out: queue.Queue, downstream_workers: int):
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                break
+            started = time.monotonic()
+            try:
+                result = stage.fn(item)
+            except Exception as e:
+                with stage._lock:
+                    stage.errors += 1
+                logger.error(f"Erro na etapa '{stage.name}': {e}")
+                result = stage.on_error(item, e) if stage.on_error else None
+            else:
+                with stage._lock:
+                    stage.processed += 1
+            finally:
+                with stage._lock:
+                    stage.busy_seconds += time.monotonic() - started
+
+            if result is not None:
+                out.put(result)
+
+        # Último worker da etapa encerra a etapa seguinte
+        with stage._lock:
+            stage._alive -= 1
+            last = stage._alive == 0
+        if last:
+            for _ in range(downstream_workers):
+                out.put(_DONE)
@@ -0,0 +1,56 @@
+import threading
+import time
+from typing import Optional
+
+class RateLimiter:
+    """
+    Limite de requisições por minuto (RPM) e tokens por minuto (TPM), compartilhado
+    entre threads. Dois baldes de fichas reabastecidos continuamente; acquire()
+    bloqueia até haver saldo para a requisição e seus tokens estimados.
+    Limites None ou 0 desativam o respectivo balde.
+    """
+
+    def __init__(self, rpm: Optional[float] = None, tpm: Optional[float] = None):
+        self.rpm = rpm or None
+        self.tpm = tpm or None
+        self._requests = float(self.rpm or 0)
+        self._tokens = float(self.tpm or 0)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.waited_seconds = 0.0
+
+    def acquire(self, tokens: int = 0):
+        """Reserva uma requisição com `tokens` tokens estimados (bloqueia se preciso)."""
+        while True:
+            with self._lock:
+                self._refill()
+                # Uma requisição maior que o TPM inteiro passaria nunca: limita ao balde cheio
+                tokens_needed = min(tokens, self.tpm) if self.tpm else 0
+                wait = max(
+                    self._deficit(self._requests, 1, self.rpm),
+                    self._deficit(self._tokens, tokens_needed, self.tpm)
+                )
+                if wait <= 0:
+                    if self.rpm:
+                        self._requests -= 1
+                    if self.tpm:
+                        self._tokens -= tokens_needed
+                    return
+                self.waited_seconds += wait
+            time.sleep(wait)
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        if self.rpm:
+            self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        if self.tpm:
+            self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    @staticmethod
+    def _deficit(available: float, needed: float, per_minute: Optional[float]) -> float:
+        """Segundos até o balde ter `needed` fichas."""
+        if not per_minute or available >= needed:
+            return 0.0
+        return (needed - available) * 60 / per_minute
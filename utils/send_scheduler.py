@@ -0,0 +1,211 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence
+from utils.logger import logger
+
+class SendTicket:
+    """
+    Acompanhamento de uma mensagem agendada.
+    first: resolve quando a primeira parte é enviada (o destinatário foi alcançado).
+    done: resolve com a lista de respostas de todas as partes.
+    Em caso de falha definitiva, os futures ainda pendentes recebem a exceção.
+    """
+    __slots__ = ("first", "done")
+
+    def __init__(self):
+        self.first = Future()
+        self.done = Future()
+
+class _PartJob:
+    """Mensagem em partes para um destinatário: envia parts[index] quando vencer."""
+    __slots__ = ("recipient", "parts", "index", "attempts", "results", "ticket")
+
+    def __init__(self, recipient: str, parts: Sequence[str], ticket: SendTicket):
+        self.recipient = recipient
+        self.parts = list(parts)
+        self.index = 0
+        self.attempts = 0
+        self.results: List[Any] = []
+        self.ticket = ticket
+
+class PartSendScheduler:
+    """
+    Agenda o envio de mensagens em partes sem bloquear quem chama.
+
+    Cada parte vira um job com horário (heap). Uma thread despacha os jobs vencidos
+    para um pool de envio, então partes de destinatários diferentes são enviadas
+    durante o intervalo entre as partes de outro. Por destinatário, a ordem é
+    preservada: a próxima parte só é agendada `gap_seconds` após a anterior ser
+    enviada, e uma nova mensagem só começa depois da anterior terminar.
+    Falhas são reagendadas com backoff (em vez de dormir na thread de envio).
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str, str], Any],
+        gap_seconds: float = 3,
+        max_workers: int = 4,
+        max_attempts: int = 3,
+        retry_backoff_seconds: float = 2
+    ):
+        self.send = send
+        self.gap_seconds = gap_seconds
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+        self.retry_backoff_seconds = retry_backoff_seconds
+
+        self._heap: List = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        # Destinatário -> mensagens aguardando a atual terminar
+        self._active: Dict[str, Deque[_PartJob]] = {}
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def submit(self, recipient: str, parts: Sequence[str]) -> SendTicket:
+        """Agenda as partes para envio em ordem. Retorna imediatamente."""
+        if self._closed:
+            raise RuntimeError("Agendador de envios encerrado.")
+        ticket = SendTicket()
+        if not parts:
+            ticket.first.set_result(None)
+            ticket.done.set_result([])
+            return ticket
+
+        job = _PartJob(recipient, parts, ticket)
+        with self._cond:
+            waiting = self._active.get(recipient)
+            if waiting is not None:
+                waiting.append(job)
+                return ticket
+            self._active[recipient] = deque()
+            self._push_locked(job, 0)
+        return ticket
+
+    def pending(self) -> int:
+        """Jobs de parte aguardando horário (não inclui mensagens enfileiradas por destinatário)."""
+        with self._cond:
+            return len(self._heap)
+
+    def shutdown(self, wait: bool = True, timeout: Optional[float] = None) -> bool:
+        """
+        Encerra o agendador. Com `wait`, envia antes todas as partes pendentes
+        (respeitando os intervalos) para nenhum destinatário ficar com mensagem truncada.
+        Sem `wait` (ou se `timeout` vencer), as mensagens incompletas falham.
+        Retorna True se tudo foi enviado.
+        """
+        with self._cond:
+            self._closed = True
+            drained = not self._active
+            if wait and not drained:
+                logger.info(f"Aguardando envio das partes pendentes para {len(self._active)} destinatário(s)...")
+                drained = self._cond.wait_for(lambda: not self._active, timeout)
+
+            abandoned = [] if drained else [job for _, _, job in self._heap]
+            abandoned += [job for waiting in self._active.values() for job in waiting] if not drained else []
+            self._heap.clear()
+            self._active.clear()
+            self._cond.notify_all()
+
+        for job in abandoned:
+            self._fail_ticket(job, RuntimeError("Agendador de envios encerrado antes do fim da mensagem."))
+        if abandoned:
+            logger.error(f"{len(abandoned)} mensagem(ns) ficaram incompletas no encerramento do agendador de envios.")
+
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+        return drained
+
+    def _push_locked(self, job: _PartJob, delay: float):
+        if self._thread is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="send-part")
+            self._thread = threading.Thread(target=self._dispatch, name="send-scheduler", daemon=True)
+            self._thread.start()
+        heapq.heappush(self._heap, (time.monotonic() + delay, next(self._seq), job))
+        self._cond.notify_all()
+
+    def _schedule(self, job: _PartJob, delay: float):
+        with self._cond:
+            if self._closed and job.recipient not in self._active:
+                # Abandonada pelo shutdown (timeout) enquanto a parte era enviada
+                abandoned = True
+            else:
+                abandoned = False
+                self._push_locked(job, delay)
+        if abandoned:
+            self._fail_ticket(job, RuntimeError("Agendador de envios encerrado antes do fim da mensagem."))
+
+    def _dispatch(self):
+        while True:
+            with self._cond:
+                while True:
+                    now = time.monotonic()
+                    if self._heap and self._heap[0][0] <= now:
+                        _, _, job = heapq.heappop(self._heap)
+                        break
+                    if self._closed and not self._active:
+                        return
+                    self._cond.wait(self._heap[0][0] - now if self._heap else None)
+            try:
+                self._pool.submit(self._send_part, job)
+            except RuntimeError:
+                # Pool já encerrado pelo interpretador (drenagem via atexit): envia aqui mesmo
+                self._send_part(job)
+
+    def _send_part(self, job: _PartJob):
+        try:
+            result = self.send(job.recipient, job.parts[job.index])
+        except Exception as e:
+            job.attempts += 1
+            if job.attempts >= self.max_attempts:
+                logger.error(
+                    f"Falha ao enviar parte {job.index + 1}/{len(job.parts)} para {job.recipient} "
+                    f"após {job.attempts} tentativas: {e}"
+                )
+                self._finish(job, error=e)
+                return
+            delay = self.retry_backoff_seconds * (2 ** (job.attempts - 1))
+            logger.warning(
+                f"Erro ao enviar parte {job.index + 1}/{len(job.parts)} para {job.recipient} "
+                f"(tentativa {job.attempts}), reagendando em {delay}s: {e}"
+            )
+            self._schedule(job, delay)
+            return
+
+        job.results.append(result)
+        if job.index == 0:
+            job.ticket.first.set_result(result)
+        job.index += 1
+        job.attempts = 0
+        if job.index < len(job.parts):
+            self._schedule(job, self.gap_seconds)
+        else:
+            self._finish(job)
+
+    def _finish(self, job: _PartJob, error: Optional[BaseException] = None):
+        # Libera o destinatário: a próxima mensagem dele respeita o mesmo intervalo
+        with self._cond:
+            waiting = self._active.get(job.recipient)
+            if waiting:
+                self._push_locked(waiting.popleft(), self.gap_seconds)
+            else:
+                self._active.pop(job.recipient, None)
+            # Acorda shutdown(wait=True) e o despachante
+            self._cond.notify_all()
+
+        if error is not None:
+            self._fail_ticket(job, error)
+        else:
+            job.ticket.done.set_result(job.results)
+
+    @staticmethod
+    def _fail_ticket(job: _PartJob, error: BaseException):
+        if not job.ticket.first.done():
+            job.ticket.first.set_exception(error)
+        if not job.ticket.done.done():
+            job.ticket.done.set_exception(error)
@@ -1,6 +1,7 @@
 
 import re
 from datetime import datetime
+from typing import Any, Iterable, Optional
 import pytz
 from config.settings import (
     TIMEZONE,
@@ -11,6 +12,23 @@ from config.settings import (
 )
 from .logger import logger
 
+# Padrões por país sobre o telefone já normalizado (apenas dígitos)
+PHONE_PATTERNS = {
+    # 55 + 2 (DDD) + 1 (9) + 8 (número) = 13 dígitos
+    # Aceita também sem o 9 extra em alguns casos legados, mas o padrão é 13 ou 12.
+    "BR": r'55[1-9]{2}9?\d{8}',
+    # 595 + 9 dígitos = 12 dígitos
+    "PY": r'5959\d{8}',
+    # 54 + 9 + 10 a 11 dígitos variáveis dependendo da área
+    "AR": r'549\d{10,11}',
+}
+
+_NON_DIGITS = re.compile(r'\D')
+_COUNTRY_PATTERNS = {country: re.compile(rf'^{pattern}$') for country, pattern in PHONE_PATTERNS.items()}
+# Uma passada só: o grupo que casou indica o país
+PHONE_COUNTRY_PATTERN = r'^(?:' + '|'.join(f'(?P<{country}>{pattern})' for country, pattern in PHONE_PATTERNS.items()) + r')$'
+_PHONE_COUNTRY = re.compile(PHONE_COUNTRY_PATTERN)
+
 def normalize_phone(phone: str) -> str:
     """
     Remove todos os caracteres não numéricos do telefone.
@@ -18,18 +36,14 @@ def normalize_phone(phone: str) -> str:
     """
     if not phone:
         return ""
-    return re.sub(r'\D', '', str(phone))
+    return _NON_DIGITS.sub('', str(phone))
 
 def validate_phone_br(phone: str) -> bool:
     """
     Valida telefone brasileiro (celular).
     Espera formato com DDI 55 + DDD (2 dígitos) + 9 + 8 dígitos.
     """
-    normalized = normalize_phone(phone)
-    # 55 + 2 (DDD) + 1 (9) + 8 (número) = 13 dígitos
-    # Aceita também sem o 9 extra em alguns casos legados, mas o padrão é 13 ou 12.
-    # Regex simplificado: ^55\d{10,11}$
-    return bool(re.match(r'^55[1-9]{2}9?\d{8}$', normalized))
+    return bool(_COUNTRY_PATTERNS["BR"].match(normalize_phone(phone)))
 
 def validate_phone_py(phone: str) -> bool:
     """
@@ -37,9 +51,7 @@ def validate_phone_py(phone: str) -> bool:
     DDI 595 + 9 dígitos (geralmente).
     Ex: 595 9XX XXX XXX
     """
-    normalized = normalize_phone(phone)
-    # 595 + 9 dígitos = 12 dígitos
-    return bool(re.match(r'^5959\d{8}$', normalized))
+    return bool(_COUNTRY_PATTERNS["PY"].match(normalize_phone(phone)))
 
 def validate_phone_ar(phone: str) -> bool:
     """
@@ -47,15 +59,53 @@ def validate_phone_ar(phone: str) -> bool:
     DDI 54 + 9 + código área + número.
     Móveis na argentina usam 9 após o DDI 54.
     """
-    normalized = normalize_phone(phone)
-    # 54 + 9 + 10 a 11 dígitos variáveis dependendo da área
-    return bool(re.match(r'^549\d{10,11}$', normalized))
+    return bool(_COUNTRY_PATTERNS["AR"].match(normalize_phone(phone)))
+
+def classify_phone(phone: str) -> Optional[str]:
+    """País do telefone ("BR", "PY", "AR") ou None se inválido."""
+    found = _PHONE_COUNTRY.match(normalize_phone(phone))
+    return found.lastgroup if found else None
 
 def validate_phone(phone: str) -> bool:
     """
     Valida se o telefone pertence a algum dos países suportados (BR, PY, AR).
     """
-    return validate_phone_br(phone) or validate_phone_py(phone) or validate_phone_ar(phone)
+    return classify_phone(phone) is not None
+
+def normalize_phones(phones: Iterable[Any]):
+    """
+    Versão em lote de normalize_phone.
+    Com uma pandas Series usa operações vetorizadas de string e retorna Series;
+    com qualquer outra sequência retorna lista (padrão pré-compilado, sem chamadas por linha).
+    """
+    if _is_series(phones):
+        return phones.astype("string").str.replace(r'\D', '', regex=True).fillna("")
+    sub = _NON_DIGITS.sub
+    return [sub('', str(phone)) if phone else "" for phone in phones]
+
+def classify_phones(phones: Iterable[Any]):
+    """
+    Normaliza e classifica telefones em lote, numa passada de regex por valor.
+    Series -> DataFrame com colunas "phone" (dígitos) e "country" (BR/PY/AR ou nulo);
+    outras sequências -> lista de (dígitos, país ou None).
+    """
+    digits = normalize_phones(phones)
+    if _is_series(phones):
+        groups = digits.str.extract(PHONE_COUNTRY_PATTERN)
+        matched = groups.notna()
+        country = matched.idxmax(axis=1).where(matched.any(axis=1))
+        return digits.to_frame("phone").assign(country=country)
+
+    match = _PHONE_COUNTRY.match
+    result = []
+    for phone in digits:
+        found = match(phone)
+        result.append((phone, found.lastgroup if found else None))
+    return result
+
+def _is_series(value: Any) -> bool:
+    # Evita importar pandas fora do dashboard
+    return type(value).__name__ == "Series" and hasattr(value, "str")
 
 def is_working_hours() -> bool:
     """